@@ -0,0 +1,108 @@
+import os
+import zipfile
+
+from django.conf import settings
+
+from FormatChecker.jobs import DONE, FAILED
+from FormatChecker.loader import spool_upload, spool_stream, upload_digest, discard
+
+SUPPORTED_EXTENSIONS = (".docx", ".doc")
+UNSUPPORTED_ERROR = "Only .doc and .docx files are supported"
+# The OOXML backend reads the zip package; legacy binary .doc files only open in Word
+LEGACY_DOC_ERROR = "Legacy .doc files can only be checked with the Word backend, please save the document as .docx"
+FINISHED = (DONE, FAILED)
+
+
+class BatchError(Exception):
+    pass
+
+
+def is_document_name(name):
+    basename = os.path.basename(name)
+    # Word leaves "~$name.docx" lock files next to open documents; they are not documents
+    return name.endswith(SUPPORTED_EXTENSIONS) and not basename.startswith("~$")
+
+
+def document_error(name):
+    # Why a file of this name cannot be checked with the configured backend, or None
+    if not is_document_name(name):
+        return UNSUPPORTED_ERROR
+    if name.endswith(".doc") and settings.DOCUMENT_BACKEND == "ooxml":
+        return LEGACY_DOC_ERROR
+    return None
+
+
+def spool_archive(archive, directory, spooled, rejected):
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            members = [info for info in zf.infolist()
+                       if not info.is_dir() and not info.filename.startswith("__MACOSX/")]
+            # Sizes come from the zip directory, so an oversized archive is refused before anything is inflated
+            if sum(info.file_size for info in members) > settings.BATCH_MAX_BYTES:
+                raise BatchError(f"{archive.name} is larger than {settings.BATCH_MAX_BYTES} bytes uncompressed")
+            for info in members:
+                name = f"{archive.name}/{info.filename}"
+                error = document_error(info.filename)
+                if error:
+                    rejected.append({"name": name, "error": error})
+                    continue
+                with zf.open(info) as member:
+                    path, digest = spool_stream(member, directory)
+                spooled.append((name, path, digest))
+    except zipfile.BadZipFile:
+        rejected.append({"name": archive.name, "error": "Not a valid zip archive"})
+
+
+def spool_batch(uploaded_files, directory):
+    # Returns (spooled, rejected); spooled is a list of (name, path, digest) the caller has to discard()
+    spooled = []
+    rejected = []
+    try:
+        for uploaded_file in uploaded_files:
+            if uploaded_file.name.endswith(".zip"):
+                spool_archive(uploaded_file, directory, spooled, rejected)
+            elif document_error(uploaded_file.name):
+                rejected.append({"name": uploaded_file.name, "error": document_error(uploaded_file.name)})
+            else:
+                digest = upload_digest(uploaded_file)
+                spooled.append((uploaded_file.name, spool_upload(uploaded_file, directory), digest))
+            if len(spooled) > settings.BATCH_MAX_FILES:
+                raise BatchError(f"A batch may contain at most {settings.BATCH_MAX_FILES} documents")
+    except BaseException:
+        for _, path, _ in spooled:
+            discard(path)
+        raise
+    return spooled, rejected
+
+
+def file_report(entry, job):
+    report = {"name": entry["name"], "job_id": entry.get("job_id")}
+    if job is None:
+        report.update(status=FAILED if report["job_id"] else "rejected", error=entry.get("error", "Unknown job"))
+        return report
+    report["status"] = job["status"]
+    if job["status"] == DONE:
+        report["result"] = job["result"]
+    elif job["status"] == FAILED:
+        report["error"] = job["error"]
+    else:
+        report.update({key: job[key] for key in ("rules_done", "rules_total", "paragraphs_checked",
+                                                 "paragraphs_total")})
+    return report
+
+
+def batch_report(store, batch):
+    job_ids = [entry["job_id"] for entry in batch["files"] if entry.get("job_id")]
+    jobs = store.get_many(job_ids) if job_ids else {}
+    files = [file_report(entry, jobs.get(entry.get("job_id"))) for entry in batch["files"]]
+    checked = [report for report in files if report["status"] != "rejected"]
+    finished = sum(1 for report in checked if report["status"] in FINISHED)
+    return {
+        "batch_id": batch["id"],
+        "status": DONE if finished == len(checked) else "running",
+        "total": len(checked),
+        "done": sum(1 for report in checked if report["status"] == DONE),
+        "failed": sum(1 for report in checked if report["status"] == FAILED),
+        "rejected": len(files) - len(checked),
+        "files": files,
+    }
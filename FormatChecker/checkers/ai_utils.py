@@ -1,53 +1,180 @@
-import requests
+import hashlib
 import re
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import requests
 import Levenshtein
+from decouple import config, Csv
+from requests.adapters import HTTPAdapter
 
-LANGUAGETOOL_URL = "https://api.languagetool.org/v2/check"
+from FormatChecker.checkers.exception_words import as_matcher, normalize, similarity_threshold
+from FormatChecker.checkers.lt_endpoints import EndpointPool
+from FormatChecker.checkers.rule_profile import default_profile
+
+LANGUAGETOOL_URL = config("LANGUAGETOOL_URL", default="https://api.languagetool.org/v2/check")
+# Comma-separated list of /v2/check URLs, e.g. a self-hosted server first and the public API as a fallback
+LANGUAGETOOL_URLS = config("LANGUAGETOOL_URLS", default=LANGUAGETOOL_URL, cast=Csv())
 
 SIMILARITY_THRESHOLD = 85
 
-def extract_abbreviations(text):
-    return set(re.findall(r"\b[А-ЯЇЄҐ]{2,}\b", text))
+# Paragraphs are packed into requests of at most this many characters
+MAX_CHUNK_CHARS = config("LANGUAGETOOL_MAX_CHUNK_CHARS", default=6000, cast=int)
+MAX_CONCURRENT_REQUESTS = config("LANGUAGETOOL_MAX_CONCURRENT_REQUESTS", default=4, cast=int)
+MAX_RETRIES = 3
+# Longest pause before giving up when every endpoint is out of rotation
+MAX_WAIT = 10
+ENDPOINT_FAILURE_THRESHOLD = config("LANGUAGETOOL_FAILURE_THRESHOLD", default=3, cast=int)
+ENDPOINT_COOLDOWN = config("LANGUAGETOOL_COOLDOWN", default=30, cast=int)
+ENDPOINT_HEALTH_INTERVAL = config("LANGUAGETOOL_HEALTH_INTERVAL", default=10, cast=int)
+RETRY_STATUSES = {429, 502, 503, 504}
+PARAGRAPH_SEPARATOR = "\n\n"
+ABBREVIATION = re.compile(r"\b[А-ЯЇЄҐ]{2,}\b")
+QUOTED_WORD = re.compile(r"«(.+?)»")
+
+_session = None
+_endpoint_pool = None
+_endpoint_pool_lock = threading.Lock()
 
-def clean_word(word):
-    # Remove common non-alphabetic characters (e.g. dashes, punctuation, spaces)
-    return re.sub(r"[^\wа-яА-ЯїЇєЄґҐ]", "", word).lower()
+def extract_abbreviations(text):
+    return set(ABBREVIATION.findall(text))
 
 def is_similar(word1, word2):
-    word1 = clean_word(word1.lower())
-    word2 = clean_word(word2.lower())
-    dist = Levenshtein.distance(word1, word2)
-    max_len = max(len(word1), len(word2))
-
-    if max_len <= 4:
-        max_dist = 1
-    elif max_len <= 7:
-        max_dist = 2
-    else:
-        max_dist = 3
-    return dist <= max_dist
+    word1 = normalize(word1)
+    word2 = normalize(word2)
+    return Levenshtein.distance(word1, word2) <= similarity_threshold(max(len(word1), len(word2)))
 
 def extract_word_from_brackets(text):
-    match = re.search(r"«(.+?)»", text)
+    match = QUOTED_WORD.search(text)
     return match.group(1) if match else None
 
-def check_spelling(text, page_number, exception_words, lang="uk"):
-    response = requests.post(LANGUAGETOOL_URL, data={"text": text, "language": lang})
+def get_session():
+    global _session
+    if _session is None:
+        session = requests.Session()
+        # One keep-alive pool per endpoint host, each as large as the number of parallel requests
+        adapter = HTTPAdapter(pool_connections=max(len(LANGUAGETOOL_URLS), 1), pool_maxsize=MAX_CONCURRENT_REQUESTS)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+def get_endpoint_pool():
+    global _endpoint_pool
+    with _endpoint_pool_lock:
+        if _endpoint_pool is None:
+            _endpoint_pool = EndpointPool(LANGUAGETOOL_URLS, failure_threshold=ENDPOINT_FAILURE_THRESHOLD,
+                                          cooldown=ENDPOINT_COOLDOWN, health_interval=ENDPOINT_HEALTH_INTERVAL,
+                                          session=get_session())
+        return _endpoint_pool
+
+def retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return int(retry_after)
+    return 2 ** attempt
+
+def request_matches(text, lang="uk", endpoints=None, profile=None):
+    # Returns (status_code, matches); status_code is None when no endpoint could be reached.
+    # A failing endpoint is skipped for the next attempt, so one bad server never costs a paragraph.
+    # Only requests actually sent count: MAX_RETRIES with one endpoint, one more for each extra endpoint.
+    session = get_session()
+    endpoints = endpoints or get_endpoint_pool()
+    response = None
+    tried = set()
+    sent = 0
+    while sent < MAX_RETRIES + len(endpoints.endpoints) - 1:
+        endpoint = endpoints.acquire(exclude=tried)
+        if endpoint is None:
+            # Every endpoint has failed this request or is out of rotation: pause, then start over,
+            # unless none of them is due back soon
+            wait = max(retry_delay(response, sent), endpoints.seconds_until_available())
+            if wait > MAX_WAIT:
+                break
+            tried.clear()
+            time.sleep(wait)
+            continue
+
+        sent += 1
+        started = time.perf_counter()
+        try:
+            response = session.post(endpoint.url, data={"text": text, "language": lang}, timeout=60)
+        except requests.RequestException as e:
+            print(f"LanguageTool request to {endpoint.url} failed:", e)
+            response = None
+        if profile:
+            profile.record_request(
+                time.perf_counter() - started,
+                response.status_code if response is not None else None,
+                len(response.request.body or b"") if response is not None else 0,
+                len(response.content) if response is not None else 0,
+                endpoint.url,
+            )
+
+        ok = response is not None and response.status_code not in RETRY_STATUSES
+        rate_limited = response is not None and response.status_code == 429
+        endpoints.release(endpoint, ok, retry_after=retry_delay(response, sent) if rate_limited else None)
+        if ok:
+            break
+        tried.add(endpoint)
+
+    if response is None:
+        return None, []
     if response.status_code != 200:
-        return f"Error: Unable to reach LanguageTool API (status: {response.status_code})"
+        return response.status_code, []
+    return 200, response.json().get("matches", [])
+
+def build_chunks(texts, max_chars=MAX_CHUNK_CHARS):
+    # Each chunk keeps (start, end, index) spans so matches can be traced back to their paragraph
+    chunks = []
+    current_texts = []
+    current_spans = []
+    length = 0
+    for index, text in enumerate(texts):
+        added = len(text) + (len(PARAGRAPH_SEPARATOR) if current_texts else 0)
+        if current_texts and length + added > max_chars:
+            chunks.append((PARAGRAPH_SEPARATOR.join(current_texts), current_spans))
+            current_texts, current_spans, length = [], [], 0
+            added = len(text)
+        start = length + (added - len(text))
+        current_texts.append(text)
+        current_spans.append((start, start + len(text), index))
+        length += added
+    if current_texts:
+        chunks.append((PARAGRAPH_SEPARATOR.join(current_texts), current_spans))
+    return chunks
 
-    matches = response.json().get("matches", [])
+def split_matches(spans, matches):
+    per_paragraph = {index: [] for _, _, index in spans}
+    starts = [start for start, _, _ in spans]
+    for match in matches:
+        offset = match.get("offset", 0)
+        position = bisect_right(starts, offset) - 1
+        if position < 0:
+            continue
+        start, end, index = spans[position]
+        # Matches that fall on the separator between paragraphs belong to none of them
+        if offset < end:
+            local_match = dict(match)
+            local_match["offset"] = offset - start
+            per_paragraph[index].append(local_match)
+    return per_paragraph
+
+def format_matches(text, page_number, matches, exception_words):
     if not matches:
         return ""
 
+    exception_words = as_matcher(exception_words)
     abbreviations = extract_abbreviations(text)
     result_lines = []
 
     for match in matches:
         rule_id = match.get("rule", {}).get("id", "")
         rule_desc = match.get("message", "Unknown issue")
-        ctx = match.get("context", {})
-        error_word = ctx.get("text", "")[match.get("offset", 0):match.get("offset", 0) + match.get("length", 0)].strip()
+        error_word = text[match.get("offset", 0):match.get("offset", 0) + match.get("length", 0)].strip()
 
         # Determine suggested word
         suggested_word = extract_word_from_brackets(rule_desc)
@@ -59,7 +186,7 @@ def check_spelling(text, page_number, exception_words, lang="uk"):
             continue
         if error_word in abbreviations or suggested_word in abbreviations:
             continue
-        if error_word in exception_words or any(is_similar(suggested_word, ex) for ex in exception_words):
+        if error_word in exception_words or exception_words.has_similar(suggested_word):
             continue
         if rule_id == "UPPERCASE_SENTENCE_START":
             before = text[:match.get("offset", 0)].strip()
@@ -73,34 +200,131 @@ def check_spelling(text, page_number, exception_words, lang="uk"):
 
     return "\n".join(result_lines)
 
-def check_document_spelling(doc, exception_words):
+def check_spelling(text, page_number, exception_words, lang="uk"):
+    status, matches = request_matches(text, lang)
+    if status != 200:
+        return f"Error: Unable to reach LanguageTool API (status: {status})"
+    return format_matches(text, page_number, matches, exception_words)
+
+def check_chunk(chunk, lang, profile=None):
+    text, spans = chunk
+    status, matches = request_matches(text, lang, profile=profile)
+    return status, split_matches(spans, matches)
+
+def collect_spelling_paragraphs(paragraphs, rule_profile):
+    # The text between the TOC and appendix titles of the rule profile, as the formatting rules see it
     content_started = False
-    result_text = []
-    for paragraph in doc.Paragraphs:
-        try:
-            text = paragraph.Range.Text.strip()
-            page_num = paragraph.Range.Information(3)  # Page number from Range.Information(3)
+    selected = []
+    for paragraph in paragraphs:
+        text = paragraph.text
 
-            if not text:
-                continue
+        if not text:
+            continue
 
-            elif paragraph.Range.Tables.Count > 0:
-                continue
+        elif paragraph.in_table:
+            continue
 
-            elif not content_started:
-                if "ЗМІСТ" in text.upper():
-                    content_started = True
-                continue
+        elif not content_started:
+            if rule_profile.toc_title in text.upper():
+                content_started = True
+            continue
 
-            if text.upper().strip() == "ДОДАТКИ":
-                break
+        if text.upper().strip() == rule_profile.appendices_title:
+            break
 
-            checked_row = check_spelling(text, page_num, exception_words)
-            if checked_row:
-                result_text.append(checked_row)
+        selected.append(paragraph)
+    return selected
 
-        except Exception as e:
-            print(e)
-            continue
+def grammar_cache_key(text, lang):
+    return f"lt-matches:{lang}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+def iter_paragraph_matches(paragraphs, lang="uk", cache=None, progress=None, profile=None, known=None):
+    # Yields (paragraph, matches, error) in document order as soon as the paragraph's chunk is back.
+    # matches is None when the request failed; the error is reported once per failed chunk.
+    # known, a {text: matches} dict, is never requested again and receives every text's matches.
+    texts = [paragraph.text for paragraph in paragraphs]
+    resolved = known if known is not None else {}
+    if cache is not None and texts:
+        keys = {grammar_cache_key(text, lang): text for text in texts if text not in resolved}
+        for key, matches in cache.get_many(list(keys)).items():
+            resolved[keys[key]] = matches
+
+    # Only texts missing from the cache reach the network, each of them once
+    missing = list(dict.fromkeys(text for text in texts if text not in resolved))
+    chunks = build_chunks(missing)
+    chunk_numbers = {missing[index]: number for number, (_, spans) in enumerate(chunks) for _, _, index in spans}
+    failed = {}
+
+    checked = len(texts) - len(missing)
+    progress_lock = threading.Lock()
+
+    def chunk_done(size, _future):
+        nonlocal checked
+        with progress_lock:
+            checked += size
+            progress(paragraphs_checked=checked, paragraphs_total=len(texts))
+
+    if progress:
+        progress(paragraphs_checked=checked, paragraphs_total=len(texts))
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        futures = [executor.submit(check_chunk, chunk, lang, profile) for chunk in chunks]
+        if progress:
+            for future, (_, spans) in zip(futures, chunks):
+                future.add_done_callback(partial(chunk_done, len(spans)))
+
+        for paragraph in paragraphs:
+            text = paragraph.text
+            if text not in resolved and text not in failed:
+                number = chunk_numbers[text]
+                status, per_paragraph = futures[number].result()
+                spans = chunks[number][1]
+                if status != 200:
+                    for _, _, index in spans:
+                        failed[missing[index]] = None
+                    failed[text] = f"Error: Unable to reach LanguageTool API (status: {status})"
+                else:
+                    fetched = {missing[index]: per_paragraph[index] for _, _, index in spans}
+                    resolved.update(fetched)
+                    if cache is not None:
+                        cache.set_many({grammar_cache_key(text, lang): matches for text, matches in fetched.items()})
+
+            if text in failed:
+                yield paragraph, None, failed[text]
+                failed[text] = None
+            else:
+                yield paragraph, resolved[text], None
+
+def check_document_spelling(paragraphs, exception_words, lang="uk", cache=None, progress=None, on_page=None,
+                            profile=None, known=None, rule_profile=None):
+    # on_page(page, lines) is called for every page once all of its paragraphs are checked.
+    # rule_profile is the compiled profile of the check; the default one has the same sections for every part.
+    selected = collect_spelling_paragraphs(paragraphs, rule_profile or default_profile("main_part"))
+    # Normalized and indexed once instead of once per match
+    exception_words = as_matcher(exception_words)
+
+    result_text = []
+    current_page = None
+    page_lines = []
+    for paragraph, matches, error in iter_paragraph_matches(selected, lang, cache, progress, profile, known):
+        if on_page and paragraph.page != current_page:
+            if current_page is not None:
+                on_page(current_page, page_lines)
+            current_page, page_lines = paragraph.page, []
+
+        if matches is None:
+            checked_row = error
+        else:
+            try:
+                checked_row = format_matches(paragraph.text, paragraph.page, matches, exception_words)
+            except Exception as e:
+                print(e)
+                continue
+        if checked_row:
+            result_text.append(checked_row)
+            page_lines.append(checked_row)
+
+    if on_page and current_page is not None:
+        on_page(current_page, page_lines)
 
-    return result_text if result_text else ["No grammar errors found"]
\ No newline at end of file
+    return result_text if result_text else ["No grammar errors found"]
@@ -0,0 +1,55 @@
+from itertools import chain
+from operator import attrgetter
+
+import numpy as np
+
+from FormatChecker.checkers import rules
+
+# What Word returns for a property that differs across a range
+MIXED = 9999999.0
+SPECIAL_CHARACTERS = ("\x07", "\x0c")
+NUMERIC_FIELDS = (
+    "font_size", "line_spacing", "left_indent", "right_indent", "first_line_indent", "alignment", "list_type",
+    "bold", "in_table", "has_inline_shape",
+)
+NUMERIC_FIELDS_GETTER = attrgetter(*NUMERIC_FIELDS)
+
+
+def round_half(values, digits):
+    # np.round scales by 10**digits first, so a value a hair from a half can round the other way than the
+    # round() the messages use; the few values that land near a half are redone with round()
+    rounded = np.round(values, digits)
+    scaled = values * 10 ** digits
+    for position in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6):
+        rounded[position] = round(float(values[position]), digits)
+    return rounded
+
+
+class ParagraphColumns:
+    # The snapshot's formatting values as NumPy arrays indexed by paragraph position, so the numeric rules
+    # compare whole columns at once and only format messages for the positions that fail
+
+    def __init__(self, paragraphs):
+        self.length = len(paragraphs)
+        # One pass over the records; attrgetter and fromiter do it without a Python-level loop body
+        numbers = np.fromiter(chain.from_iterable(map(NUMERIC_FIELDS_GETTER, paragraphs)), dtype=float,
+                              count=self.length * len(NUMERIC_FIELDS)).reshape(self.length, len(NUMERIC_FIELDS))
+        (self.font_size, self.line_spacing, self.left_indent, self.right_indent, self.first_line_indent,
+         self.alignment, self.list_type) = numbers.T[:7]
+        self.bold, self.in_table, self.has_inline_shape = numbers.T[7:].astype(bool)
+        self.font_name = np.array([paragraph.font_name for paragraph in paragraphs], dtype=object)
+        texts = np.array([paragraph.text for paragraph in paragraphs], dtype=object)
+        self.empty = texts == ""
+        # Empty, or only an end-of-cell mark or a page break
+        self.blank = self.empty | (texts == SPECIAL_CHARACTERS[0]) | (texts == SPECIAL_CHARACTERS[1])
+
+    def within(self, positions):
+        # Boolean mask of a range() of positions
+        mask = np.zeros(self.length, dtype=bool)
+        mask[positions.start:positions.stop] = True
+        return mask
+
+
+@rules.provides("columns", requires=("paragraphs",))
+def get_columns(paragraphs):
+    return ParagraphColumns(paragraphs)
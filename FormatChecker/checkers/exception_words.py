@@ -0,0 +1,109 @@
+import re
+
+import Levenshtein
+
+NON_WORD = re.compile(r"[^\wа-яА-ЯїЇєЄґҐ]")
+# No length gets a larger threshold than this
+MAX_THRESHOLD = 3
+
+
+def clean_word(word):
+    # Remove common non-alphabetic characters (e.g. dashes, punctuation, spaces)
+    return NON_WORD.sub("", word).lower()
+
+
+def normalize(word):
+    return clean_word(word.lower())
+
+
+def similarity_threshold(max_len):
+    if max_len <= 4:
+        return 1
+    if max_len <= 7:
+        return 2
+    return MAX_THRESHOLD
+
+
+def segments(length, threshold):
+    # Splits a word of this length into threshold + 1 (start, size) pieces, shortest first
+    parts = threshold + 1
+    base, extra = divmod(length, parts)
+    pieces = []
+    start = 0
+    for index in range(parts):
+        size = base + (1 if index >= parts - extra else 0)
+        pieces.append((start, size))
+        start += size
+    return pieces
+
+
+class ExceptionMatcher:
+    # Built once per exception list; has_similar(word) answers any(is_similar(word, ex) for ex in the list).
+    #
+    # Pigeonhole filter: if two words are within k edits, one of the k + 1 pieces of the exception appears
+    # unchanged in the other word, shifted by at most k. The index maps every piece to its exceptions, so a
+    # lookup only computes distances for exceptions that share a piece instead of for the whole list.
+
+    def __init__(self, words):
+        self.words = frozenset(word for word in words if isinstance(word, str))
+        self.lengths = set()
+        self.pieces = {}
+        for word in {normalize(word) for word in self.words}:
+            length = len(word)
+            self.lengths.add(length)
+            # Every threshold a query of length +-MAX_THRESHOLD could compare this word with
+            thresholds = {similarity_threshold(max(length, other))
+                          for other in range(max(0, length - MAX_THRESHOLD), length + MAX_THRESHOLD + 1)}
+            for threshold in thresholds:
+                for index, (start, size) in enumerate(segments(length, threshold)):
+                    key = (length, threshold, index, word[start:start + size])
+                    self.pieces.setdefault(key, []).append(word)
+
+    def __contains__(self, word):
+        return word in self.words
+
+    def __bool__(self):
+        return bool(self.words)
+
+    def has_similar(self, word):
+        word = normalize(word)
+        length = len(word)
+        checked = set()
+        for other in range(max(0, length - MAX_THRESHOLD), length + MAX_THRESHOLD + 1):
+            if other not in self.lengths:
+                continue
+            threshold = similarity_threshold(max(length, other))
+            # The distance is at least the length difference
+            if abs(length - other) > threshold:
+                continue
+            for index, (start, size) in enumerate(segments(other, threshold)):
+                for position in range(max(0, start - threshold), min(start + threshold, length - size) + 1):
+                    for candidate in self.pieces.get((other, threshold, index, word[position:position + size]), ()):
+                        if candidate in checked:
+                            continue
+                        checked.add(candidate)
+                        if Levenshtein.distance(word, candidate) <= threshold:
+                            return True
+        return False
+
+
+class MatcherUnion:
+    # Several matchers asked as one, e.g. a shared dictionary plus the words sent with a request
+
+    def __init__(self, matchers):
+        self.matchers = [matcher for matcher in matchers if matcher]
+
+    def __contains__(self, word):
+        return any(word in matcher for matcher in self.matchers)
+
+    def __bool__(self):
+        return bool(self.matchers)
+
+    def has_similar(self, word):
+        return any(matcher.has_similar(word) for matcher in self.matchers)
+
+
+def as_matcher(exception_words):
+    if isinstance(exception_words, (ExceptionMatcher, MatcherUnion)):
+        return exception_words
+    return ExceptionMatcher(exception_words)
@@ -1,43 +1,19 @@
 import FormatChecker.checkers.doc_utils as doc_utils
-import re
+from FormatChecker.checkers import rules, tables
+from FormatChecker.checkers.headings import HeadingIndex
+from FormatChecker.checkers.rule_profile import default_profile
+from FormatChecker.checkers.text_utils import DIGITS_AND_DOTS, clean_topic_name, strip_toc_entry
 
-def check_topics(doc, topics):
-    content_page_done = False
-    main_content_started = False
+def check_topics(paragraphs, headings):
     result_text = ""
-    cleaned_topics = [doc_utils.clean_topic_name(topic, to_upper=True) for topic in topics]
-
-    for paragraph in doc.Paragraphs:
-        text = paragraph.Range.Text.strip()
-
-        if not text:
-            continue
-
-        cleaned_text = doc_utils.clean_topic_name(text, to_upper=True)
-
-        if not content_page_done:
-            if "ЗМІСТ" in text.upper():
-                content_page_done = True
-            continue
-
-        if not main_content_started:
-            if cleaned_text in cleaned_topics:
-                main_content_started = True
-            continue
-
-        if re.search(r"[\d\s]+$", text):
-            continue
-
-        for topic in cleaned_topics:
-            if topic == cleaned_text:
-                result = doc_utils.check_full_caps_bold(paragraph)
-                if not result:
-                    result_text += f"Incorrect formatting for topic: {text}\n"
-                    # print(f"Incorrect formatting for topic: {text}")
-                break
+    for heading in headings.headings:
+        paragraph = paragraphs[heading.index]
+        result = doc_utils.check_full_caps_bold(paragraph)
+        if not result:
+            result_text += f"Incorrect formatting for topic: {paragraph.text}\n"
     return result_text
 
-def extract_topics_from_toc(doc, to_upper=False):
+def extract_topics_from_toc(doc, paragraphs, sections, to_upper=False):
     topics = []
 
     # Try extracting using Word's TOC method first
@@ -46,115 +22,112 @@ def extract_topics_from_toc(doc, to_upper=False):
         for toc_entry in toc.Range.Paragraphs:
             text = toc_entry.Range.Text.strip()
             if text:
-                topic_text = doc_utils.clean_topic_name(text, to_upper)
+                topic_text = clean_topic_name(text, to_upper)
                 if topic_text:
                     topics.append(topic_text)
     if topics:
         return topics
 
-    # If no TOC found, try extracting topics manually
-    for para in doc.Paragraphs:
-        if "ЗМІСТ" in para.Range.Text.strip():
-            seen = set()
-            current = para.Range.Next(Unit=3)
-            while current:
-                raw_text = current.Text.strip()
-                # Break if line is completely empty
-                if not raw_text:
-                    break
-                # Remove dot leaders and trailing page numbers
-                cleaned = re.sub(r'[.\u2026•·⋯⋅]{2,}', '', raw_text)
-                cleaned = re.sub(r'\s*\d{1,3}$', '', cleaned).strip()
-
-                topic_text = doc_utils.clean_topic_name(cleaned, to_upper)
-                # Stop if we've already seen the topic (likely body started)
-                if topic_text in seen:
-                    break
-                # Ignore lines that are mostly digits or dots
-                if re.match(r'^[\d.\s]*$', topic_text):
-                    current = current.Next(Unit=3)
-                    continue
-                # Stop if text is too long (likely not a topic)
-                if len(topic_text.split()) > 10:
-                    break
-                if topic_text:
-                    topics.append(topic_text)
-                    seen.add(topic_text)
-                current = current.Next(Unit=3)
+    # If no TOC found, try extracting topics manually from the lines after ЗМІСТ
+    if sections.toc is not None:
+        seen = set()
+        for current in paragraphs[sections.toc + 1:]:
+            raw_text = current.text
+            # Break if line is completely empty
+            if not raw_text:
+                break
+            # Remove dot leaders and trailing page numbers
+            cleaned = strip_toc_entry(raw_text)
+
+            topic_text = clean_topic_name(cleaned, to_upper)
+            # Stop if we've already seen the topic (likely body started)
+            if topic_text in seen:
+                break
+            # Ignore lines that are mostly digits or dots
+            if DIGITS_AND_DOTS.match(topic_text):
+                continue
+            # Stop if text is too long (likely not a topic)
+            if len(topic_text.split()) > 10:
+                break
+            if topic_text:
+                topics.append(topic_text)
+                seen.add(topic_text)
     return topics
 
 def get_paragraph_indents(paragraph):
-    left_indent = round(paragraph.Format.LeftIndent / 28.35, 2)  # Convert from points to cm
-    right_indent = round(paragraph.Format.RightIndent / 28.35, 2)
+    left_indent = round(paragraph.left_indent / 28.35, 2)  # Convert from points to cm
+    right_indent = round(paragraph.right_indent / 28.35, 2)
 
     # If indents return 0, try using FirstLineIndent (if needed)
     if left_indent == 0:
-        left_indent = round(paragraph.Format.FirstLineIndent / 28.35, 2)
+        left_indent = round(paragraph.first_line_indent / 28.35, 2)
 
     return left_indent, right_indent
 
-def check_project_stages_topic(doc, topics):
-    # Normalize topic names (remove numbers)
+def check_project_stages_topic(paragraphs, headings, rule_profile):
     result_text = ""
-    cleaned_topics = [doc_utils.clean_topic_name(topic) for topic in topics]
+    allowed_indents = rule_profile.project_stages_indents
+    allowed_text = " or ".join(f"{indent:.2f}" for indent in allowed_indents)
 
-    # Find the index of 'ЕТАПИ ПРОЄКТУВАННЯ' (ignore numbering)
-    stage_index = next((i for i, topic in enumerate(cleaned_topics) if "ЕТАПИ ПРОЄКТУВАННЯ" in topic), None)
+    # Find the 'ЕТАПИ ПРОЄКТУВАННЯ' heading (ignore numbering)
+    stage = next((heading for heading in headings.headings if rule_profile.project_stages_title in heading.key),
+                 None)
 
-    if stage_index is None:
+    if stage is None:
         # result_text += "Topic 'ЕТАПИ ПРОЄКТУВАННЯ' not present\n"
         return ""
 
-    # Identify the next topic dynamically
-    next_topic = cleaned_topics[stage_index + 1] if stage_index + 1 < len(cleaned_topics) else None
-
-    in_section = False
     expected_left_indent = None  # Will store the first detected left indent
 
-    for paragraph in doc.Paragraphs:
-        text = paragraph.Range.Text.strip()
-        cleaned_text = doc_utils.clean_topic_name(text)
-
-        # Detect the start of the section
-        if "ЕТАПИ ПРОЄКТУВАННЯ" in cleaned_text:
-            in_section = True
-            continue
-
-        # Stop checking if we reach the next topic
-        if next_topic and next_topic in cleaned_text:
-            break
+    # The section runs up to the next heading
+    for paragraph in paragraphs[stage.index + 1:headings.section_end(stage)]:
+        text = paragraph.text
 
         # Skip empty rows
-        if in_section and not text:
+        if not text:
             continue
 
         # Process indentation for relevant paragraphs
-        if in_section:
-            left_indent, right_indent = get_paragraph_indents(paragraph)
+        left_indent, right_indent = get_paragraph_indents(paragraph)
 
-            if expected_left_indent is None:
-                if left_indent in [0.00, 1.25]:  # Only allow 0 or 1.25
-                    expected_left_indent = left_indent
+        if expected_left_indent is None:
+            if left_indent in allowed_indents:  # Only allow e.g. 0 or 1.25
+                expected_left_indent = left_indent
 
-            # Ensure all rows have the same left indent (either 0 or 1.25)
-            if left_indent != expected_left_indent:
-                result_text += f"Left Indent: '{text}' ({left_indent:.2f} cm). All left indents have to be same and either 0.00 or 1.25 cm\n"
+        # Ensure all rows have the same left indent (one of the allowed ones)
+        if left_indent != expected_left_indent:
+            result_text += f"Left Indent: '{text}' ({left_indent:.2f} cm). All left indents have to be same and either {allowed_text} cm\n"
 
-            # Right indent should always be 0.00 cm
-            if right_indent != 0.00:
-                result_text += f"Right Indent: {text} ({right_indent:.2f} cm) (should be 0.00 cm)\n"
+        # Right indent should always be 0.00 cm
+        if right_indent != 0.00:
+            result_text += f"Right Indent: {text} ({right_indent:.2f} cm) (should be 0.00 cm)\n"
     return result_text
 
-def check_formatting(doc):
-    topics = extract_topics_from_toc(doc, to_upper=True)
-    checks = [doc_utils.check_page_attributes(doc),
-              doc_utils.check_font_and_size(doc),
-              check_topics(doc, topics),
-              doc_utils.check_list_formatting(doc, topics),
-              check_project_stages_topic(doc, topics),
-              doc_utils.check_interline_spacing(doc),
-              doc_utils.check_centered_items_indents_in_document(doc),
-              doc_utils.check_table_format(doc),
-              doc_utils.check_table_page_count(doc)]
-    result = [item for item in checks if item]
-    return result
\ No newline at end of file
+@rules.provides("toc_topics", requires=("doc", "paragraphs", "sections"))
+def get_toc_topics(doc, paragraphs, sections):
+    return extract_topics_from_toc(doc, paragraphs, sections, to_upper=True)
+
+@rules.provides("toc_headings", requires=("paragraphs", "sections", "toc_topics"))
+def index_toc_headings(paragraphs, sections, topics):
+    return HeadingIndex(paragraphs, sections, topics)
+
+PARTS = rules.EXTRAS_PARTS
+
+rules.register("page_attributes", doc_utils.check_page_attributes, ("page_setup", "rule_profile"), PARTS)
+rules.register("font_and_size", doc_utils.check_font_and_size, ("paragraphs", "columns", "sections", "rule_profile"),
+               PARTS)
+rules.register("topics", check_topics, ("paragraphs", "toc_headings"), PARTS)
+rules.register("list_formatting", doc_utils.check_list_formatting,
+               ("paragraphs", "columns", "toc_headings", "rule_profile"), PARTS)
+rules.register("project_stages", check_project_stages_topic, ("paragraphs", "toc_headings", "rule_profile"), PARTS)
+rules.register("interline_spacing", doc_utils.check_interline_spacing,
+               ("paragraphs", "columns", "sections", "rule_profile"), PARTS)
+rules.register("centered_indents", doc_utils.check_centered_items_indents_in_document, ("paragraphs", "columns"),
+               PARTS)
+rules.register("table_format", tables.check_table_format, ("tables", "paragraphs", "rule_profile"), PARTS,
+               cost=rules.EXPENSIVE)
+rules.register("table_page_count", tables.check_table_page_count, ("tables",), PARTS, cost=rules.EXPENSIVE)
+
+def check_formatting(doc, paragraphs, document_part="tech_assignment", progress=None, names=None, workers=1):
+    return rules.run_rules(doc, paragraphs, document_part, names, progress, workers,
+                           rule_profile=default_profile(document_part))
\ No newline at end of file
@@ -0,0 +1,84 @@
+from bisect import bisect_right
+
+from FormatChecker.checkers import rules
+from FormatChecker.checkers.text_utils import PAGE_NUMBER_SUFFIX, clean_topic_name
+
+
+def normalize_heading(text):
+    return clean_topic_name(text, to_upper=True)
+
+
+class Sections:
+    # Positions of the ЗМІСТ heading and of the ДОДАТКИ heading after it, or None when missing; the titles
+    # come upper-cased from the rule profile
+
+    def __init__(self, paragraphs, toc_title, appendices_title):
+        self.end = len(paragraphs)
+        self.toc = next((position for position, paragraph in enumerate(paragraphs)
+                         if toc_title in paragraph.text.upper()), None)
+        start = 0 if self.toc is None else self.toc + 1
+        self.appendices = next((position for position in range(start, self.end)
+                                if paragraphs[position].text.strip().upper() == appendices_title), None)
+
+    def content(self, stop_at_appendices=True):
+        # range() of the paragraphs after ЗМІСТ; empty when the document has no ЗМІСТ
+        if self.toc is None:
+            return range(0)
+        stop = self.appendices if stop_at_appendices and self.appendices is not None else self.end
+        return range(self.toc + 1, stop)
+
+
+class Heading:
+    __slots__ = ("index", "level", "key")
+
+    def __init__(self, index, level, key):
+        self.index = index
+        self.level = level
+        self.key = key
+
+    def __repr__(self):
+        return f"Heading({self.index}, level={self.level}, {self.key!r})"
+
+
+class HeadingIndex:
+    # The TOC topics as normalized hash sets and every paragraph after ЗМІСТ that is one of them, built once
+    # per document. Level 1 are main topics, level 2 subtopics; a text that is both counts as a main topic.
+
+    def __init__(self, paragraphs, sections, main_topics, subtopics=()):
+        self.sections = sections
+        self.main_topics = {normalize_heading(topic) for topic in main_topics} - {""}
+        self.subtopics = {normalize_heading(topic) for topic in subtopics} - {""}
+        self.headings = []
+        self.positions = []
+        self.levels = {}
+        for position in sections.content(stop_at_appendices=False):
+            text = paragraphs[position].text
+            if not text or PAGE_NUMBER_SUFFIX.search(text):
+                continue
+            key = normalize_heading(text)
+            level = 1 if key in self.main_topics else 2 if key in self.subtopics else None
+            if level is not None:
+                self.headings.append(Heading(position, level, key))
+                self.positions.append(position)
+                self.levels[position] = level
+
+    @property
+    def body(self):
+        # The first heading after the TOC, where the main text starts
+        return self.headings[0].index if self.headings else None
+
+    def is_heading(self, position):
+        return position in self.levels
+
+    def section_end(self, heading):
+        # The next heading of any level, or ДОДАТКИ, or the end of the document
+        following = bisect_right(self.positions, heading.index)
+        if following < len(self.positions):
+            return self.positions[following]
+        appendices = self.sections.appendices
+        return appendices if appendices is not None and appendices > heading.index else self.sections.end
+
+
+@rules.provides("sections", requires=("paragraphs", "rule_profile"))
+def get_sections(paragraphs, rule_profile):
+    return Sections(paragraphs, rule_profile.toc_title, rule_profile.appendices_title)
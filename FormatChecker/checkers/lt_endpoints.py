@@ -0,0 +1,114 @@
+import threading
+import time
+
+import requests
+
+
+class Endpoint:
+    def __init__(self, index, url):
+        self.index = index
+        self.url = url
+        self.failures = 0
+        self.open_until = 0.0
+        self.rate_limited = False
+        self.in_flight = 0
+
+    @property
+    def health_url(self):
+        # .../v2/check -> .../v2/languages, the cheapest call LanguageTool answers
+        return self.url.rsplit("/", 1)[0] + "/languages"
+
+    def is_open(self, now):
+        return now < self.open_until
+
+    def __repr__(self):
+        return f"Endpoint({self.url!r}, failures={self.failures})"
+
+
+class EndpointPool:
+    # Spreads requests over several LanguageTool servers. An endpoint that fails failure_threshold times
+    # in a row is taken out for cooldown seconds (its circuit opens); a background health check brings it
+    # back sooner once it answers again. A 429 takes it out for as long as its Retry-After asks.
+
+    def __init__(self, urls, failure_threshold=3, cooldown=30, health_interval=10, session=None):
+        if not urls:
+            raise ValueError("At least one LanguageTool endpoint is required")
+        self.endpoints = [Endpoint(index, url) for index, url in enumerate(urls)]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.health_interval = health_interval
+        self.session = session or requests.Session()
+        self.lock = threading.Lock()
+        self._turn = 0
+        self._health_thread = None
+
+    def acquire(self, exclude=()):
+        # Least busy endpoint first; ties rotate so an idle pool still spreads the load
+        with self.lock:
+            now = time.monotonic()
+            candidates = [e for e in self.endpoints if e not in exclude and not e.is_open(now)]
+            if not candidates:
+                return None
+            turn = self._turn
+            self._turn = (self._turn + 1) % len(self.endpoints)
+            endpoint = min(candidates, key=lambda e: (e.in_flight, (e.index - turn) % len(self.endpoints)))
+            endpoint.in_flight += 1
+            return endpoint
+
+    def release(self, endpoint, ok, retry_after=None):
+        with self.lock:
+            endpoint.in_flight -= 1
+            if ok:
+                endpoint.failures = 0
+                endpoint.open_until = 0.0
+                endpoint.rate_limited = False
+                return
+            endpoint.failures += 1
+            now = time.monotonic()
+            if retry_after:
+                endpoint.open_until = now + retry_after
+                endpoint.rate_limited = True
+            elif endpoint.failures >= self.failure_threshold:
+                # Once the cooldown has passed the next request is a trial: one more failure reopens it
+                endpoint.open_until = now + self.cooldown
+            else:
+                return
+        print(f"LanguageTool endpoint {endpoint.url} taken out of rotation")
+        self._start_health_checks()
+
+    def seconds_until_available(self):
+        with self.lock:
+            now = time.monotonic()
+            return max(0.0, min(endpoint.open_until for endpoint in self.endpoints) - now)
+
+    def _start_health_checks(self):
+        with self.lock:
+            if self._health_thread is not None and self._health_thread.is_alive():
+                return
+            self._health_thread = threading.Thread(target=self._health_loop, name="languagetool-health",
+                                                   daemon=True)
+            self._health_thread.start()
+
+    def _health_loop(self):
+        # Runs only while some endpoint is out of rotation
+        while True:
+            time.sleep(self.health_interval)
+            with self.lock:
+                now = time.monotonic()
+                # A rate-limited server still answers health checks, so it waits out its Retry-After
+                waiting = [e for e in self.endpoints if e.is_open(now) and not e.rate_limited]
+                if not any(e.is_open(now) for e in self.endpoints):
+                    self._health_thread = None
+                    return
+            for endpoint in waiting:
+                if self._is_healthy(endpoint):
+                    with self.lock:
+                        endpoint.failures = 0
+                        endpoint.open_until = 0.0
+                    print(f"LanguageTool endpoint {endpoint.url} is back in rotation")
+
+    def _is_healthy(self, endpoint):
+        try:
+            return self.session.get(endpoint.health_url, timeout=5).status_code == 200
+        except requests.RequestException:
+            return False
@@ -1,7 +1,15 @@
+from functools import partial
+
 import FormatChecker.checkers.doc_utils as doc_utils
-import re
+from FormatChecker.checkers import rules, tables
+from FormatChecker.checkers.headings import HeadingIndex
+from FormatChecker.checkers.rule_profile import default_profile
+from FormatChecker.checkers.text_utils import (
+    ANY_DIGIT, FIRST_LETTER, NUMBERING_PREFIX, SUBTOPIC_NUMBERING, TOC_ENTRY_PAGE, clean_topic_name,
+)
 
 
+@rules.provides("main_part_topics", requires=("doc",))
 def extract_main_part_topics(doc):
     topics = {"main_topics": [], "subtopics": []}
     flag = False  # Flag to track if we are concatenating rows without page numbers
@@ -12,20 +20,20 @@ def extract_main_part_topics(doc):
 
         for toc_entry in toc.Range.Paragraphs:
             full_text = toc_entry.Range.Text.strip()
-            cleaned_text = doc_utils.clean_topic_name(full_text, to_upper=False)
+            cleaned_text = clean_topic_name(full_text, to_upper=False)
 
             if full_text:
-                if re.search(r'\d{1,2}$', full_text):  # Check if the row has a number at the end
+                if TOC_ENTRY_PAGE.search(full_text):  # Check if the row has a number at the end
                     if flag:
                         full_text = temp_str + " " + full_text  # Concatenate with previous row
-                        cleaned_text = doc_utils.clean_topic_name(full_text, to_upper=False)
+                        cleaned_text = clean_topic_name(full_text, to_upper=False)
                         temp_str = ""
                         flag = False
 
                     # Categorize topics
-                    if cleaned_text.isupper() and not re.search(r'\d', full_text):
+                    if cleaned_text.isupper() and not ANY_DIGIT.search(full_text):
                         topics["main_topics"].append(cleaned_text)
-                    elif re.match(r'^\d{1,2}\.\d{1,2}\.\s', full_text):  # Subtopics like "1.2."
+                    elif SUBTOPIC_NUMBERING.match(full_text):  # Subtopics like "1.2."
                         topics["subtopics"].append(cleaned_text)
                     else:
                         topics["main_topics"].append(cleaned_text)
@@ -35,81 +43,52 @@ def extract_main_part_topics(doc):
 
     return topics
 
-def check_topics(doc, topics):
-    toc_done = False  # Flag to skip the ToC
-    main_content_started = False  # Flag to start checking after ToC
-
-    cleaned_main_topics = [doc_utils.clean_topic_name(topic, to_upper=True) for topic in topics["main_topics"]]
-    cleaned_subtopics = [doc_utils.clean_topic_name(topic, to_lower=True) for topic in topics["subtopics"]]
-
+def check_topics(paragraphs, headings):
     result_text = ""
-    for paragraph in doc.Paragraphs:
-        text = paragraph.Range.Text.strip()
-
-        if not text:
-            continue
-
-        cleaned_text = doc_utils.clean_topic_name(text)
-
-        # Detect and skip the Table of Contents
-        if not toc_done:
-            if "ЗМІСТ" in text.upper():
-                toc_done = True
-            continue
-
-        if not main_content_started:
-            if cleaned_text.upper() in cleaned_main_topics or cleaned_text.lower() in cleaned_subtopics:
-                main_content_started = True
-            continue
-
-        if re.search(r"[\d\s]+$", text):  # Ignore lines that are just numbers
-            continue
+    for heading in headings.headings:
+        paragraph = paragraphs[heading.index]
+        text = paragraph.text
 
         # Extract the actual subtopic text (remove leading numbers, spaces, and tabs)
-        subtopic_match = re.match(r"[\d.]+\s*(.*)", text)
+        subtopic_match = NUMBERING_PREFIX.match(text)
         subtopic_text = subtopic_match.group(1) if subtopic_match else text
 
-        if cleaned_text.upper() in cleaned_main_topics:
+        if heading.level == 1:
             result = doc_utils.check_full_caps_bold(paragraph)
             if not result:
                 result_text += f"Incorrect formatting for main topic: {text}\n"
 
-        elif cleaned_text.lower() in cleaned_subtopics:
-            is_bold = paragraph.Range.Font.Bold == -1  # Check for bold (Word uses -1 for bold)
+        else:
+            is_bold = paragraph.bold == -1  # Check for bold (Word uses -1 for bold)
             if not is_bold:
                 result_text += f"Incorrect formatting for subtopic: {text} (should be bold)\n"
-            first_letter_match = re.search(r'\w', subtopic_text)
+            first_letter_match = FIRST_LETTER.search(subtopic_text)
 
             if first_letter_match and not first_letter_match.group(0).isupper():
                 result_text += f"Incorrect capitalization for subtopic: {text} (should start with a capital letter)\n"
     return result_text
 
-def flatten_main_headers(headers_dict):
-    flat_headers = []
-
-    # Combine and normalize both main and subtopics
-    for topic in headers_dict.get("main_topics", []):
-        flat_headers.append(topic.strip().upper())
-
-    for subtopic in headers_dict.get("subtopics", []):
-        flat_headers.append(subtopic.strip())
-
-    return flat_headers
-
-def check_formatting(doc):
-    topics = extract_main_part_topics(doc)
-    topics_for_list = flatten_main_headers(topics)
-    checks = [
-        doc_utils.check_page_attributes(doc),
-        doc_utils.check_font_and_size(doc, exclude_after="ДОДАТКИ"),
-        check_topics(doc, topics),
-        doc_utils.check_list_formatting(doc, topics_for_list),
-        doc_utils.check_table_format(doc),
-        doc_utils.check_table_page_count(doc),
-        doc_utils.check_images_and_captions(doc),
-        doc_utils.check_interline_spacing(doc),
-        doc_utils.check_centered_items_indents_in_document(doc),
-    ]
-
-    result = [item for item in checks if item]
-    return result
+@rules.provides("main_part_headings", requires=("paragraphs", "sections", "main_part_topics"))
+def index_main_part_headings(paragraphs, sections, topics):
+    return HeadingIndex(paragraphs, sections, topics["main_topics"], topics["subtopics"])
+
+PARTS = rules.MAIN_PART
+
+rules.register("page_attributes", doc_utils.check_page_attributes, ("page_setup", "rule_profile"), PARTS)
+rules.register("font_and_size", partial(doc_utils.check_font_and_size, stop_at_appendices=True),
+               ("paragraphs", "columns", "sections", "rule_profile"), PARTS)
+rules.register("topics", check_topics, ("paragraphs", "main_part_headings"), PARTS)
+rules.register("list_formatting", doc_utils.check_list_formatting,
+               ("paragraphs", "columns", "main_part_headings", "rule_profile"), PARTS)
+rules.register("table_format", tables.check_table_format, ("tables", "paragraphs", "rule_profile"), PARTS,
+               cost=rules.EXPENSIVE)
+rules.register("table_page_count", tables.check_table_page_count, ("tables",), PARTS, cost=rules.EXPENSIVE)
+rules.register("images_and_captions", doc_utils.check_images_and_captions, ("paragraphs", "rule_profile"), PARTS)
+rules.register("interline_spacing", doc_utils.check_interline_spacing,
+               ("paragraphs", "columns", "sections", "rule_profile"), PARTS)
+rules.register("centered_indents", doc_utils.check_centered_items_indents_in_document, ("paragraphs", "columns"),
+               PARTS)
+
+def check_formatting(doc, paragraphs, progress=None, names=None, workers=1):
+    return rules.run_rules(doc, paragraphs, "main_part", names, progress, workers,
+                           rule_profile=default_profile("main_part"))
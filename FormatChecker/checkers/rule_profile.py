@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+
+from FormatChecker.checkers import rules
+from FormatChecker.checkers.columns import MIXED
+
+DEFAULT_PROFILE = os.path.join(os.path.dirname(__file__), "profiles", "default.json")
+NUMBER = "number"
+TEXT = "text"
+# [low, high], both in cm
+RANGE = "range"
+# What the "rules" of a profile hold; a faculty profile lists only what it changes
+SCHEMA = {
+    "page": {
+        "margins_cm": {"left": NUMBER, "right": NUMBER, "top": NUMBER, "bottom": NUMBER},
+        "size_name": TEXT,
+        "width_cm": NUMBER,
+        "height_cm": NUMBER,
+        "tolerance_cm": NUMBER,
+    },
+    "font": {"name": TEXT, "size": NUMBER},
+    "line_spacing": NUMBER,
+    "list_indents_cm": {"type3": RANGE, "type3_two_digit": RANGE, "type4": RANGE, "type4_two_digit": RANGE},
+    "sections": {"toc_title": TEXT, "appendices_title": TEXT},
+    "tables": {
+        "heading_label": TEXT,
+        "heading_right_indent_cm": NUMBER,
+        "continuation_label": TEXT,
+        "cell_fonts": [TEXT],
+        "cell_sizes": [NUMBER],
+    },
+    "captions": {"figure_label": TEXT},
+    "project_stages": {"title": TEXT, "left_indents_cm": [NUMBER]},
+}
+
+
+class RuleProfileError(Exception):
+    pass
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate(value, schema, path, complete=False):
+    # Raises RuleProfileError naming the first wrong key; complete=True also requires every key of the schema
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            raise RuleProfileError(f"{path} must be an object")
+        unknown = set(value) - set(schema)
+        if unknown:
+            raise RuleProfileError(f"Unknown keys in {path}: {', '.join(sorted(unknown))}")
+        missing = set(schema) - set(value) if complete else ()
+        if missing:
+            raise RuleProfileError(f"Missing keys in {path}: {', '.join(sorted(missing))}")
+        for key, item in value.items():
+            validate(item, schema[key], f"{path}.{key}", complete)
+    elif isinstance(schema, list):
+        if not isinstance(value, list):
+            raise RuleProfileError(f"{path} must be a list")
+        for position, item in enumerate(value):
+            validate(item, schema[0], f"{path}[{position}]", complete)
+    elif schema == RANGE:
+        if not (isinstance(value, list) and len(value) == 2 and all(map(is_number, value)) and value[0] <= value[1]):
+            raise RuleProfileError(f"{path} must be [low, high]")
+    elif schema == NUMBER:
+        if not is_number(value):
+            raise RuleProfileError(f"{path} must be a number")
+    elif not isinstance(value, str) or not value.strip():
+        raise RuleProfileError(f"{path} must be a non-empty string")
+
+
+def read_profile(path):
+    # A profile file: {"description": ..., "rules": {...}, "parts": {document_part: {...}}}, where each part
+    # changes the rules for that part only
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise RuleProfileError(f"Cannot read rule profile {os.path.basename(path)}: {e}") from None
+    name = os.path.basename(path)
+    parts = {part: SCHEMA for part in rules.MAIN_PART + rules.EXTRAS_PARTS}
+    validate(data, {"description": TEXT, "rules": SCHEMA, "parts": parts}, name)
+    return data
+
+
+def merge(base, overrides):
+    merged = dict(base)
+    for key, value in overrides.items():
+        merged[key] = merge(merged[key], value) if isinstance(value, dict) and key in merged else value
+    return merged
+
+
+def part_settings(profiles, document_part):
+    # The rules of one document part from profiles applied in order, the default first
+    settings = {}
+    for data in profiles:
+        settings = merge(settings, data.get("rules", {}))
+        settings = merge(settings, data.get("parts", {}).get(document_part, {}))
+    validate(settings, SCHEMA, "rules", complete=True)
+    return settings
+
+
+class RuleProfile:
+    # The expected values of one faculty's standard for one document part, compiled once: numbers as floats,
+    # labels as regexes, allowed values as sets. The rules read it as their "rule_profile" input.
+
+    def __init__(self, faculty, document_part, settings):
+        self.faculty = faculty
+        self.document_part = document_part
+        self.settings = settings
+        self.digest = hashlib.blake2b(json.dumps(settings, ensure_ascii=False, sort_keys=True).encode("utf-8"),
+                                      digest_size=8).hexdigest()
+
+        page = settings["page"]
+        self.margins = {side.capitalize(): float(value) for side, value in page["margins_cm"].items()}
+        self.page_size_name = page["size_name"]
+        self.page_size = (float(page["width_cm"]), float(page["height_cm"]))
+        self.tolerance = float(page["tolerance_cm"])
+
+        self.font_name = settings["font"]["name"]
+        self.font_size = float(settings["font"]["size"])
+        self.line_spacing = float(settings["line_spacing"])
+
+        indents = settings["list_indents_cm"]
+        self.list_indents = {name: tuple(map(float, indents[name])) for name in indents}
+
+        self.toc_title = settings["sections"]["toc_title"].upper()
+        self.appendices_title = settings["sections"]["appendices_title"].upper()
+
+        tables = settings["tables"]
+        self.table_heading = re.compile(rf"^{re.escape(tables['heading_label'])}\s+\d+(\.\d+)*$")
+        self.table_heading_right_indent = float(tables["heading_right_indent_cm"])
+        self.continuation_label = tables["continuation_label"]
+        self.table_continuation = re.compile(rf"^{re.escape(self.continuation_label)} (\d+(\.\d+)*)$")
+        # What Word reports for cells with more than one font ("") or size (MIXED) always passes
+        self.cell_fonts = frozenset(tables["cell_fonts"]) | {""}
+        self.cell_sizes = frozenset(map(float, tables["cell_sizes"])) | {MIXED}
+
+        self.figure_label = settings["captions"]["figure_label"]
+        self.figure_label_lower = self.figure_label.lower()
+
+        self.project_stages_title = settings["project_stages"]["title"].upper()
+        self.project_stages_indents = tuple(map(float, settings["project_stages"]["left_indents_cm"]))
+
+    def __repr__(self):
+        return f"RuleProfile({self.faculty!r}, {self.document_part!r}, {self.digest})"
+
+
+@lru_cache(maxsize=16)
+def default_profile(document_part):
+    return RuleProfile("default", document_part, part_settings([read_profile(DEFAULT_PROFILE)], document_part))
+
+
+@rules.provides("rule_profile", requires=("document_part",))
+def get_default_profile(document_part):
+    # Only used when a run does not pass a profile of its own
+    return default_profile(document_part)
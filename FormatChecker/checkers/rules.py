@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+CHEAP = "cheap"
+EXPENSIVE = "expensive"
+QUICK = "quick"
+
+MAIN_PART = ("main_part",)
+EXTRAS_PARTS = ("tech_assignment", "testing_methodology", "user_manual")
+
+
+class Rule:
+    def __init__(self, name, func, inputs, parts, cost):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.parts = tuple(parts)
+        self.cost = cost
+
+    def __call__(self, values):
+        return self.func(*[values[name] for name in self.inputs])
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, parts={self.parts})"
+
+
+class InputProvider:
+    def __init__(self, name, func, requires):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+
+
+RULES = []
+INPUTS = {}
+
+
+def register(name, func, inputs, parts, cost=CHEAP):
+    RULES.append(Rule(name, func, inputs, parts, cost))
+    return func
+
+
+def provides(name, requires):
+    # Registers a function that computes a shared rule input once per document
+    def decorator(func):
+        INPUTS[name] = InputProvider(name, func, requires)
+        return func
+    return decorator
+
+
+def known_parts():
+    return {part for rule in RULES for part in rule.parts}
+
+
+def rule_names(document_part):
+    return [rule.name for rule in RULES if document_part in rule.parts]
+
+
+def select_rules(document_part, names=None):
+    # names is None for every rule, QUICK for the cheap ones, or an iterable of rule names
+    rules = [rule for rule in RULES if document_part in rule.parts]
+    if names is None:
+        return rules
+    if names == QUICK:
+        return [rule for rule in rules if rule.cost == CHEAP]
+    names = set(names)
+    return [rule for rule in rules if rule.name in names]
+
+
+def call_rule(rule, values, profile=None):
+    args = [values[name] for name in rule.inputs]
+    if profile:
+        return profile.call("rules", rule.name, rule.func, args)
+    return rule.func(*args)
+
+
+def compute_inputs(rules, values, profile=None):
+    # Resolves each input, and whatever it depends on, exactly once
+    def resolve(name, resolving=()):
+        if name in values:
+            return
+        if name not in INPUTS:
+            raise KeyError(f"No provider registered for rule input '{name}'")
+        if name in resolving:
+            raise ValueError(f"Rule input '{name}' depends on itself")
+        provider = INPUTS[name]
+        for required in provider.requires:
+            resolve(required, resolving + (name,))
+        args = [values[required] for required in provider.requires]
+        values[name] = profile.call("inputs", name, provider.func, args) if profile else provider.func(*args)
+
+    for rule in rules:
+        for name in rule.inputs:
+            resolve(name)
+    return values
+
+
+def run_rules(doc, paragraphs, document_part, names=None, progress=None, workers=1, on_result=None, profile=None,
+              reuse=None, rule_profile=None):
+    # reuse(rule), when given, returns an earlier output of the rule to use instead of running it, or None.
+    # rule_profile holds the expected values; without one the "rule_profile" input is the default profile.
+    rules = select_rules(document_part, names)
+    reused = [reuse(rule) if reuse else None for rule in rules]
+    to_run = [index for index, output in enumerate(reused) if output is None]
+    values = {"doc": doc, "paragraphs": paragraphs, "document_part": document_part}
+    if rule_profile is not None:
+        values["rule_profile"] = rule_profile
+    # Inputs only the reused rules needed are never computed
+    values = compute_inputs([rules[index] for index in to_run], values, profile)
+    outputs = [None] * len(rules)
+    done = 0
+
+    def finished(index, output):
+        nonlocal done
+        outputs[index] = output
+        done += 1
+        if on_result:
+            on_result(rules[index], output)
+        if progress:
+            progress(rules_done=done, rules_total=len(rules))
+
+    for index, output in enumerate(reused):
+        if output is not None:
+            finished(index, output)
+
+    if workers > 1 and len(to_run) > 1:
+        # Only safe over the pure-Python document model; COM objects belong to one thread
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(call_rule, rules[index], values, profile): index for index in to_run}
+            for future in as_completed(futures):
+                finished(futures[future], future.result())
+    else:
+        for index in to_run:
+            finished(index, call_rule(rules[index], values, profile))
+
+    return [output for output in outputs if output]
@@ -0,0 +1,63 @@
+WD_ACTIVE_END_PAGE_NUMBER = 3
+
+
+class ParagraphRecord:
+    __slots__ = (
+        "index", "text", "font_name", "font_size", "bold", "alignment",
+        "left_indent", "right_indent", "first_line_indent", "line_spacing",
+        "list_type", "list_string", "page", "in_table", "has_inline_shape",
+    )
+
+    def __init__(self, index, text, font_name, font_size, bold, alignment, left_indent, right_indent,
+                 first_line_indent, line_spacing, list_type, list_string, page, in_table, has_inline_shape):
+        self.index = index
+        self.text = text
+        self.font_name = font_name
+        self.font_size = font_size
+        self.bold = bold
+        self.alignment = alignment
+        self.left_indent = left_indent
+        self.right_indent = right_indent
+        self.first_line_indent = first_line_indent
+        self.line_spacing = line_spacing
+        self.list_type = list_type
+        self.list_string = list_string
+        self.page = page
+        self.in_table = in_table
+        self.has_inline_shape = has_inline_shape
+
+    def __repr__(self):
+        return f"ParagraphRecord({self.index}, {self.text[:30]!r}, page={self.page})"
+
+
+def read_paragraph(index, paragraph):
+    # Every property is read exactly once; each access is a COM round-trip on the Word backend
+    paragraph_range = paragraph.Range
+    font = paragraph_range.Font
+    para_format = paragraph.Format
+    list_format = paragraph_range.ListFormat
+    return ParagraphRecord(
+        index=index,
+        text=paragraph_range.Text.strip(),
+        font_name=font.Name,
+        font_size=font.Size,
+        bold=font.Bold,
+        alignment=para_format.Alignment,
+        left_indent=para_format.LeftIndent,
+        right_indent=para_format.RightIndent,
+        first_line_indent=para_format.FirstLineIndent,
+        line_spacing=para_format.LineSpacing,
+        list_type=list_format.ListType,
+        list_string=list_format.ListString,
+        page=paragraph_range.Information(WD_ACTIVE_END_PAGE_NUMBER),
+        in_table=paragraph_range.Tables.Count > 0,
+        has_inline_shape=paragraph_range.InlineShapes.Count > 0,
+    )
+
+
+def take_paragraph_snapshot(doc):
+    return [read_paragraph(index, paragraph) for index, paragraph in enumerate(doc.Paragraphs)]
+
+
+def is_snapshot_empty(paragraphs):
+    return not any(p.text and p.text not in ('\x07', '\r') for p in paragraphs)
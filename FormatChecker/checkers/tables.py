@@ -0,0 +1,138 @@
+from FormatChecker.checkers import rules
+from FormatChecker.checkers.text_utils import clean_cell_text
+
+WD_ACTIVE_END_PAGE_NUMBER = 3
+
+
+class TableCell:
+    __slots__ = ("row", "column", "row_span", "column_span", "text", "font_name", "font_size")
+
+    def __init__(self, row, column, row_span, column_span, text, font_name, font_size):
+        self.row = row
+        self.column = column
+        self.row_span = row_span
+        self.column_span = column_span
+        self.text = text
+        self.font_name = font_name
+        self.font_size = font_size
+
+    def __repr__(self):
+        return f"TableCell({self.row}, {self.column}, {self.text[:30]!r})"
+
+
+class TableGrid:
+    # One top-level table read in a single pass over table.Range.Cells, which Word enumerates even when
+    # cells are merged (table.Rows raises then). A merged area is one cell; cells is None when the table
+    # could not be read at all.
+
+    def __init__(self, number, cells, first_page=None, last_page=None):
+        self.number = number
+        self.cells = cells
+        self.first_page = first_page
+        self.last_page = last_page
+
+    @property
+    def rows(self):
+        return max((cell.row + cell.row_span - 1 for cell in self.cells), default=0) if self.cells else 0
+
+    def __repr__(self):
+        return f"TableGrid({self.number}, rows={self.rows}, pages={self.first_page}-{self.last_page})"
+
+
+def cell_text(text):
+    # Cell paragraphs cleaned one by one and joined with spaces; the cell text ends with the end-of-cell mark
+    return " ".join(cleaned for cleaned in map(clean_cell_text, text.split("\r")) if cleaned)
+
+
+def read_table(number, table):
+    cells = []
+    com_cells = list(table.Range.Cells)
+    # Only the OOXML backend knows spans (w:gridSpan, w:vMerge); Word's object model has no such property
+    has_spans = bool(com_cells) and hasattr(com_cells[0], "column_span")
+    for com_cell in com_cells:
+        cell_range = com_cell.Range
+        font = cell_range.Font
+        cells.append(TableCell(
+            row=com_cell.RowIndex,
+            column=com_cell.ColumnIndex,
+            row_span=com_cell.row_span if has_spans else 1,
+            column_span=com_cell.column_span if has_spans else 1,
+            text=cell_text(cell_range.Text),
+            font_name=font.Name,
+            font_size=font.Size,
+        ))
+    if not cells:
+        return TableGrid(number, cells)
+    # The page where the first row ends and the one where the table ends
+    first_row_end = max(position for position, cell in enumerate(cells) if cell.row == cells[0].row)
+    first_page = com_cells[first_row_end].Range.Information(WD_ACTIVE_END_PAGE_NUMBER)
+    last_page = com_cells[-1].Range.Information(WD_ACTIVE_END_PAGE_NUMBER)
+    return TableGrid(number, cells, first_page, last_page)
+
+
+@rules.provides("tables", requires=("doc",))
+def get_tables(doc):
+    grids = []
+    for number, table in enumerate(doc.Tables, start=1):
+        try:
+            grids.append(read_table(number, table))
+        except Exception as e:
+            print(f"Error reading Table {number}: {e}")
+            grids.append(TableGrid(number, None))
+    return grids
+
+
+def check_table_format(grids, paragraphs, rule_profile):
+    result_text = ""
+    expected_right_indent = rule_profile.table_heading_right_indent
+
+    for i, paragraph in enumerate(paragraphs):
+        text = paragraph.text
+
+        # Check for valid table heading (e.g., "Таблиця 1", "Таблиця 1.1", "Таблиця 1.1.2")
+        if rule_profile.table_heading.match(text):
+            if round(paragraph.right_indent / 28.35, 2) != expected_right_indent:
+                result_text += (f"Incorrect right indent for table number: '{text}' "
+                                f"(should be {expected_right_indent} cm).\n")
+
+            if i + 1 < len(paragraphs):
+                next_paragraph = paragraphs[i + 1]
+                next_text = next_paragraph.text
+                if next_paragraph.alignment != 1:
+                    result_text += f"Incorrect alignment for table name: '{next_text}' (should be centered).\n"
+
+        elif rule_profile.table_continuation.match(text):
+            match = rule_profile.table_continuation.match(text)
+            table_number = match.group(1)
+            expected_text = f"{rule_profile.continuation_label} {table_number}"
+            if text != expected_text:
+                result_text += f"Incorrect continuation format: '{text}' (expected '{expected_text}')\n"
+
+    # Table formatting checks
+    for grid in grids:
+        if grid.cells is None:
+            result_text += f"Skipping Table {grid.number}: its cells could not be read.\n"
+            continue
+        checked_cells = set()
+        for cell in grid.cells:
+            if cell.text and cell.text not in checked_cells:
+                checked_cells.add(cell.text)
+                if cell.font_name not in rule_profile.cell_fonts or cell.font_size not in rule_profile.cell_sizes:
+                    result_text += (
+                        f"Incorrect font or size in Table {grid.number} cell: '{cell.text}' "
+                        f"(Font: {cell.font_name}, Size: {cell.font_size})\n"
+                    )
+
+    return result_text
+
+
+def check_table_page_count(grids):
+    result_text = ""
+    for grid in grids:
+        if grid.cells is not None and not grid.cells:
+            result_text += f"Table {grid.number} has no rows. Skipping it.\n"
+    # Display results for tables that span multiple pages
+    for grid in grids:
+        if grid.first_page is not None and grid.first_page != grid.last_page:
+            result_text += f"Table {grid.number} spans multiple pages ({grid.first_page} → {grid.last_page}).\n"
+    return result_text
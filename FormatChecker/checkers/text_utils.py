@@ -0,0 +1,56 @@
+import re
+from functools import lru_cache
+
+# Compiled once at import; the checkers run these for every paragraph and table cell
+CONTROL_CHARACTERS = re.compile(r"[\x00-\x1F\x7F]")
+WHITESPACE = re.compile(r"\s+")
+DOT_LEADERS = re.compile(r"[.…•·⋯⋅]{2,}")
+TRAILING_PAGE_NUMBER = re.compile(r"\s*\d{1,3}$")
+# TOC entries end with their page number; headings in the body do not
+PAGE_NUMBER_SUFFIX = re.compile(r"[\d\s]+$")
+DIGITS_AND_DOTS = re.compile(r"^[\d.\s]*$")
+# Manual list markers: "1. ", "1) ", "* " / "• " / "– " / "- ", each with the form it must take (no extra space)
+LIST_MARKERS = tuple(
+    (re.compile(pattern), re.compile(pattern + r"\S"))
+    for pattern in (r"^\d+\.\s", r"^\d+\)\s", r"^[*•–-]\s")
+)
+# Whether any of LIST_MARKERS matches, in one pass
+LIST_MARKER = re.compile(r"^(?:\d+\.|\d+\)|[*•–-])\s")
+MARKER_NUMBER = re.compile(r"^(\d+)[.)]")
+NUMBERING_PREFIX = re.compile(r"[\d.]+\s*(.*)")
+FIRST_LETTER = re.compile(r"\w")
+TOC_ENTRY_PAGE = re.compile(r"\d{1,2}$")
+ANY_DIGIT = re.compile(r"\d")
+SUBTOPIC_NUMBERING = re.compile(r"^\d{1,2}\.\d{1,2}\.\s")
+
+
+# What str.isdigit accepts besides the decimal digits \d matches (superscripts, circled numbers...), as
+# character class ranges. Precomputed, a scan of the Unicode database would run on every import.
+EXTRA_DIGITS = (
+    r"\u00B2-\u00B3\u00B9\u1369-\u1371\u19DA\u2070\u2074-\u2079\u2080-\u2089\u2460-\u2468\u2474-\u247C"
+    r"\u2488-\u2490\u24EA\u24F5-\u24FD\u24FF\u2776-\u277E\u2780-\u2788\u278A-\u2792"
+    r"\U00010A40-\U00010A43\U00010E60-\U00010E68\U00011052-\U0001105A\U0001F100-\U0001F10A"
+)
+# What clean_topic_name drops: dots, tabs and digits in the str.isdigit sense
+TOPIC_NOISE = re.compile(r"[\d.\t" + EXTRA_DIGITS + "]+")
+
+
+def clean_cell_text(text):
+    # Table cell paragraph text without control characters and with collapsed whitespace
+    return WHITESPACE.sub(" ", CONTROL_CHARACTERS.sub("", text).strip())
+
+
+def strip_toc_entry(text):
+    # A TOC line without its dot leaders and page number
+    return TRAILING_PAGE_NUMBER.sub("", DOT_LEADERS.sub("", text)).strip()
+
+
+@lru_cache(maxsize=8192)
+def clean_topic_name(topic, to_upper=False, to_lower=False):
+    # Headings and TOC entries repeat across rules and documents, so results are memoized
+    cleaned_topic = TOPIC_NOISE.sub("", topic).strip()
+    if to_upper:
+        return cleaned_topic.upper()
+    elif to_lower:
+        return cleaned_topic.lower()
+    return cleaned_topic
@@ -0,0 +1,117 @@
+import json
+import os
+import re
+import time
+from functools import lru_cache
+
+from django.conf import settings
+
+from FormatChecker.checkers.exception_words import ExceptionMatcher
+from FormatChecker.result_cache import normalize_exception_words
+
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+MODES = ("replace", "add", "remove")
+
+
+class DictionaryError(Exception):
+    pass
+
+
+class DictionaryStore:
+    # Every save writes a new immutable version file, {directory}/{name}/{version}.json, so a version
+    # number always names the same word list and matchers can be cached by it
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, name, version=None):
+        if not NAME_PATTERN.match(name or ""):
+            raise DictionaryError("Dictionary names may only contain latin letters, digits, '-' and '_'")
+        folder = os.path.join(self.directory, name)
+        return folder if version is None else os.path.join(folder, f"{version}.json")
+
+    def versions(self, name):
+        folder = self._path(name)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(int(entry[:-5]) for entry in os.listdir(folder)
+                      if entry.endswith(".json") and entry[:-5].isdigit())
+
+    def latest_version(self, name):
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    def get(self, name, version=None):
+        version = self.latest_version(name) if version is None else version
+        if version is None:
+            raise DictionaryError(f"Unknown exception dictionary: {name}")
+        try:
+            with open(self._path(name, version), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise DictionaryError(f"Unknown version {version} of exception dictionary {name}") from None
+
+    def save(self, name, words, mode="replace"):
+        if mode not in MODES:
+            raise DictionaryError(f"Unknown mode: {mode}")
+        folder = self._path(name)
+        os.makedirs(folder, exist_ok=True)
+        words = set(normalize_exception_words(words))
+        while True:
+            latest = self.latest_version(name)
+            current = set(self.get(name, latest)["words"]) if latest is not None and mode != "replace" else set()
+            if mode == "add":
+                words_to_store = current | words
+            elif mode == "remove":
+                words_to_store = current - words
+            else:
+                words_to_store = words
+            entry = {
+                "name": name,
+                "version": (latest or 0) + 1,
+                "created": time.time(),
+                "words": sorted(words_to_store),
+            }
+            try:
+                # "x" fails if another request saved the same version first; then rebase on it
+                with open(self._path(name, entry["version"]), "x", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                return entry
+            except FileExistsError:
+                continue
+
+    def list(self):
+        if not os.path.isdir(self.directory):
+            return []
+        dictionaries = []
+        for name in sorted(os.listdir(self.directory)):
+            if not NAME_PATTERN.match(name) or self.latest_version(name) is None:
+                continue
+            entry = self.get(name)
+            dictionaries.append({"name": name, "version": entry["version"], "created": entry["created"],
+                                 "size": len(entry["words"])})
+        return dictionaries
+
+    def resolve(self, reference):
+        # "name" or "name@version" -> (name, version) with the version pinned
+        name, _, version = reference.partition("@")
+        if version:
+            if not version.isdigit():
+                raise DictionaryError(f"Invalid dictionary version: {version}")
+            version = int(version)
+            self.get(name, version)
+            return name, version
+        version = self.latest_version(name)
+        if version is None:
+            raise DictionaryError(f"Unknown exception dictionary: {name}")
+        return name, version
+
+
+def get_dictionary_store():
+    return DictionaryStore(settings.EXCEPTION_DICTIONARY_DIR)
+
+
+@lru_cache(maxsize=32)
+def get_matcher(name, version):
+    # Versions never change once written, so a compiled matcher stays valid for the life of the process
+    return ExceptionMatcher(get_dictionary_store().get(name, version)["words"])
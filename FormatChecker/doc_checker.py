@@ -1,62 +1,130 @@
-import tempfile
-import pythoncom
-import win32com.client as win32
+from django.conf import settings
+from django.core.cache import caches
 
-from FormatChecker.checkers import main_part_checker, extras_checker, ai_utils
+# The checker modules register their rules on import
+from FormatChecker.checkers import main_part_checker, extras_checker, ai_utils, rules
+from FormatChecker.checkers.exception_words import ExceptionMatcher, MatcherUnion
+from FormatChecker.checkers.snapshot import take_paragraph_snapshot, is_snapshot_empty
+from FormatChecker.dictionaries import get_matcher
+from FormatChecker.lineage import Lineage
+from FormatChecker.loader import document_path
+from FormatChecker.ooxml.document import open_document
+from FormatChecker.profiling import Profile, measure, log_profile
+from FormatChecker.rule_profile_store import RuleProfileError, get_rule_profile_store
 
-def is_win32_doc_empty(doc):
+def read_with_word(source, read, profile=None):
+    from FormatChecker.word_pool import get_word_pool
+
+    with document_path(source) as path:
+        def open_and_read(word_app):
+            with measure(profile, "document", "open"):
+                doc = word_app.Documents.Open(path, ReadOnly=True, AddToRecentFiles=False)
+            try:
+                return read(doc)
+            finally:
+                try:
+                    with measure(profile, "document", "close"):
+                        doc.Close(SaveChanges=0)
+                except Exception as e:
+                    print("Failed to close document:", e)
+
+        # Runs on the pool thread that owns a warm Word instance
+        return get_word_pool().run(open_and_read)
+
+def read_with_ooxml(source, read, profile=None):
+    # Only the XML parts are read from the zip; /word/media is never decompressed
+    with measure(profile, "document", "open"):
+        doc = open_document(source)
     try:
-        for p in doc.Paragraphs:
-            text = p.Range.Text.strip()
-            if text and text != '\x07' and text != '\r':
-                return False
-        return True
-    except Exception:
-        return True
-
-def check_document_rules(file_stream, document_part, formatting_check=True, grammar_check=True, exception_words=None):
+        return read(doc)
+    finally:
+        with measure(profile, "document", "close"):
+            doc.Close()
+
+BACKENDS = {
+    "word": read_with_word,
+    "ooxml": read_with_ooxml,
+}
+
+def check_document_rules(source, document_part, formatting_check=True, grammar_check=True, exception_words=None,
+                         backend=None, progress=None, rule_names=None, events=None, profile=False,
+                         exception_dictionary=None, lineage=None, rule_profile=None):
+    # events(kind, payload), when given, receives each rule's output and each page of grammar findings
+    # as soon as they are ready. profile=True adds a "timings" block to the result and logs it.
+    # exception_dictionary is a (name, version) of a stored dictionary used on top of exception_words.
+    # lineage is the token of the successive submissions of one document: unchanged parts of the previous check are
+    # reused and a "changes" block marks issues as new, fixed or unchanged.
+    # rule_profile is a (faculty, digest) from RuleProfileStore.resolve; without it DEFAULT_RULE_PROFILE is used.
     if exception_words is None:
         exception_words = []
-    pythoncom.CoInitialize()
+    backend = backend or settings.DOCUMENT_BACKEND
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as temp_file:
-        temp_file.write(file_stream.getvalue())
-        temp_file_path = temp_file.name
+    if document_part not in rules.known_parts():
+        return {"error": "Unknown document part"}
+    if backend not in BACKENDS:
+        return {"error": f"Unknown document backend: {backend}"}
+    try:
+        # Compiled once per faculty, part and version of the profile files, then shared between checks
+        rule_profile = get_rule_profile_store().get(rule_profile[0] if rule_profile else settings.DEFAULT_RULE_PROFILE,
+                                                    document_part)
+    except RuleProfileError as e:
+        return {"error": str(e)}
+    # COM objects cannot be shared between threads, so only the OOXML model runs rules in parallel
+    workers = settings.RULE_WORKERS if backend == "ooxml" else 1
+    profile = Profile() if profile or settings.PROFILE_CHECKS else None
+    lineage = Lineage(lineage, document_part, backend) if lineage else None
 
-    word_app = win32.Dispatch('Word.Application')
-    word_app.Visible = False
-    doc = word_app.Documents.Open(temp_file_path)
+    def read(doc):
+        # Everything that needs the open document; grammar only needs the snapshot
+        if profile:
+            paragraphs = profile.call("document", "snapshot", take_paragraph_snapshot, [doc])
+        else:
+            paragraphs = take_paragraph_snapshot(doc)
+        if lineage:
+            lineage.fingerprint(paragraphs, rule_profile)
+        if is_snapshot_empty(paragraphs) or not formatting_check:
+            return paragraphs, None
 
-    checkers = {
-        "tech_assignment": extras_checker,
-        "testing_methodology": extras_checker,
-        "user_manual": extras_checker,
-        "main_part": main_part_checker,
-    }
+        def on_result(rule, output):
+            if lineage:
+                lineage.record_rule(rule, output)
+            if events:
+                events("formatting", {"rule": rule.name, "result": output})
 
-    try:
-        if document_part not in checkers:
-            return {"error": "Unknown document part"}
-        if is_win32_doc_empty(doc):
-            return {"error": "The uploaded document appears to be empty."}
-        checker = checkers[document_part]
-        result = {}
+        return paragraphs, rules.run_rules(doc, paragraphs, document_part, rule_names, progress, workers, on_result,
+                                           profile, lineage.reusable_output if lineage else None, rule_profile)
 
-        if formatting_check:
-            result["formatting"] = checker.check_formatting(doc)
+    paragraphs, formatting = BACKENDS[backend](source, read, profile)
+    if is_snapshot_empty(paragraphs):
+        return {"error": "The uploaded document appears to be empty."}
+    result = {}
+    known_matches = lineage.known_matches(paragraphs) if lineage else None
 
-        if grammar_check:
-            result["grammar"] = ai_utils.check_document_spelling(doc, exception_words)
+    if formatting_check:
+        result["formatting"] = formatting
 
-        return result if result else {"error": "No checks performed"}
-    finally:
-        try:
-            doc.Close()
-        except Exception as e:
-            print("Failed to close document:", e)
-        try:
-            word_app.Quit()
-        except Exception as quit_error:
-            print("Warning: Word quit failed:", quit_error)
-        pythoncom.CoUninitialize()
+    if grammar_check:
+        grammar_cache = caches[settings.GRAMMAR_CACHE_ALIAS]
+
+        def on_page(page, lines):
+            events("grammar", {"page": page, "lines": lines})
+
+        if exception_dictionary:
+            # The stored dictionary's matcher is compiled once per version and shared between checks
+            exception_words = MatcherUnion([get_matcher(*exception_dictionary), ExceptionMatcher(exception_words)])
+        with measure(profile, "grammar", "seconds"):
+            result["grammar"] = ai_utils.check_document_spelling(paragraphs, exception_words, cache=grammar_cache,
+                                                                 progress=progress, on_page=on_page if events else None,
+                                                                 profile=profile, known=known_matches,
+                                                                 rule_profile=rule_profile)
 
+    if not result:
+        return {"error": "No checks performed"}
+    if lineage:
+        result["changes"] = lineage.changes(result)
+        lineage.save(result, known_matches or {})
+    if profile:
+        result["timings"] = profile.as_dict()
+        log_profile(result["timings"], document_part=document_part, backend=backend,
+                    paragraphs=len(paragraphs))
+    return result
@@ -0,0 +1,310 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+
+from django.conf import settings
+
+from FormatChecker.loader import discard, clear_spool
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+PROGRESS_FIELDS = ("rules_done", "rules_total", "paragraphs_checked", "paragraphs_total")
+UPDATABLE_FIELDS = ("status", "error", "result", "updated") + PROGRESS_FIELDS
+# Every job queue (one per server process) records that it is alive this often; one that has not been seen
+# for OWNER_TIMEOUT seconds died, and its unfinished jobs and spooled uploads are cleaned up
+HEARTBEAT_SECONDS = 30
+OWNER_TIMEOUT = 3 * HEARTBEAT_SECONDS
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobStore:
+    # Jobs live in SQLite so worker processes can report progress without an external broker
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, document_part TEXT, "
+                "created REAL NOT NULL, updated REAL NOT NULL, "
+                "rules_done INTEGER DEFAULT 0, rules_total INTEGER DEFAULT 0, "
+                "paragraphs_checked INTEGER DEFAULT 0, paragraphs_total INTEGER DEFAULT 0, "
+                "result TEXT, error TEXT, owner TEXT)"
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                # Databases created before jobs had owners
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            conn.execute("CREATE TABLE IF NOT EXISTS batches (id TEXT PRIMARY KEY, created REAL NOT NULL, files TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS owners (id TEXT PRIMARY KEY, seen REAL NOT NULL)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def create(self, document_part, status=QUEUED, owner=None):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, document_part, created, updated, owner) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, status, document_part, now, now, owner),
+            )
+        return job_id
+
+    def update(self, job_id, **fields):
+        fields = {key: value for key, value in fields.items() if key in UPDATABLE_FIELDS}
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], ensure_ascii=False)
+        fields["updated"] = time.time()
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def count_active(self):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchone()
+        return row[0]
+
+    def touch_owner(self, owner):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO owners (id, seen) VALUES (?, ?)", (owner, time.time()))
+
+    def live_owners(self, timeout):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT id FROM owners WHERE seen >= ?", (time.time() - timeout,)).fetchall()
+        return {row["id"] for row in rows}
+
+    def interrupt_abandoned(self, timeout):
+        # Jobs left queued or running by a server process that stopped sending heartbeats will never finish.
+        # Jobs of live processes, other workers of the same server included, are left alone.
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE status IN (?, ?) AND "
+                "(owner IS NULL OR owner NOT IN (SELECT id FROM owners WHERE seen >= ?))",
+                (FAILED, "The server restarted before the check finished", now, QUEUED, RUNNING, now - timeout),
+            )
+            conn.execute("DELETE FROM owners WHERE seen < ?", (now - timeout,))
+
+    def purge(self, older_than):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM jobs WHERE updated < ?", (time.time() - older_than,))
+            conn.execute("DELETE FROM batches WHERE created < ?", (time.time() - older_than,))
+
+    def create_batch(self, files):
+        # files is a list of {"name": ..., "job_id": ...} in upload order
+        batch_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT INTO batches (id, created, files) VALUES (?, ?, ?)",
+                         (batch_id, time.time(), json.dumps(files, ensure_ascii=False)))
+        return batch_id
+
+    def get_batch(self, batch_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row["id"], "created": row["created"], "files": json.loads(row["files"])}
+
+    def get_many(self, job_ids):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT * FROM jobs WHERE id IN ({', '.join('?' * len(job_ids))})",
+                                job_ids).fetchall()
+        jobs = {}
+        for row in rows:
+            job = dict(row)
+            job["result"] = json.loads(job["result"]) if job["result"] else None
+            jobs[job["id"]] = job
+        return jobs
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def run_job(job_id, store_path, document_path, document_part, formatting_check, grammar_check, exception_words,
+            rule_names, profile=False, exception_dictionary=None, lineage=None, rule_profile=None):
+    from FormatChecker.doc_checker import check_document_rules
+
+    store = JobStore(store_path)
+    store.update(job_id, status=RUNNING)
+
+    def progress(**fields):
+        store.update(job_id, **fields)
+
+    try:
+        result = check_document_rules(document_path, document_part, formatting_check, grammar_check,
+                                      exception_words, progress=progress, rule_names=rule_names, profile=profile,
+                                      exception_dictionary=exception_dictionary, lineage=lineage,
+                                      rule_profile=rule_profile)
+    except Exception as e:
+        store.update(job_id, status=FAILED, error=str(e))
+        raise
+    finally:
+        discard(document_path)
+    store.update(job_id, status=DONE, result=result)
+    return result
+
+
+class JobQueue:
+    def __init__(self, store, spool_dir, executor="process", workers=1, queue_limit=20, retention=24 * 60 * 60):
+        self.store = store
+        self.owner = uuid.uuid4().hex
+        self.spool_root = spool_dir
+        # Uploads of this process; every process sharing the spool directory has a folder of its own
+        self.spool_dir = os.path.join(spool_dir, self.owner)
+        self.queue_limit = queue_limit
+        self.retention = retention
+        if executor == "process":
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="check-job")
+        self._lock = threading.Lock()
+        store.touch_owner(self.owner)
+        self.recover()
+        threading.Thread(target=self._heartbeat, name="job-queue-heartbeat", daemon=True).start()
+
+    def recover(self):
+        # Fails the jobs of processes that died and removes their spooled uploads
+        self.store.interrupt_abandoned(OWNER_TIMEOUT)
+        if not os.path.isdir(self.spool_root):
+            return
+        live = self.store.live_owners(OWNER_TIMEOUT) | {self.owner}
+        cutoff = time.time() - OWNER_TIMEOUT
+        for entry in os.listdir(self.spool_root):
+            path = os.path.join(self.spool_root, entry)
+            try:
+                # Files straight in the root were spooled before uploads had an owner
+                abandoned = entry not in live and os.path.getmtime(path) < cutoff
+            except OSError:
+                continue
+            if abandoned:
+                if os.path.isdir(path):
+                    clear_spool(path)
+                else:
+                    discard(path)
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(HEARTBEAT_SECONDS)
+            try:
+                self.store.touch_owner(self.owner)
+                self.recover()
+            except Exception as e:
+                print("Job queue heartbeat failed:", e)
+
+    def submit(self, document_path, document_part, formatting_check, grammar_check, exception_words,
+               rule_names=None, on_done=None, profile=False, exception_dictionary=None, lineage=None,
+               rule_profile=None):
+        # The job takes ownership of document_path and removes it when it finishes
+        with self._lock:
+            if self.store.count_active() >= self.queue_limit:
+                discard(document_path)
+                raise QueueFull()
+            self.store.purge(self.retention)
+            job_id = self.store.create(document_part, owner=self.owner)
+
+        self._start(job_id, document_path, (document_part, formatting_check, grammar_check, exception_words,
+                                            rule_names, profile, exception_dictionary, lineage, rule_profile), on_done)
+        return job_id
+
+    def _start(self, job_id, document_path, options, on_done=None, on_finished=None):
+        future = self.executor.submit(run_job, job_id, self.store.path, document_path, *options)
+
+        def job_finished(done_future):
+            try:
+                if done_future.exception() is not None:
+                    # The worker records its own failure, unless it died before it could
+                    discard(document_path)
+                    job = self.store.get(job_id)
+                    if job and job["status"] != FAILED:
+                        self.store.update(job_id, status=FAILED, error=str(done_future.exception()))
+                elif on_done is not None:
+                    on_done(done_future.result())
+            finally:
+                if on_finished is not None:
+                    on_finished()
+
+        future.add_done_callback(job_finished)
+
+    def submit_batch(self, documents, document_part, formatting_check, grammar_check, exception_words,
+                     rule_names=None, profile=False, exception_dictionary=None, concurrency=1, rule_profile=None):
+        # documents is a list of (document_path, on_done). Every job is queued at once so it can be
+        # polled, but at most `concurrency` of them run at a time, leaving workers for other uploads.
+        with self._lock:
+            # The whole batch has to fit, not just its first job
+            if self.store.count_active() + len(documents) > self.queue_limit:
+                for document_path, _ in documents:
+                    discard(document_path)
+                raise QueueFull()
+            self.store.purge(self.retention)
+            job_ids = [self.store.create(document_part, owner=self.owner) for _ in documents]
+
+        # Batches have no lineage
+        options = (document_part, formatting_check, grammar_check, exception_words, rule_names, profile,
+                   exception_dictionary, None, rule_profile)
+        pending = deque(zip(job_ids, documents))
+        pending_lock = threading.Lock()
+
+        def start_next():
+            with pending_lock:
+                if not pending:
+                    return
+                job_id, (document_path, on_done) = pending.popleft()
+            self._start(job_id, document_path, options, on_done, on_finished=start_next)
+
+        for _ in range(min(concurrency, len(pending))):
+            start_next()
+        return job_ids
+
+    def complete(self, document_part, result):
+        # Registers a job whose result is already known, e.g. a result cache hit
+        job_id = self.store.create(document_part, status=DONE, owner=self.owner)
+        self.store.update(job_id, result=result)
+        return job_id
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(
+                JobStore(settings.JOB_DATABASE),
+                settings.JOB_SPOOL_DIR,
+                executor=settings.JOB_EXECUTOR,
+                workers=settings.JOB_WORKERS,
+                queue_limit=settings.JOB_QUEUE_LIMIT,
+                retention=settings.JOB_RETENTION,
+            )
+        return _job_queue
@@ -0,0 +1,204 @@
+import hashlib
+import re
+import secrets
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+
+from FormatChecker.checkers import rules
+from FormatChecker.result_cache import has_grammar_errors
+
+KEY_PREFIX = "lineage"
+# Sent instead of a token to start a new lineage
+NEW_LINEAGE = "new"
+# Everything a formatting rule reads from a paragraph record except its text and page
+FORMATTING_FIELDS = (
+    "font_name", "font_size", "bold", "alignment", "left_indent", "right_indent", "first_line_indent",
+    "line_spacing", "list_type", "list_string", "in_table", "has_inline_shape",
+)
+# Grammar lines carry the page, which moves whenever text is added above them, and the start of their
+# paragraph, which changes when another part of the paragraph is edited
+PAGE_NUMBER = re.compile(r"\bpage \d+")
+SENTENCE_CONTEXT = re.compile(r" in sentence: .*$")
+NO_GRAMMAR_ERRORS = "No grammar errors found"
+
+
+def digest(*parts):
+    h = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def paragraph_fingerprint(paragraph):
+    return digest(paragraph.text, *(getattr(paragraph, field) for field in FORMATTING_FIELDS))
+
+
+def input_fingerprints(paragraphs, fingerprints, document_part, rule_profile):
+    # Rule inputs the snapshot fully describes. Table rules read cell text and fonts, which the snapshot
+    # has for every in-table paragraph. Rule output mentions pages, so pages count here. A rule checked
+    # against another profile (or an edited one) runs again.
+    placed = [f"{fingerprint}:{paragraph.page}" for fingerprint, paragraph in zip(fingerprints, paragraphs)]
+    return {
+        "document_part": digest(document_part),
+        "rule_profile": digest(rule_profile.digest),
+        "paragraphs": digest(*placed),
+        "tables": digest(*(entry for entry, paragraph in zip(placed, paragraphs) if paragraph.in_table)),
+    }
+
+
+def input_fingerprint(name, fingerprints):
+    # None for inputs read straight from the document (page setup, the TOC field), which always run
+    if name in fingerprints:
+        return fingerprints[name]
+    provider = rules.INPUTS.get(name)
+    if provider is None or not provider.requires:
+        return None
+    required = [input_fingerprint(requirement, fingerprints) for requirement in provider.requires]
+    return None if None in required else digest(name, *required)
+
+
+def rule_fingerprint(rule, fingerprints):
+    inputs = [input_fingerprint(name, fingerprints) for name in rule.inputs]
+    return None if None in inputs else digest(rule.name, *inputs)
+
+
+def compact_match(match):
+    # Only what format_matches reads
+    return {
+        "offset": match.get("offset", 0),
+        "length": match.get("length", 0),
+        "message": match.get("message", ""),
+        "replacements": match.get("replacements", [])[:1],
+        "rule": {"id": match.get("rule", {}).get("id", "")},
+    }
+
+
+def issue_lines(result):
+    issues = {}
+    for kind in ("formatting", "grammar"):
+        if kind in result:
+            issues[kind] = [line.strip() for entry in result[kind] for line in entry.splitlines()
+                            if line.strip() and line.strip() != NO_GRAMMAR_ERRORS]
+    return issues
+
+
+def issue_key(line):
+    return SENTENCE_CONTEXT.sub("", PAGE_NUMBER.sub("page", line))
+
+
+def unmatched(lines, others):
+    # Lines with no counterpart in others, counting repeated issues separately
+    remaining = Counter(issue_key(line) for line in others)
+    missing = []
+    for line in lines:
+        key = issue_key(line)
+        if remaining[key]:
+            remaining[key] -= 1
+        else:
+            missing.append(line)
+    return missing
+
+
+def get_lineage_cache():
+    return caches[settings.LINEAGE_CACHE_ALIAS]
+
+
+def new_token():
+    # Lineages are named by the server, so nobody can read or reuse a lineage they were not handed
+    return signing.Signer(salt=KEY_PREFIX).sign(secrets.token_urlsafe(16))
+
+
+def is_token(value):
+    try:
+        signing.Signer(salt=KEY_PREFIX).unsign(value)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class Lineage:
+    # One check of a document lineage (the successive submissions of one thesis). The previous check left
+    # per-paragraph fingerprints, every rule's output with a fingerprint of its inputs, compact LanguageTool
+    # matches per paragraph and the issues it found; this check reuses what did not change.
+
+    def __init__(self, token, document_part, backend):
+        self.token = token
+        self.document_part = document_part
+        self.key = f"{KEY_PREFIX}:{digest(token, document_part, backend)}"
+        self.previous = get_lineage_cache().get(self.key)
+        self.paragraph_fingerprints = []
+        self.fingerprints = {}
+        self.rules = dict(self.previous["rules"]) if self.previous else {}
+        self.reused_rules = []
+        self.reused_matches = 0
+
+    def fingerprint(self, paragraphs, rule_profile):
+        self.paragraph_fingerprints = [paragraph_fingerprint(paragraph) for paragraph in paragraphs]
+        self.fingerprints = input_fingerprints(paragraphs, self.paragraph_fingerprints, self.document_part,
+                                               rule_profile)
+
+    def reusable_output(self, rule):
+        # The previous output of a rule whose inputs are unchanged, otherwise None
+        fingerprint = rule_fingerprint(rule, self.fingerprints)
+        stored = self.rules.get(rule.name)
+        if fingerprint is None or stored is None or stored[0] != fingerprint:
+            return None
+        self.reused_rules.append(rule.name)
+        return stored[1]
+
+    def record_rule(self, rule, output):
+        self.rules[rule.name] = [rule_fingerprint(rule, self.fingerprints), output]
+
+    def known_matches(self, paragraphs):
+        # {text: matches} for paragraphs whose text the previous check already sent to LanguageTool
+        if not self.previous:
+            return {}
+        stored = self.previous["grammar"]
+        known = {}
+        for paragraph in paragraphs:
+            matches = stored.get(digest(paragraph.text))
+            if matches is not None:
+                known[paragraph.text] = matches
+        self.reused_matches = len(known)
+        return known
+
+    def changes(self, result):
+        previous_issues = self.previous["issues"] if self.previous else {}
+        issues = issue_lines(result)
+        new = []
+        fixed = []
+        for kind, lines in issues.items():
+            new += unmatched(lines, previous_issues.get(kind, []))
+            # Only a category checked both times can have fixed issues
+            if kind in previous_issues:
+                fixed += unmatched(previous_issues[kind], lines)
+        changed = Counter(self.paragraph_fingerprints) - Counter(self.previous["paragraphs"] if self.previous else [])
+        return {
+            "lineage": self.token,
+            "previous_check": self.previous["checked"] if self.previous else None,
+            "paragraphs_total": len(self.paragraph_fingerprints),
+            "paragraphs_changed": sum(changed.values()),
+            "rules_reused": self.reused_rules,
+            "grammar_reused": self.reused_matches,
+            "new": new,
+            "fixed": fixed,
+            "unchanged": sum(len(lines) for lines in issues.values()) - len(new),
+        }
+
+    def save(self, result, matches):
+        # A check that could not reach LanguageTool would report every grammar issue as fixed next time
+        if has_grammar_errors(result):
+            return
+        get_lineage_cache().set(self.key, {
+            "checked": time.time(),
+            "paragraphs": self.paragraph_fingerprints,
+            "rules": self.rules,
+            "grammar": {digest(text): [compact_match(match) for match in text_matches]
+                        for text, text_matches in matches.items()},
+            "issues": issue_lines(result),
+        })
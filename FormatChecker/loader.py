@@ -0,0 +1,89 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def upload_digest(uploaded_file):
+    # Streams the upload through the hash without materializing it again
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks(CHUNK_SIZE):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def spool_upload(uploaded_file, directory):
+    # Hands the upload over to a file owned by the caller, who must discard() it.
+    # Uploads Django already streamed to disk are moved rather than copied.
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.docx")
+    if hasattr(uploaded_file, "temporary_file_path"):
+        try:
+            os.replace(uploaded_file.temporary_file_path(), path)
+            return path
+        except OSError:
+            pass  # Different filesystem, fall back to a single streamed copy
+    with open(path, "wb") as spooled:
+        for chunk in uploaded_file.chunks(CHUNK_SIZE):
+            spooled.write(chunk)
+    uploaded_file.seek(0)
+    return path
+
+
+def spool_stream(stream, directory):
+    # Copies a file-like object into the spool, hashing it on the way; returns (path, sha256 hex digest)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.docx")
+    digest = hashlib.sha256()
+    try:
+        with open(path, "wb") as spooled:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                spooled.write(chunk)
+    except BaseException:
+        # E.g. a zip member that turns out to be corrupt halfway through
+        discard(path)
+        raise
+    return path, digest.hexdigest()
+
+
+def discard(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print("Failed to remove spooled upload:", e)
+
+
+def clear_spool(directory):
+    if os.path.isdir(directory):
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+@contextmanager
+def document_path(source):
+    # Word can only open files from disk; file-like sources get a temp file that is always removed
+    if is_path(source):
+        yield os.fspath(source)
+        return
+    fd, path = tempfile.mkstemp(suffix=".docx")
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            source.seek(0)
+            shutil.copyfileobj(source, temp_file, CHUNK_SIZE)
+        yield path
+    finally:
+        discard(path)
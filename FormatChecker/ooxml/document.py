@@ -0,0 +1,522 @@
+import zipfile
+
+from FormatChecker.ooxml.layout import estimate_pages
+from FormatChecker.ooxml.parts import (
+    DocxPackage, Styles, Numbering, read_theme_fonts, read_ppr, read_rpr,
+    REL_STYLES, REL_NUMBERING, REL_THEME, WP_NS, w, w_attr, w_int, twips_to_points,
+)
+
+# Same sentinel Word returns for a property that differs across a range
+MIXED = 9999999.0
+WD_ACTIVE_END_PAGE_NUMBER = 3
+WD_PARAGRAPH = 4
+# WdLineSpacing
+WD_LINE_SPACE_SINGLE = 0
+WD_LINE_SPACE_1PT5 = 1
+WD_LINE_SPACE_DOUBLE = 2
+WD_LINE_SPACE_AT_LEAST = 3
+WD_LINE_SPACE_EXACTLY = 4
+WD_LINE_SPACE_MULTIPLE = 5
+MULTIPLE_LINE_RULES = {240: WD_LINE_SPACE_SINGLE, 360: WD_LINE_SPACE_1PT5, 480: WD_LINE_SPACE_DOUBLE}
+
+ALIGNMENTS = {
+    "left": 0, "start": 0,
+    "center": 1,
+    "right": 2, "end": 2,
+    "both": 3, "justify": 3,
+    "distribute": 4,
+}
+
+SKIPPED_CONTAINERS = {w("del"), w("moveFrom"), w("txbxContent"), w("pPr"), w("rPr")}
+
+
+class Collection(list):
+    # Behaves like a pywin32 COM collection: [i] is 0-based, (i) calls Item() 1-based
+
+    @property
+    def Count(self):
+        return len(self)
+
+    @property
+    def First(self):
+        return self[0] if self else None
+
+    @property
+    def Last(self):
+        return self[-1] if self else None
+
+    def Item(self, index):
+        return self[index - 1]
+
+    def __call__(self, index):
+        return self.Item(index)
+
+
+class Font:
+    def __init__(self, name, size, bold):
+        self.Name = name
+        self.Size = size
+        self.Bold = bold
+
+
+def combine_fonts(fonts):
+    if not fonts:
+        return Font("", MIXED, MIXED)
+    if len(fonts) == 1:
+        return fonts[0]
+    names = {font.Name for font in fonts}
+    sizes = {font.Size for font in fonts}
+    bolds = {font.Bold for font in fonts}
+    return Font(
+        names.pop() if len(names) == 1 else "",
+        sizes.pop() if len(sizes) == 1 else MIXED,
+        bolds.pop() if len(bolds) == 1 else MIXED,
+    )
+
+
+def signature(props):
+    # Hashable form of a direct formatting dict, to key the resolution caches
+    return tuple(sorted(props.items()))
+
+
+class ParagraphFormat:
+    def __init__(self, props):
+        self.Alignment = ALIGNMENTS.get(props.get("alignment"), 0)
+        self.LeftIndent = twips_to_points(props.get("left", 0))
+        self.RightIndent = twips_to_points(props.get("right", 0))
+        self.FirstLineIndent = twips_to_points(props.get("first_line", 0))
+        line = props.get("line", 240)
+        line_rule = props.get("line_rule", "auto")
+        if line_rule == "auto":
+            # Word reports "multiple" spacing in points relative to 12pt single spacing
+            self.LineSpacing = line / 240.0 * 12
+            self.LineSpacingRule = MULTIPLE_LINE_RULES.get(line, WD_LINE_SPACE_MULTIPLE)
+        else:
+            self.LineSpacing = twips_to_points(line)
+            self.LineSpacingRule = WD_LINE_SPACE_EXACTLY if line_rule == "exact" else WD_LINE_SPACE_AT_LEAST
+        self.SpaceBefore = twips_to_points(props.get("before", 0))
+        self.SpaceAfter = twips_to_points(props.get("after", 0))
+        self.PageBreakBefore = -1 if props.get("page_break_before") else 0
+
+
+class ListFormat:
+    def __init__(self, list_type, list_string):
+        self.ListType = list_type
+        self.ListString = list_string
+
+
+class Range:
+    def __init__(self, document, paragraphs):
+        self._document = document
+        self._paragraphs = paragraphs
+
+    @property
+    def Text(self):
+        return "".join(paragraph.text for paragraph in self._paragraphs)
+
+    @property
+    def Paragraphs(self):
+        return Collection(self._paragraphs)
+
+    @property
+    def Font(self):
+        return combine_fonts([paragraph.font for paragraph in self._paragraphs])
+
+    @property
+    def ParagraphFormat(self):
+        return self._paragraphs[0].Format
+
+    @property
+    def ListFormat(self):
+        return self._paragraphs[0].list_format
+
+    @property
+    def Tables(self):
+        tables = []
+        for paragraph in self._paragraphs:
+            if paragraph.table is not None and paragraph.table not in tables:
+                tables.append(paragraph.table)
+        return Collection(tables)
+
+    @property
+    def InlineShapes(self):
+        return Collection(shape for paragraph in self._paragraphs for shape in paragraph.inline_shapes)
+
+    @property
+    def Cells(self):
+        cells = []
+        for paragraph in self._paragraphs:
+            if paragraph.cell is not None and paragraph.cell not in cells:
+                cells.append(paragraph.cell)
+        return Collection(cells)
+
+    def Information(self, kind):
+        if kind == WD_ACTIVE_END_PAGE_NUMBER:
+            return self._paragraphs[-1].page if self._paragraphs else 1
+        raise NotImplementedError(f"Range.Information({kind}) is not supported by the OOXML backend")
+
+    def Next(self, Unit=WD_PARAGRAPH, Count=1):
+        if Unit != WD_PARAGRAPH:
+            raise NotImplementedError("Only paragraph units are supported by the OOXML backend")
+        paragraph = self._paragraphs[-1]
+        for _ in range(Count):
+            paragraph = paragraph.Next()
+            if paragraph is None:
+                return None
+        return paragraph.Range
+
+
+class Paragraph:
+    def __init__(self, document, index, text, font, paragraph_format, list_format, page, table=None, cell=None,
+                 row=None, section=0):
+        self._document = document
+        self.index = index
+        self.text = text
+        self.font = font
+        self.Format = paragraph_format
+        self.list_format = list_format
+        self.page = page
+        self.table = table
+        self.cell = cell
+        # The top-level table row the paragraph was read in and the index of its section, for page layout
+        self.row = row
+        self.section = section
+        self.inline_shapes = []
+
+    @property
+    def Range(self):
+        return Range(self._document, [self])
+
+    def Next(self, Count=1):
+        index = self.index + Count
+        paragraphs = self._document.Paragraphs
+        return paragraphs[index] if index < len(paragraphs) else None
+
+    def Previous(self, Count=1):
+        index = self.index - Count
+        return self._document.Paragraphs[index] if index >= 0 else None
+
+
+class InlineShape:
+    def __init__(self, paragraph, width, height):
+        self._paragraph = paragraph
+        self.Width = width
+        self.Height = height
+
+    @property
+    def Range(self):
+        return Range(self._paragraph._document, [self._paragraph])
+
+
+class Cell:
+    def __init__(self, document, row_index, column_index, column_span=1):
+        self._document = document
+        self.RowIndex = row_index
+        self.ColumnIndex = column_index
+        # Grid columns and rows the cell covers (w:gridSpan, w:vMerge); Word has no properties for them
+        self.column_span = column_span
+        self.row_span = 1
+        self.paragraphs = []
+
+    @property
+    def Range(self):
+        return Range(self._document, self.paragraphs)
+
+
+class Row:
+    def __init__(self, document, index):
+        self._document = document
+        self.Index = index
+        self.Cells = Collection()
+
+    @property
+    def Range(self):
+        return Range(self._document, [p for cell in self.Cells for p in cell.paragraphs])
+
+
+class Table:
+    def __init__(self, document, grid_columns=0):
+        self._document = document
+        self.grid_columns = grid_columns
+        self.Rows = Collection()
+
+    @property
+    def Range(self):
+        # A vertically merged cell sits in its first row but holds paragraphs of the rows below
+        paragraphs = [p for row in self.Rows for cell in row.Cells for p in cell.paragraphs]
+        return Range(self._document, sorted(paragraphs, key=lambda paragraph: paragraph.index))
+
+
+class PageSetup:
+    def __init__(self, sect_pr):
+        pg_sz = sect_pr.find(w("pgSz")) if sect_pr is not None else None
+        pg_mar = sect_pr.find(w("pgMar")) if sect_pr is not None else None
+        # Word's defaults for a section without explicit settings (Letter, 1" margins)
+        self.PageWidth = twips_to_points(w_int(pg_sz, "w", 12240))
+        self.PageHeight = twips_to_points(w_int(pg_sz, "h", 15840))
+        self.TopMargin = twips_to_points(w_int(pg_mar, "top", 1440))
+        self.BottomMargin = twips_to_points(w_int(pg_mar, "bottom", 1440))
+        self.LeftMargin = twips_to_points(w_int(pg_mar, "left", 1440))
+        self.RightMargin = twips_to_points(w_int(pg_mar, "right", 1440))
+
+
+class Section:
+    def __init__(self, sect_pr):
+        self.PageSetup = PageSetup(sect_pr)
+
+
+class TableOfContents:
+    def __init__(self, document, paragraphs):
+        self.Range = Range(document, paragraphs)
+
+
+class OoxmlDocument:
+    def __init__(self, source):
+        self.Paragraphs = Collection()
+        self.Tables = Collection()
+        self.InlineShapes = Collection()
+        self.TablesOfContents = Collection()
+        self.sections = Collection()
+        self._section_starts_new_page = []
+        # Effective formatting by (style, direct formatting); a thesis has a few dozen distinct combinations
+        self._paragraph_styles = {}
+        self._run_fonts = {}
+
+        # Pages advance at the breaks Word saved from its last layout; without any, estimate_pages lays out
+        # the document once it is read
+        self._rendered_breaks = False
+        self._page = 1
+        self._section_index = 0
+        self._fields = []
+        self._toc_depth = 0
+        self._toc_paragraphs = None
+        self._paragraph_in_toc = False
+        self._row = None
+
+        package = DocxPackage(source)
+        try:
+            theme_fonts = read_theme_fonts(package.read_xml(package.part_path(REL_THEME)))
+            self.styles = Styles(package.read_xml(package.part_path(REL_STYLES)), theme_fonts)
+            self.numbering = Numbering(package.read_xml(package.part_path(REL_NUMBERING)))
+            # The body is streamed: each top-level paragraph or table is read, then its XML is dropped
+            for element in package.iter_body():
+                if element.tag == w("sectPr"):
+                    self._add_section(element)
+                else:
+                    self._read_element(element, None, None)
+        finally:
+            package.close()
+
+        if not self.sections:
+            self._add_section(None)
+        if self._toc_paragraphs:
+            self.TablesOfContents.append(TableOfContents(self, self._toc_paragraphs))
+        if self.Paragraphs and not self._rendered_breaks:
+            estimate_pages(self)
+
+    @property
+    def Sections(self):
+        return self.sections
+
+    def Close(self, *args, **kwargs):
+        pass
+
+    def _add_section(self, sect_pr):
+        self.sections.append(Section(sect_pr))
+        self._section_starts_new_page.append(w_attr(sect_pr.find(w("type")), "val", "nextPage") != "continuous"
+                                             if sect_pr is not None else True)
+
+    def _read_block(self, container, table, cell):
+        for child in container:
+            self._read_element(child, table, cell)
+
+    def _read_element(self, element, table, cell):
+        if element.tag == w("p"):
+            self._read_paragraph(element, table, cell)
+        elif element.tag == w("tbl"):
+            self._read_table(element, table is not None)
+        elif element.tag == w("sdt"):
+            content = element.find(w("sdtContent"))
+            if content is not None:
+                self._read_block(content, table, cell)
+        elif element.tag in (w("customXml"), w("ins"), w("moveTo")):
+            self._read_block(element, table, cell)
+
+    def _read_table(self, tbl, nested):
+        grid = tbl.find(w("tblGrid"))
+        table = Table(self, len(grid.findall(w("gridCol"))) if grid is not None else 0)
+        if not nested:
+            self.Tables.append(table)
+        # Cells a vertical merge started, by the grid column they start at
+        merging = {}
+        for row_index, tr in enumerate(tbl.findall(w("tr")), start=1):
+            row = Row(self, row_index)
+            table.Rows.append(row)
+            if not nested:
+                self._row = row
+            tr_pr = tr.find(w("trPr"))
+            grid_column = w_int(tr_pr.find(w("gridBefore")) if tr_pr is not None else None, "val", 0)
+            for tc in tr.findall(w("tc")):
+                tc_pr = tc.find(w("tcPr"))
+                span = w_int(tc_pr.find(w("gridSpan")) if tc_pr is not None else None, "val", 1)
+                v_merge = tc_pr.find(w("vMerge")) if tc_pr is not None else None
+                if v_merge is not None and w_attr(v_merge, "val", "continue") == "continue" and grid_column in merging:
+                    # Word shows a merged area as the cell that starts it; what the others hold belongs to it
+                    cell = merging[grid_column]
+                    cell.row_span += 1
+                else:
+                    cell = Cell(self, row_index, len(row.Cells) + 1, span)
+                    row.Cells.append(cell)
+                    if v_merge is not None:
+                        merging[grid_column] = cell
+                    else:
+                        merging.pop(grid_column, None)
+                grid_column += span
+                self._read_block(tc, table, cell)
+                if cell.paragraphs:
+                    # Word terminates the last paragraph of every cell with an end-of-cell mark
+                    cell.paragraphs[-1].text = cell.paragraphs[-1].text[:-1] + "\r\x07"
+        if not nested:
+            self._row = None
+
+    def _read_paragraph(self, p, table, cell):
+        ppr = p.find(w("pPr"))
+        style_id = w_attr(ppr.find(w("pStyle")), "val") if ppr is not None else None
+        props, paragraph_format = self._resolve_paragraph(style_id, read_ppr(ppr))
+
+        text = []
+        fonts = []
+        shapes = []
+        self._paragraph_in_toc = self._toc_depth > 0
+        self._read_runs(p, style_id, text, fonts, shapes)
+
+        if not fonts:
+            mark_rpr = read_rpr(ppr.find(w("rPr"))) if ppr is not None else {}
+            fonts.append(self._run_font(style_id, None, mark_rpr))
+
+        list_type, list_string = self.numbering.next_marker(props.get("num_id"), props.get("ilvl", 0))
+        paragraph = Paragraph(
+            self, len(self.Paragraphs), "".join(text) + "\r", combine_fonts(fonts), paragraph_format,
+            ListFormat(list_type, list_string), self._page, table, cell, self._row, self._section_index,
+        )
+        for width, height in shapes:
+            shape = InlineShape(paragraph, width, height)
+            paragraph.inline_shapes.append(shape)
+            self.InlineShapes.append(shape)
+
+        self.Paragraphs.append(paragraph)
+        if cell is not None:
+            cell.paragraphs.append(paragraph)
+        if self._paragraph_in_toc:
+            self._toc_paragraphs.append(paragraph)
+
+        sect_pr = ppr.find(w("sectPr")) if ppr is not None else None
+        if sect_pr is not None:
+            self._add_section(sect_pr)
+            self._section_index += 1
+
+    def _read_runs(self, element, style_id, text, fonts, shapes):
+        for child in element:
+            if child.tag in SKIPPED_CONTAINERS:
+                continue
+            if child.tag == w("r"):
+                self._read_run(child, style_id, text, fonts, shapes)
+            else:
+                self._read_runs(child, style_id, text, fonts, shapes)
+
+    def _read_run(self, r, style_id, text, fonts, shapes):
+        rpr = r.find(w("rPr"))
+        run_style = w_attr(rpr.find(w("rStyle")), "val") if rpr is not None else None
+        run_text = []
+        for child in r:
+            tag = child.tag
+            if tag == w("t"):
+                run_text.append(child.text or "")
+            elif tag == w("tab"):
+                run_text.append("\t")
+            elif tag == w("br"):
+                if w_attr(child, "type") == "page":
+                    run_text.append("\x0c")
+                else:
+                    run_text.append("\x0b")
+            elif tag == w("cr"):
+                run_text.append("\x0b")
+            elif tag == w("noBreakHyphen"):
+                run_text.append("-")
+            elif tag == w("lastRenderedPageBreak"):
+                self._rendered_breaks = True
+                self._page += 1
+            elif tag == w("fldChar"):
+                self._read_field_char(child)
+            elif tag == w("instrText"):
+                self._read_field_instruction(child.text or "")
+            elif tag == w("drawing"):
+                for inline in child.iter(f"{{{WP_NS}}}inline"):
+                    extent = inline.find(f"{{{WP_NS}}}extent")
+                    # EMU to points
+                    width = int(extent.get("cx", 0)) / 12700.0 if extent is not None else 0.0
+                    height = int(extent.get("cy", 0)) / 12700.0 if extent is not None else 0.0
+                    shapes.append((width, height))
+                    # Word shows an inline shape as a single "/" character in Range.Text
+                    run_text.append("/")
+        if run_text:
+            text.extend(run_text)
+            if "".join(run_text).strip():
+                fonts.append(self._run_font(style_id, run_style, read_rpr(rpr)))
+
+    def _read_field_char(self, fld_char):
+        kind = w_attr(fld_char, "fldCharType")
+        if kind == "begin":
+            self._fields.append(False)
+        elif kind == "end" and self._fields:
+            if self._fields.pop():
+                self._toc_depth -= 1
+
+    def _read_field_instruction(self, instruction):
+        # Only the first TOC field becomes doc.TablesOfContents(1)
+        if not self._fields or self._fields[-1] or not instruction.strip().upper().startswith("TOC"):
+            return
+        if self._toc_paragraphs is not None and self._toc_depth == 0:
+            return
+        self._fields[-1] = True
+        self._toc_depth += 1
+        if self._toc_paragraphs is None:
+            self._toc_paragraphs = []
+        self._paragraph_in_toc = True
+
+    def _resolve_paragraph(self, style_id, direct_ppr):
+        # docDefaults -> basedOn chain -> style -> list level -> direct formatting, once per combination
+        key = (style_id, signature(direct_ppr))
+        resolved = self._paragraph_styles.get(key)
+        if resolved is None:
+            props = self.styles.paragraph_props(style_id, direct_ppr)
+            level_ppr = self.numbering.level_ppr(props.get("num_id"), props.get("ilvl", 0))
+            if level_ppr:
+                # Indents from the list level sit between the style and direct formatting
+                props = self.styles.paragraph_props(style_id, {})
+                props.update(level_ppr)
+                props.update(direct_ppr)
+            resolved = self._paragraph_styles[key] = (props, ParagraphFormat(props))
+        return resolved
+
+    def _run_font(self, style_id, run_style, direct_rpr):
+        # Shared between runs; Font objects are never modified
+        key = (style_id, run_style, signature(direct_rpr))
+        font = self._run_fonts.get(key)
+        if font is None:
+            font = self._run_fonts[key] = self._font(self.styles.run_props(style_id, run_style, direct_rpr))
+        return font
+
+    def _font(self, props):
+        return Font(
+            self.styles.font_name(props),
+            props.get("size", 10.0),
+            -1 if props.get("bold") else 0,
+        )
+
+
+def open_document(source):
+    # A legacy .doc (or anything else renamed to .docx) is not a zip package
+    if not zipfile.is_zipfile(source):
+        raise ValueError("The file is not a .docx document; legacy .doc files need the Word backend")
+    return OoxmlDocument(source)
@@ -0,0 +1,186 @@
+import math
+from itertools import groupby
+
+# Average advance width of a character (Cyrillic and Latin text) as a fraction of the font size
+CHARACTER_WIDTHS = {
+    "Times New Roman": 0.5,
+    "Arial": 0.55,
+    "Calibri": 0.5,
+    "Cambria": 0.52,
+    "Courier New": 0.6,
+    "Consolas": 0.55,
+}
+DEFAULT_CHARACTER_WIDTH = 0.52
+DEFAULT_FONT_SIZE = 12.0
+# Word's largest font size; the MIXED sentinel is above it
+MAX_FONT_SIZE = 1638
+# Height of a single-spaced line relative to the font size
+LINE_HEIGHT = 1.15
+# Word's default cell margins, left and right of the text (0.19 cm each)
+CELL_PADDING = 5.4
+WD_LINE_SPACE_AT_LEAST = 3
+WD_LINE_SPACE_EXACTLY = 4
+
+
+class Pages:
+    # Fills pages top to bottom; page is where the last thing placed ends, like Range.Information(3)
+
+    def __init__(self, page_setup):
+        self.page = 1
+        self.used = 0.0
+        self.set_page_setup(page_setup)
+
+    def set_page_setup(self, page_setup):
+        self.height = max(page_setup.PageHeight - page_setup.TopMargin - page_setup.BottomMargin, 1.0)
+        self.width = max(page_setup.PageWidth - page_setup.LeftMargin - page_setup.RightMargin, 1.0)
+
+    def new_page(self):
+        self.page += 1
+        self.used = 0.0
+
+    def space(self, points):
+        # Paragraph spacing is dropped at the top of a page and never pushes anything to the next one
+        if self.used:
+            self.used = min(self.used + points, self.height)
+
+    def lines(self, count, line_height):
+        # Lines flow onto the following pages; a line that does not fit starts a new page
+        if count <= 0:
+            return
+        per_page = max(int(self.height // line_height), 1)
+        fits = int((self.height - self.used) // line_height) if self.used else per_page
+        if count <= fits:
+            self.used += count * line_height
+            return
+        full_pages, rest = divmod(count - fits, per_page)
+        if not rest:
+            full_pages, rest = full_pages - 1, per_page
+        self.page += full_pages + 1
+        self.used = rest * line_height
+
+    def block(self, height):
+        # Something Word does not split, like an image, moves to the next page whole
+        if self.used and self.used + height > self.height:
+            self.new_page()
+        self.flow(height)
+
+    def flow(self, height):
+        # Something Word splits anywhere, like a table row
+        self.used += height
+        while self.used > self.height:
+            self.page += 1
+            self.used -= self.height
+
+
+def font_size(paragraph):
+    size = paragraph.font.Size
+    return size if 0 < size <= MAX_FONT_SIZE else DEFAULT_FONT_SIZE
+
+
+def line_height(paragraph):
+    paragraph_format = paragraph.Format
+    natural = font_size(paragraph) * LINE_HEIGHT
+    if paragraph_format.LineSpacingRule == WD_LINE_SPACE_EXACTLY:
+        return max(paragraph_format.LineSpacing, 1.0)
+    if paragraph_format.LineSpacingRule == WD_LINE_SPACE_AT_LEAST:
+        return max(paragraph_format.LineSpacing, natural)
+    # Multiple spacing is reported in points relative to 12pt single spacing
+    return natural * paragraph_format.LineSpacing / 12.0
+
+
+def count_lines(text, width, paragraph):
+    paragraph_format = paragraph.Format
+    size = font_size(paragraph)
+    character_width = size * CHARACTER_WIDTHS.get(paragraph.font.Name, DEFAULT_CHARACTER_WIDTH)
+    text_width = max(width - paragraph_format.LeftIndent - paragraph_format.RightIndent, character_width)
+    per_line = max(int(text_width // character_width), 1)
+    # The first line indent takes up characters of the first line
+    indent = max(int(paragraph_format.FirstLineIndent // character_width), 0)
+    return sum(math.ceil((len(line) + indent * (number == 0)) / per_line) or 1
+               for number, line in enumerate(text.split("\x0b")))
+
+
+def content_text(paragraph):
+    text = paragraph.text.rstrip("\r\x07")
+    # Every inline shape shows as one "/" in the text
+    return text.replace("/", "", len(paragraph.inline_shapes))
+
+
+def place_paragraph(pages, paragraph, width):
+    paragraph_format = paragraph.Format
+    if paragraph_format.PageBreakBefore and pages.used:
+        pages.new_page()
+    pages.space(paragraph_format.SpaceBefore)
+    height = line_height(paragraph)
+    chunks = content_text(paragraph).split("\x0c")
+    for number, chunk in enumerate(chunks):
+        if number:
+            # A page break always starts a new page, even at the top of one
+            pages.new_page()
+        if chunk:
+            pages.lines(count_lines(chunk, width, paragraph), height)
+        elif number == len(chunks) - 1 and not paragraph.inline_shapes:
+            # The paragraph mark takes a line of its own
+            pages.lines(1, height)
+    for shape in paragraph.inline_shapes:
+        pages.block(shape.Height)
+    pages.space(paragraph_format.SpaceAfter)
+    return pages.page
+
+
+def paragraph_height(paragraph, width):
+    # The height of a paragraph inside a table cell, which never breaks it across pages
+    paragraph_format = paragraph.Format
+    text = content_text(paragraph).replace("\x0c", "")
+    lines = count_lines(text, width, paragraph) if text or not paragraph.inline_shapes else 0
+    return (paragraph_format.SpaceBefore + lines * line_height(paragraph) + paragraph_format.SpaceAfter +
+            sum(shape.Height for shape in paragraph.inline_shapes))
+
+
+def cell_width(paragraph, width):
+    table = paragraph.table
+    columns = table.grid_columns or max(len(row.Cells) for row in table.Rows)
+    span = min(paragraph.cell.column_span, columns)
+    return max(width * span / columns - 2 * CELL_PADDING, 1.0)
+
+
+def place_row(pages, paragraphs, width):
+    # A row is as tall as its tallest cell; every paragraph in it gets the page the row ends on
+    heights = {}
+    for paragraph in paragraphs:
+        height = paragraph_height(paragraph, cell_width(paragraph, width))
+        heights[id(paragraph.cell)] = heights.get(id(paragraph.cell), 0.0) + height
+    pages.flow(max(heights.values()))
+    # Rows split at page breaks in their cells; what follows the break is on the next page
+    if any("\x0c" in paragraph.text for paragraph in paragraphs):
+        pages.new_page()
+        pages.lines(1, line_height(paragraphs[-1]))
+    return pages.page
+
+
+def start_section(pages, document, section):
+    sections = document.sections
+    if section < len(sections):
+        pages.set_page_setup(sections[section].PageSetup)
+    if section < len(document._section_starts_new_page) and document._section_starts_new_page[section]:
+        pages.new_page()
+
+
+def estimate_pages(document):
+    # Assigns every paragraph the page it ends on from page size, margins, fonts, spacing, breaks and image
+    # heights, in one pass. Used when Word never saved where it broke pages; good to about a page.
+    pages = Pages(document.sections[0].PageSetup)
+    section = 0
+    for row, group in groupby(document.Paragraphs, key=lambda paragraph: paragraph.row):
+        if row is not None:
+            # A section never ends inside a table
+            group = list(group)
+            page = place_row(pages, group, pages.width)
+            for paragraph in group:
+                paragraph.page = page
+            continue
+        for paragraph in group:
+            if paragraph.section != section:
+                section = paragraph.section
+                start_section(pages, document, section)
+            paragraph.page = place_paragraph(pages, paragraph, pages.width)
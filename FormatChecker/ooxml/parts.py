@@ -0,0 +1,369 @@
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+REL_OFFICE_DOCUMENT = "/officeDocument"
+REL_STYLES = "/styles"
+REL_NUMBERING = "/numbering"
+REL_THEME = "/theme"
+
+
+def w(tag):
+    return f"{{{W_NS}}}{tag}"
+
+
+def w_attr(el, name, default=None):
+    if el is None:
+        return default
+    return el.get(w(name), default)
+
+
+def w_int(el, name, default=None):
+    value = w_attr(el, name)
+    if value is None:
+        return default
+    try:
+        return int(float(value))
+    except ValueError:
+        return default
+
+
+def on_off(el):
+    # Toggle properties like <w:b/> are "on" unless explicitly switched off
+    if el is None:
+        return None
+    return w_attr(el, "val", "true").lower() not in ("0", "false", "off", "none")
+
+
+def twips_to_points(value):
+    return value / 20.0
+
+
+class DocxPackage:
+    def __init__(self, source):
+        self.zip = zipfile.ZipFile(source)
+        self.names = set(self.zip.namelist())
+        self.document_path = self._resolve_target("", "_rels/.rels", REL_OFFICE_DOCUMENT) or "word/document.xml"
+        self._document_rels = self._read_rels(self.document_path)
+
+    def close(self):
+        self.zip.close()
+
+    def part_path(self, rel_suffix):
+        return self._document_rels.get(rel_suffix)
+
+    def read_xml(self, path):
+        if not path or path not in self.names:
+            return None
+        with self.zip.open(path) as part:
+            return ET.parse(part).getroot()
+
+    def iter_body(self):
+        # Yields the children of <w:body> (paragraphs, whole tables, the final sectPr) one at a time as they
+        # finish parsing and drops each one afterwards, so memory does not grow with the document
+        if self.document_path not in self.names:
+            return
+        with self.zip.open(self.document_path) as part:
+            depth = 0
+            body = None
+            for event, element in ET.iterparse(part, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 2 and element.tag == w("body"):
+                        body = element
+                    continue
+                depth -= 1
+                if body is not None and depth == 2:
+                    yield element
+                    body.remove(element)
+                elif element is body:
+                    body = None
+
+    def _rels_path(self, part_path):
+        directory, name = posixpath.split(part_path)
+        return posixpath.join(directory, "_rels", name + ".rels")
+
+    def _read_rels(self, part_path):
+        rels = {}
+        root = self.read_xml(self._rels_path(part_path))
+        if root is None:
+            return rels
+        base = posixpath.dirname(part_path)
+        for rel in root.iter(f"{{{PKG_REL_NS}}}Relationship"):
+            rel_type = rel.get("Type", "")
+            target = rel.get("Target", "")
+            if rel.get("TargetMode") == "External" or not target:
+                continue
+            path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(base, target))
+            rels.setdefault(rel_type[rel_type.rfind("/"):], path)
+        return rels
+
+    def _resolve_target(self, base, rels_path, rel_suffix):
+        root = self.read_xml(rels_path)
+        if root is None:
+            return None
+        for rel in root.iter(f"{{{PKG_REL_NS}}}Relationship"):
+            if rel.get("Type", "").endswith(rel_suffix):
+                return posixpath.normpath(posixpath.join(base, rel.get("Target", "").lstrip("/")))
+        return None
+
+
+def read_ppr(ppr):
+    props = {}
+    if ppr is None:
+        return props
+    jc = ppr.find(w("jc"))
+    if jc is not None:
+        props["alignment"] = w_attr(jc, "val")
+    ind = ppr.find(w("ind"))
+    if ind is not None:
+        left = w_int(ind, "left", w_int(ind, "start"))
+        right = w_int(ind, "right", w_int(ind, "end"))
+        if left is not None:
+            props["left"] = left
+        if right is not None:
+            props["right"] = right
+        if w_attr(ind, "hanging") is not None:
+            props["first_line"] = -w_int(ind, "hanging", 0)
+        elif w_attr(ind, "firstLine") is not None:
+            props["first_line"] = w_int(ind, "firstLine", 0)
+    spacing = ppr.find(w("spacing"))
+    if spacing is not None and w_attr(spacing, "line") is not None:
+        props["line"] = w_int(spacing, "line", 240)
+        props["line_rule"] = w_attr(spacing, "lineRule", "auto")
+    for side in ("before", "after"):
+        if spacing is not None and w_attr(spacing, side) is not None:
+            props[side] = w_int(spacing, side, 0)
+    num_pr = ppr.find(w("numPr"))
+    if num_pr is not None:
+        num_id = w_int(num_pr.find(w("numId")), "val")
+        if num_id is not None:
+            props["num_id"] = num_id
+        ilvl = w_int(num_pr.find(w("ilvl")), "val")
+        if ilvl is not None:
+            props["ilvl"] = ilvl
+    page_break_before = on_off(ppr.find(w("pageBreakBefore")))
+    if page_break_before is not None:
+        props["page_break_before"] = page_break_before
+    return props
+
+
+def read_rpr(rpr):
+    props = {}
+    if rpr is None:
+        return props
+    fonts = rpr.find(w("rFonts"))
+    if fonts is not None:
+        for attr, key in (("ascii", "font_ascii"), ("hAnsi", "font_hansi"),
+                          ("asciiTheme", "font_ascii_theme"), ("hAnsiTheme", "font_hansi_theme")):
+            value = w_attr(fonts, attr)
+            if value is not None:
+                props[key] = value
+        # An explicit font name overrides the theme font inherited from styles
+        if "font_ascii" in props and "font_ascii_theme" not in props:
+            props["font_ascii_theme"] = None
+        if "font_hansi" in props and "font_hansi_theme" not in props:
+            props["font_hansi_theme"] = None
+    size = w_int(rpr.find(w("sz")), "val")
+    if size is not None:
+        props["size"] = size / 2.0
+    bold = on_off(rpr.find(w("b")))
+    if bold is not None:
+        props["bold"] = bold
+    return props
+
+
+class Styles:
+    def __init__(self, root, theme_fonts):
+        self.theme_fonts = theme_fonts
+        self.default_ppr = {}
+        self.default_rpr = {}
+        self.styles = {}
+        self.default_paragraph_style = None
+        if root is None:
+            return
+        defaults = root.find(w("docDefaults"))
+        if defaults is not None:
+            self.default_ppr = read_ppr(defaults.find(f"{w('pPrDefault')}/{w('pPr')}"))
+            self.default_rpr = read_rpr(defaults.find(f"{w('rPrDefault')}/{w('rPr')}"))
+        for style in root.findall(w("style")):
+            style_id = w_attr(style, "styleId")
+            based_on = style.find(w("basedOn"))
+            self.styles[style_id] = {
+                "type": w_attr(style, "type"),
+                "based_on": w_attr(based_on, "val"),
+                "ppr": read_ppr(style.find(w("pPr"))),
+                "rpr": read_rpr(style.find(w("rPr"))),
+            }
+            if w_attr(style, "type") == "paragraph" and w_attr(style, "default") in ("1", "true", "on"):
+                self.default_paragraph_style = style_id
+
+    def chain(self, style_id):
+        chain = []
+        seen = set()
+        while style_id and style_id in self.styles and style_id not in seen:
+            seen.add(style_id)
+            chain.append(self.styles[style_id])
+            style_id = self.styles[style_id]["based_on"]
+        chain.reverse()
+        return chain
+
+    def paragraph_props(self, style_id, direct):
+        props = dict(self.default_ppr)
+        for style in self.chain(style_id or self.default_paragraph_style):
+            props.update(style["ppr"])
+        props.update(direct)
+        return props
+
+    def run_props(self, paragraph_style_id, run_style_id, direct):
+        props = dict(self.default_rpr)
+        for style in self.chain(paragraph_style_id or self.default_paragraph_style):
+            props.update(style["rpr"])
+        for style in self.chain(run_style_id):
+            props.update(style["rpr"])
+        props.update(direct)
+        return props
+
+    def font_name(self, props):
+        theme = props.get("font_ascii_theme") or props.get("font_hansi_theme")
+        if theme:
+            return self.theme_fonts.get("major" if theme.startswith("major") else "minor", "")
+        return props.get("font_ascii") or props.get("font_hansi") or ""
+
+
+def read_theme_fonts(root):
+    fonts = {}
+    if root is None:
+        return fonts
+    for kind, tag in (("major", "majorFont"), ("minor", "minorFont")):
+        latin = root.find(f".//{{{A_NS}}}{tag}/{{{A_NS}}}latin")
+        if latin is not None:
+            fonts[kind] = latin.get("typeface", "")
+    return fonts
+
+
+BULLET_FORMATS = {"bullet"}
+ROMAN_NUMERALS = (
+    (1000, "m"), (900, "cm"), (500, "d"), (400, "cd"), (100, "c"), (90, "xc"),
+    (50, "l"), (40, "xl"), (10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i"),
+)
+UKRAINIAN_LETTERS = "абвгдежзиклмнопрстуфхцчшщюя"
+
+
+def _letters(number, alphabet):
+    letter = alphabet[(number - 1) % len(alphabet)]
+    return letter * ((number - 1) // len(alphabet) + 1)
+
+
+def _roman(number):
+    result = ""
+    for value, numeral in ROMAN_NUMERALS:
+        while number >= value:
+            result += numeral
+            number -= value
+    return result
+
+
+def format_number(number, num_format):
+    if num_format == "lowerLetter":
+        return _letters(number, "abcdefghijklmnopqrstuvwxyz")
+    if num_format == "upperLetter":
+        return _letters(number, "abcdefghijklmnopqrstuvwxyz").upper()
+    if num_format == "lowerRoman":
+        return _roman(number)
+    if num_format == "upperRoman":
+        return _roman(number).upper()
+    if num_format == "russianLower":
+        return _letters(number, UKRAINIAN_LETTERS)
+    if num_format == "russianUpper":
+        return _letters(number, UKRAINIAN_LETTERS).upper()
+    return str(number)
+
+
+class Numbering:
+    # Word's WdListType values as reported by Range.ListFormat.ListType
+    NO_NUMBERING = 0
+    BULLET = 2
+    SIMPLE_NUMBERING = 3
+    OUTLINE_NUMBERING = 4
+    PICTURE_BULLET = 6
+
+    def __init__(self, root):
+        self.abstract = {}
+        self.nums = {}
+        self.counters = {}
+        if root is None:
+            return
+        for abstract in root.findall(w("abstractNum")):
+            levels = {}
+            for lvl in abstract.findall(w("lvl")):
+                levels[w_int(lvl, "ilvl", 0)] = self._read_level(lvl)
+            multi_level = w_attr(abstract.find(w("multiLevelType")), "val", "hybridMultilevel")
+            self.abstract[w_int(abstract, "abstractNumId")] = (multi_level, levels)
+        for num in root.findall(w("num")):
+            abstract_id = w_int(num.find(w("abstractNumId")), "val")
+            overrides = {}
+            for override in num.findall(w("lvlOverride")):
+                start = w_int(override.find(w("startOverride")), "val")
+                lvl = override.find(w("lvl"))
+                level = self._read_level(lvl) if lvl is not None else None
+                overrides[w_int(override, "ilvl", 0)] = (start, level)
+            self.nums[w_int(num, "numId")] = (abstract_id, overrides)
+
+    def _read_level(self, lvl):
+        return {
+            "start": w_int(lvl.find(w("start")), "val", 1),
+            "format": w_attr(lvl.find(w("numFmt")), "val", "decimal"),
+            "text": w_attr(lvl.find(w("lvlText")), "val", ""),
+            "picture": lvl.find(w("lvlPicBulletId")) is not None,
+            "ppr": read_ppr(lvl.find(w("pPr"))),
+        }
+
+    def _level(self, num_id, ilvl):
+        if num_id not in self.nums:
+            return None, None
+        abstract_id, overrides = self.nums[num_id]
+        multi_level, levels = self.abstract.get(abstract_id, ("singleLevel", {}))
+        start, override_level = overrides.get(ilvl, (None, None))
+        level = dict(override_level or levels.get(ilvl) or {})
+        if not level:
+            return multi_level, None
+        if start is not None:
+            level["start"] = start
+        return multi_level, level
+
+    def level_ppr(self, num_id, ilvl):
+        _, level = self._level(num_id, ilvl) if num_id else (None, None)
+        return level["ppr"] if level else {}
+
+    def next_marker(self, num_id, ilvl):
+        if not num_id:
+            return self.NO_NUMBERING, ""
+        multi_level, level = self._level(num_id, ilvl)
+        if level is None:
+            return self.NO_NUMBERING, ""
+
+        if level["format"] in BULLET_FORMATS:
+            list_type = self.PICTURE_BULLET if level["picture"] else self.BULLET
+            return list_type, level["text"]
+
+        counters = self.counters.setdefault(num_id, {})
+        counters[ilvl] = counters.get(ilvl, level["start"] - 1) + 1
+        for deeper in [lvl for lvl in counters if lvl > ilvl]:
+            del counters[deeper]
+
+        marker = level["text"]
+        for lvl in range(ilvl, -1, -1):
+            placeholder = f"%{lvl + 1}"
+            if placeholder in marker:
+                _, outer = self._level(num_id, lvl)
+                number = counters.get(lvl, outer["start"] if outer else 1)
+                marker = marker.replace(placeholder, format_number(number, outer["format"] if outer else "decimal"))
+
+        list_type = self.OUTLINE_NUMBERING if multi_level == "multilevel" else self.SIMPLE_NUMBERING
+        return list_type, marker
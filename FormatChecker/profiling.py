@@ -0,0 +1,178 @@
+import json
+import logging
+import math
+import threading
+import time
+import types
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger("FormatChecker.profiling")
+
+# Objects of these modules are the document model: COM dispatch wrappers or the OOXML emulation
+DOCUMENT_MODULES = ("win32com.", "FormatChecker.ooxml.")
+
+
+class AccessCounter:
+    def __init__(self):
+        self.count = 0
+
+    def hit(self):
+        self.count += 1
+
+
+class CountingProxy:
+    # Counts property reads and method calls on a document object and on everything reached through it.
+    # On the Word backend each of them is a COM round-trip; on OOXML they stand for XML model lookups.
+    __slots__ = ("_target", "_counter")
+
+    def __init__(self, target, counter):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_counter", counter)
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        # A method is counted when it is called, a property when it is read
+        if not isinstance(value, types.MethodType):
+            self._counter.hit()
+        return wrap(value, self._counter)
+
+    def __setattr__(self, name, value):
+        self._counter.hit()
+        setattr(self._target, name, unwrap(value))
+
+    def __call__(self, *args, **kwargs):
+        self._counter.hit()
+        return wrap(self._target(*args, **kwargs), self._counter)
+
+    def __getitem__(self, key):
+        self._counter.hit()
+        return wrap(self._target[key], self._counter)
+
+    def __iter__(self):
+        for item in self._target:
+            self._counter.hit()
+            yield wrap(item, self._counter)
+
+    def __len__(self):
+        self._counter.hit()
+        return len(self._target)
+
+    def __bool__(self):
+        return bool(self._target)
+
+    def __eq__(self, other):
+        return self._target == unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __repr__(self):
+        return repr(self._target)
+
+
+def is_document_object(value):
+    return type(value).__module__.startswith(DOCUMENT_MODULES)
+
+
+def is_document_method(value):
+    return isinstance(value, types.MethodType) and is_document_object(value.__self__)
+
+
+def wrap(value, counter):
+    if isinstance(value, CountingProxy):
+        value = value._target
+    if isinstance(value, list) and not is_document_object(value):
+        return [wrap(item, counter) for item in value]
+    if is_document_object(value) or is_document_method(value):
+        return CountingProxy(value, counter)
+    return value
+
+
+def unwrap(value):
+    if isinstance(value, CountingProxy):
+        return value._target
+    if isinstance(value, list) and not is_document_object(value):
+        return [unwrap(item) for item in value]
+    return value
+
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(rank, 1)) - 1]
+
+
+class Profile:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.document = {}
+        self.inputs = {}
+        self.rules = {}
+        self.grammar = {}
+        self.requests = []
+
+    @contextmanager
+    def measure(self, group, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self.lock:
+                getattr(self, group)[name] = seconds
+
+    def call(self, group, name, func, args):
+        # Runs func with document objects in args counted, and hands back unwrapped results so later
+        # readers of the result are not counted against this call
+        counter = AccessCounter()
+        start = time.perf_counter()
+        result = func(*[wrap(arg, counter) for arg in args])
+        seconds = time.perf_counter() - start
+        with self.lock:
+            getattr(self, group)[name] = {"seconds": seconds, "accesses": counter.count}
+        return unwrap(result)
+
+    def record_request(self, seconds, status, bytes_sent, bytes_received, endpoint=None):
+        with self.lock:
+            self.requests.append((seconds, status, bytes_sent, bytes_received, endpoint))
+
+    def languagetool_summary(self):
+        latencies = sorted(seconds for seconds, _, _, _, _ in self.requests)
+        endpoints = {}
+        for _, _, _, _, endpoint in self.requests:
+            endpoints[endpoint] = endpoints.get(endpoint, 0) + 1
+        return {
+            "requests": len(self.requests),
+            "failed": sum(1 for _, status, _, _, _ in self.requests if status != 200),
+            "bytes_sent": sum(sent for _, _, sent, _, _ in self.requests),
+            "bytes_received": sum(received for _, _, _, received, _ in self.requests),
+            "endpoints": endpoints,
+            "latency": {
+                "p50": percentile(latencies, 0.5),
+                "p90": percentile(latencies, 0.9),
+                "p99": percentile(latencies, 0.99),
+                "max": latencies[-1] if latencies else None,
+            },
+        }
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                "total": time.perf_counter() - self.started,
+                "document": dict(self.document),
+                "inputs": dict(self.inputs),
+                "rules": dict(self.rules),
+                "grammar": dict(self.grammar),
+                "languagetool": self.languagetool_summary(),
+            }
+
+
+def measure(profile, group, name):
+    return profile.measure(group, name) if profile else nullcontext()
+
+
+def log_profile(timings, **context):
+    logger.info(json.dumps({"event": "check_profile", **context, "timings": timings}, ensure_ascii=False))
@@ -0,0 +1,58 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+KEY_PREFIX = "check-result"
+
+
+def normalize_exception_words(exception_words):
+    return sorted({word.strip() for word in exception_words if isinstance(word, str) and word.strip()})
+
+
+def make_cache_key(file_digest, document_part, formatting_check, grammar_check, exception_words, rule_names=None,
+                   exception_dictionary=None, rule_profile=None):
+    digest = hashlib.sha256(file_digest.encode("ascii"))
+    options = [
+        settings.DOCUMENT_BACKEND,
+        document_part,
+        bool(formatting_check),
+        bool(grammar_check),
+        normalize_exception_words(exception_words),
+        rule_names if isinstance(rule_names, str) or rule_names is None else sorted(rule_names),
+        # (name, version): a new version of the dictionary must not hit results of the old one
+        list(exception_dictionary) if exception_dictionary else None,
+        # (faculty, digest): results of another faculty, or of the profile before an edit, never match
+        list(rule_profile) if rule_profile else None,
+    ]
+    digest.update(json.dumps(options, ensure_ascii=False).encode("utf-8"))
+    return f"{KEY_PREFIX}:{digest.hexdigest()}"
+
+
+def get_result_cache():
+    return caches[settings.RESULT_CACHE_ALIAS]
+
+
+def get_cached_result(key):
+    return get_result_cache().get(key)
+
+
+def has_grammar_errors(result):
+    return any(line.startswith("Error: Unable to reach LanguageTool") for line in result.get("grammar", []))
+
+
+def is_cacheable(result):
+    # Timings describe one particular run, changes one particular earlier submission
+    if "error" in result or "timings" in result or "changes" in result:
+        return False
+    # Grammar lines with API failures are transient and must be retried next time
+    return not has_grammar_errors(result)
+
+
+def store_result(key, result):
+    if not is_cacheable(result):
+        return
+    if len(json.dumps(result, ensure_ascii=False)) > settings.RESULT_CACHE_MAX_ITEM_SIZE:
+        return
+    get_result_cache().set(key, result)
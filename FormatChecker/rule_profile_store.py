@@ -0,0 +1,77 @@
+import os
+import re
+from functools import lru_cache
+
+from django.conf import settings
+
+from FormatChecker.checkers.rule_profile import (
+    DEFAULT_PROFILE, RuleProfile, RuleProfileError, part_settings, read_profile,
+)
+
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+DEFAULT = "default"
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@lru_cache(maxsize=64)
+def load_profile(path, stamp):
+    # Parsed and validated once per version of the file; stamp is only part of the cache key
+    return read_profile(path)
+
+
+@lru_cache(maxsize=256)
+def compile_profile(faculty, document_part, paths, stamps):
+    return RuleProfile(faculty, document_part,
+                       part_settings([load_profile(path, stamp) for path, stamp in zip(paths, stamps)], document_part))
+
+
+class RuleProfileStore:
+    # {directory}/{faculty}.json lists what a faculty does differently from the bundled default profile.
+    # A profile is compiled once per document part and per version of its files, so picking one per request
+    # costs two stat() calls, and an edited file is picked up by the next check without a restart.
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _paths(self, faculty):
+        if faculty == DEFAULT:
+            return (DEFAULT_PROFILE,)
+        if not NAME_PATTERN.match(faculty or ""):
+            raise RuleProfileError("Rule profile names may only contain latin letters, digits, '-' and '_'")
+        return DEFAULT_PROFILE, os.path.join(self.directory, f"{faculty}.json")
+
+    def get(self, faculty, document_part):
+        paths = self._paths(faculty)
+        try:
+            stamps = tuple(map(file_stamp, paths))
+        except FileNotFoundError:
+            raise RuleProfileError(f"Unknown rule profile: {faculty}") from None
+        return compile_profile(faculty, document_part, paths, stamps)
+
+    def resolve(self, faculty, document_part):
+        # (faculty, digest) with the profile validated; the digest changes whenever the part's rules do
+        return faculty, self.get(faculty, document_part).digest
+
+    def list(self):
+        names = [DEFAULT]
+        if os.path.isdir(self.directory):
+            names += sorted(entry[:-5] for entry in os.listdir(self.directory)
+                            if entry.endswith(".json") and NAME_PATTERN.match(entry[:-5]) and entry[:-5] != DEFAULT)
+        profiles = []
+        for name in names:
+            path = self._paths(name)[-1]
+            try:
+                description = load_profile(path, file_stamp(path)).get("description")
+            except (OSError, RuleProfileError) as e:
+                print(f"Skipping rule profile {name}: {e}")
+                continue
+            profiles.append({"faculty": name, "description": description})
+        return profiles
+
+
+def get_rule_profile_store():
+    return RuleProfileStore(settings.RULE_PROFILE_DIR)
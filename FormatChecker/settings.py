@@ -126,4 +126,98 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = '/media/'
 
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# "word" drives Microsoft Word over COM (Windows only), "ooxml" parses the .docx in-process
+DOCUMENT_BACKEND = config("DOCUMENT_BACKEND", default="word" if os.name == "nt" else "ooxml")
+
+# Whole-document check results keyed by a hash of the upload and the check options.
+# Any Django cache backend works; LocMemCache evicts least recently used entries past MAX_ENTRIES.
+RESULT_CACHE_ALIAS = "results"
+RESULT_CACHE_MAX_ITEM_SIZE = config("RESULT_CACHE_MAX_ITEM_SIZE", default=1024 * 1024, cast=int)
+
+# Raw LanguageTool matches per paragraph text and language, kept on disk across restarts
+GRAMMAR_CACHE_ALIAS = "grammar"
+
+# Fingerprints and findings of the last check of each document lineage (lineage=), shared by the workers
+LINEAGE_CACHE_ALIAS = "lineage"
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    RESULT_CACHE_ALIAS: {
+        "BACKEND": config("RESULT_CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("RESULT_CACHE_LOCATION", default="check-results"),
+        "TIMEOUT": config("RESULT_CACHE_TIMEOUT", default=24 * 60 * 60, cast=int),
+        "OPTIONS": {
+            "MAX_ENTRIES": config("RESULT_CACHE_MAX_ENTRIES", default=500, cast=int),
+        },
+    },
+    GRAMMAR_CACHE_ALIAS: {
+        "BACKEND": config("GRAMMAR_CACHE_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": config("GRAMMAR_CACHE_LOCATION", default=os.path.join(BASE_DIR, "cache", "grammar")),
+        "TIMEOUT": config("GRAMMAR_CACHE_TIMEOUT", default=30 * 24 * 60 * 60, cast=int),
+        "OPTIONS": {
+            "MAX_ENTRIES": config("GRAMMAR_CACHE_MAX_ENTRIES", default=100000, cast=int),
+        },
+    },
+    LINEAGE_CACHE_ALIAS: {
+        "BACKEND": config("LINEAGE_CACHE_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": config("LINEAGE_CACHE_LOCATION", default=os.path.join(BASE_DIR, "cache", "lineage")),
+        "TIMEOUT": config("LINEAGE_CACHE_TIMEOUT", default=180 * 24 * 60 * 60, cast=int),
+        "OPTIONS": {
+            "MAX_ENTRIES": config("LINEAGE_CACHE_MAX_ENTRIES", default=10000, cast=int),
+        },
+    },
+}
+
+# Background checks. Jobs are tracked in a local SQLite file, so no external broker is needed.
+# JOB_EXECUTOR is "process" (one worker process per concurrent check) or "thread".
+JOB_DATABASE = config("JOB_DATABASE", default=os.path.join(BASE_DIR, "cache", "jobs.sqlite3"))
+JOB_SPOOL_DIR = config("JOB_SPOOL_DIR", default=os.path.join(BASE_DIR, "cache", "uploads"))
+JOB_EXECUTOR = config("JOB_EXECUTOR", default="process")
+JOB_WORKERS = config("JOB_WORKERS", default=1 if DOCUMENT_BACKEND == "word" else (os.cpu_count() or 2), cast=int)
+JOB_QUEUE_LIMIT = config("JOB_QUEUE_LIMIT", default=20, cast=int)
+JOB_RETENTION = config("JOB_RETENTION", default=24 * 60 * 60, cast=int)
+
+# Shared exception dictionaries, one immutable JSON file per version
+EXCEPTION_DICTIONARY_DIR = config("EXCEPTION_DICTIONARY_DIR", default=os.path.join(BASE_DIR, "dictionaries"))
+
+# Faculty rule profiles, {faculty}.json each, listing what differs from the bundled default standard.
+# Checks pick one with faculty=<name>; DEFAULT_RULE_PROFILE is used when they do not.
+RULE_PROFILE_DIR = config("RULE_PROFILE_DIR", default=os.path.join(BASE_DIR, "rule_profiles"))
+DEFAULT_RULE_PROFILE = config("DEFAULT_RULE_PROFILE", default="default")
+
+# Checks streamed over Server-Sent Events run on threads of the web process, at most this many at once
+STREAM_WORKERS = config("STREAM_WORKERS", default=4, cast=int)
+
+# Batch uploads (/batch/): documents of one batch run at most BATCH_CONCURRENCY at a time
+BATCH_CONCURRENCY = config("BATCH_CONCURRENCY", default=JOB_WORKERS, cast=int)
+BATCH_MAX_FILES = config("BATCH_MAX_FILES", default=200, cast=int)
+BATCH_MAX_BYTES = config("BATCH_MAX_BYTES", default=500 * 1024 * 1024, cast=int)
+DATA_UPLOAD_MAX_NUMBER_FILES = BATCH_MAX_FILES + 1
+
+# Long-lived Word instances per worker process (Word backend only)
+WORD_POOL_SIZE = config("WORD_POOL_SIZE", default=1, cast=int)
+WORD_POOL_MAX_DOCUMENTS = config("WORD_POOL_MAX_DOCUMENTS", default=50, cast=int)
+WORD_POOL_TIMEOUT = config("WORD_POOL_TIMEOUT", default=300, cast=int)
+
+# Threads used to run independent formatting rules of one document (OOXML backend only)
+RULE_WORKERS = config("RULE_WORKERS", default=4, cast=int)
+
+# Adds a "timings" block (per-rule time and document accesses, LanguageTool traffic) to every result.
+# A single check can ask for it with profile=on.
+PROFILE_CHECKS = config("PROFILE_CHECKS", default=False, cast=bool)
+
+# Profiles are logged as one JSON object per line
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "FormatChecker.profiling": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
@@ -0,0 +1,97 @@
+import json
+import queue
+import threading
+
+from django.conf import settings
+
+from FormatChecker.loader import discard
+
+KEEPALIVE_SECONDS = 15
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+class StreamBusy(Exception):
+    pass
+
+
+def get_stream_slots():
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(settings.STREAM_WORKERS)
+        return _slots
+
+
+def sse_event(kind, payload):
+    data = json.dumps(payload, ensure_ascii=False)
+    return f"event: {kind}\ndata: {data}\n\n"
+
+
+def replay_result(result):
+    # A cached result has no per-rule or per-page split left, so it is sent as one event of each kind
+    if "error" in result:
+        yield sse_event("error", {"error": result["error"]})
+        return
+    if "formatting" in result:
+        yield sse_event("formatting", {"rule": None, "result": "\n".join(result["formatting"])})
+    if "grammar" in result:
+        yield sse_event("grammar", {"page": None, "lines": result["grammar"]})
+    yield sse_event("done", {"result": result})
+
+
+def stream_check(document_path, document_part, formatting_check, grammar_check, exception_words, rule_names=None,
+                 on_done=None, profile=False, exception_dictionary=None, lineage=None, rule_profile=None):
+    # Takes ownership of document_path. The check runs on its own thread and the returned generator
+    # relays its events, so a slow client never holds the document or the Word instance open.
+    from FormatChecker.doc_checker import check_document_rules
+
+    slots = get_stream_slots()
+    if not slots.acquire(blocking=False):
+        discard(document_path)
+        raise StreamBusy()
+
+    events = queue.Queue()
+
+    def emit(kind, payload):
+        events.put((kind, payload))
+
+    def progress(**fields):
+        emit("progress", fields)
+
+    def run():
+        try:
+            result = check_document_rules(document_path, document_part, formatting_check, grammar_check,
+                                          exception_words, progress=progress, rule_names=rule_names, events=emit,
+                                          profile=profile, exception_dictionary=exception_dictionary,
+                                          lineage=lineage, rule_profile=rule_profile)
+            if "error" in result:
+                emit("error", {"error": result["error"]})
+            else:
+                if on_done is not None:
+                    on_done(result)
+                emit("done", {"result": result})
+        except Exception as e:
+            print("Streaming check failed:", e)
+            emit("error", {"error": str(e)})
+        finally:
+            discard(document_path)
+            slots.release()
+            events.put(None)
+
+    threading.Thread(target=run, name="check-stream", daemon=True).start()
+
+    def relay():
+        while True:
+            try:
+                item = events.get(timeout=KEEPALIVE_SECONDS)
+            except queue.Empty:
+                # A comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                return
+            yield sse_event(*item)
+
+    return relay()
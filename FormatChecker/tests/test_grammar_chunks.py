@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+from benchmarks.lt_stub import LanguageToolStub
+from FormatChecker.checkers import ai_utils
+from FormatChecker.checkers.lt_endpoints import EndpointPool
+from FormatChecker.checkers.snapshot import ParagraphRecord
+
+
+def record(index, text, page=1, in_table=False):
+    return ParagraphRecord(index, text, "Times New Roman", 14, False, 3, 0, 0, 35.4, 18, 0, "", page, in_table,
+                           False)
+
+
+class ChunkTests(TestCase):
+    def test_paragraphs_are_packed_up_to_the_limit(self):
+        texts = ["a" * 40, "b" * 40, "c" * 40]
+        chunks = ai_utils.build_chunks(texts, max_chars=90)
+
+        self.assertEqual([text for text, _ in chunks], ["a" * 40 + "\n\n" + "b" * 40, "c" * 40])
+        for text, spans in chunks:
+            for start, end, index in spans:
+                self.assertEqual(text[start:end], texts[index])
+
+    def test_a_paragraph_longer_than_the_limit_gets_a_chunk_of_its_own(self):
+        chunks = ai_utils.build_chunks(["short", "x" * 50, "end"], max_chars=20)
+
+        self.assertEqual([text for text, _ in chunks], ["short", "x" * 50, "end"])
+
+    def test_matches_are_moved_to_their_paragraph(self):
+        text, spans = ai_utils.build_chunks(["перше слово", "друге слово"])[0]
+        matches = [
+            {"offset": text.index("друге"), "length": 5},
+            {"offset": 0, "length": 6},
+            # On the separator between the paragraphs
+            {"offset": len("перше слово"), "length": 2},
+        ]
+
+        per_paragraph = ai_utils.split_matches(spans, matches)
+
+        self.assertEqual(per_paragraph, {0: [{"offset": 0, "length": 6}], 1: [{"offset": 0, "length": 5}]})
+
+    def test_spelling_sections_follow_the_rule_profile(self):
+        paragraphs = [record(0, "Титулка"), record(1, "CONTENTS"), record(2, "Текст"), record(3, "ЗМІСТ"),
+                      record(4, "Ще текст"), record(5, "Annexes"), record(6, "Додаток А")]
+        faculty = SimpleNamespace(toc_title="CONTENTS", appendices_title="ANNEXES")
+
+        selected = ai_utils.collect_spelling_paragraphs(paragraphs, faculty)
+
+        self.assertEqual([paragraph.index for paragraph in selected], [2, 3, 4])
+
+
+class StubbedLanguageToolTests(TestCase):
+    # Whole documents go through iter_paragraph_matches against the stub, which flags words ending in "юю"
+
+    def setUp(self):
+        self.stub = LanguageToolStub().start()
+        self.addCleanup(self.stub.server_close)
+        self.addCleanup(self.stub.shutdown)
+        pool = EndpointPool([self.stub.url], health_interval=1)
+        patcher = mock.patch.object(ai_utils, "_endpoint_pool", pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_offsets_point_into_each_paragraph_across_chunks(self):
+        paragraphs = [record(index, f"Абзац {index} містить {'слово ' * (index % 7)}помилкуюю і ще текст.")
+                      for index in range(400)]
+        expected_chunks = len(ai_utils.build_chunks([paragraph.text for paragraph in paragraphs]))
+        self.assertGreater(expected_chunks, 1)
+
+        results = list(ai_utils.iter_paragraph_matches(paragraphs))
+
+        self.assertEqual(self.stub.requests, expected_chunks)
+        self.assertEqual([paragraph for paragraph, _, _ in results], paragraphs)
+        for paragraph, matches, error in results:
+            self.assertIsNone(error)
+            self.assertEqual(len(matches), 1)
+            offset, length = matches[0]["offset"], matches[0]["length"]
+            self.assertEqual(paragraph.text[offset:offset + length], "помилкуюю")
+
+    def test_repeated_paragraphs_are_sent_once(self):
+        paragraphs = [record(index, "Той самий рядокюю.") for index in range(5)]
+
+        results = list(ai_utils.iter_paragraph_matches(paragraphs))
+
+        self.assertEqual(self.stub.requests, 1)
+        self.assertTrue(all(len(matches) == 1 for _, matches, _ in results))
+
+    def test_document_spelling_reports_the_page_and_word(self):
+        paragraphs = [
+            record(0, "Титулка з помилкоюю"),
+            record(1, "ЗМІСТ"),
+            record(2, "Текст першої сторінкиюю", page=2),
+            record(3, "Таблицяюю", page=2, in_table=True),
+            record(4, "Друга сторінка без помилок", page=3),
+            record(5, "Ще одне словоюю", page=3),
+        ]
+
+        lines = ai_utils.check_document_spelling(paragraphs, [])
+
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Issue on page 2", lines[0])
+        self.assertIn("'сторінкиюю'", lines[0])
+        self.assertIn("Issue on page 3", lines[1])
+        self.assertIn("'словоюю'", lines[1])
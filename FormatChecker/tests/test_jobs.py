@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import time
+from contextlib import closing
+from unittest import TestCase
+
+from FormatChecker.jobs import FAILED, OWNER_TIMEOUT, QUEUED, JobQueue, JobStore, QueueFull
+
+
+class JobQueueTests(TestCase):
+    # Two queues on one store and spool directory stand for two server processes
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.store = JobStore(os.path.join(self.directory, "jobs.sqlite3"))
+        self.spool = os.path.join(self.directory, "uploads")
+
+    def make_queue(self, **options):
+        queue = JobQueue(self.store, self.spool, executor="thread", **options)
+        self.addCleanup(queue.executor.shutdown)
+        return queue
+
+    def spool_file(self, queue):
+        os.makedirs(queue.spool_dir, exist_ok=True)
+        path = os.path.join(queue.spool_dir, "upload.docx")
+        open(path, "wb").close()
+        return path
+
+    def let_die(self, queue):
+        # As if the process stopped sending heartbeats a while ago
+        past = time.time() - 2 * OWNER_TIMEOUT
+        with closing(self.store._connect()) as conn, conn:
+            conn.execute("UPDATE owners SET seen = ? WHERE id = ?", (past, queue.owner))
+        os.utime(queue.spool_dir, (past, past))
+
+    def test_a_new_process_leaves_the_jobs_and_uploads_of_a_live_one_alone(self):
+        first = self.make_queue()
+        job_id = self.store.create("main_part", owner=first.owner)
+        upload = self.spool_file(first)
+
+        self.make_queue()
+
+        self.assertEqual(self.store.get(job_id)["status"], QUEUED)
+        self.assertTrue(os.path.exists(upload))
+
+    def test_jobs_and_uploads_of_a_dead_process_are_cleaned_up(self):
+        first = self.make_queue()
+        job_id = self.store.create("main_part", owner=first.owner)
+        upload = self.spool_file(first)
+        self.let_die(first)
+
+        second = self.make_queue()
+        own_job = self.store.create("main_part", owner=second.owner)
+        second.recover()
+
+        self.assertEqual(self.store.get(job_id)["status"], FAILED)
+        self.assertFalse(os.path.exists(upload))
+        self.assertEqual(self.store.get(own_job)["status"], QUEUED)
+
+    def test_a_batch_that_would_overfill_the_queue_is_refused_whole(self):
+        queue = self.make_queue(queue_limit=3)
+        self.store.create("main_part", owner=queue.owner)
+        uploads = [self.spool_file(queue) + str(number) for number in range(3)]
+        for upload in uploads:
+            open(upload, "wb").close()
+
+        with self.assertRaises(QueueFull):
+            queue.submit_batch([(upload, None) for upload in uploads], "main_part", True, False, [])
+
+        self.assertEqual(self.store.count_active(), 1)
+        self.assertFalse(any(os.path.exists(upload) for upload in uploads))
@@ -0,0 +1,101 @@
+import time
+import types
+from unittest import TestCase, mock
+
+from benchmarks.lt_stub import LanguageToolStub
+from FormatChecker.checkers import ai_utils
+from FormatChecker.checkers.lt_endpoints import EndpointPool
+
+TEXT = "Речення з помилкоюю."
+
+
+class RetryTests(TestCase):
+    def setUp(self):
+        self.sleeps = []
+        # Pauses are recorded; only the short ones really wait, so endpoints can come back into rotation
+        clock = types.SimpleNamespace(perf_counter=time.perf_counter, sleep=self.sleep)
+        patcher = mock.patch.object(ai_utils, "time", clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        if seconds <= 1.5:
+            time.sleep(seconds)
+
+    def start_stub(self):
+        stub = LanguageToolStub().start()
+        self.addCleanup(stub.server_close)
+        self.addCleanup(stub.shutdown)
+        return stub
+
+    def pool(self, *urls, failure_threshold=3):
+        return EndpointPool(list(urls), failure_threshold=failure_threshold, cooldown=60, health_interval=60)
+
+    def test_an_unavailable_endpoint_gets_the_whole_retry_budget_with_backoff(self):
+        stub = self.start_stub()
+        stub.statuses.extend([503] * 10)
+
+        status, matches = ai_utils.request_matches(TEXT, endpoints=self.pool(stub.url))
+
+        self.assertEqual((status, matches), (503, []))
+        self.assertEqual(stub.requests, ai_utils.MAX_RETRIES)
+        # Exponential backoff between attempts and no pause after the last one
+        self.assertEqual(self.sleeps, [2 ** attempt for attempt in range(1, ai_utils.MAX_RETRIES)])
+
+    def test_a_transient_failure_is_retried(self):
+        stub = self.start_stub()
+        stub.statuses.append(502)
+
+        status, matches = ai_utils.request_matches(TEXT, endpoints=self.pool(stub.url))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(stub.requests, 2)
+
+    def test_rate_limiting_waits_for_retry_after(self):
+        stub = self.start_stub()
+        stub.statuses.append(429)
+        stub.retry_after = 1
+
+        status, _ = ai_utils.request_matches(TEXT, endpoints=self.pool(stub.url))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(stub.requests, 2)
+        self.assertEqual(len(self.sleeps), 1)
+        self.assertAlmostEqual(self.sleeps[0], 1, delta=0.1)
+
+    def test_a_failing_endpoint_fails_over_without_waiting(self):
+        broken = self.start_stub()
+        broken.statuses.extend([503] * 10)
+        working = self.start_stub()
+        endpoints = self.pool(broken.url, working.url, failure_threshold=1)
+
+        results = [ai_utils.request_matches(TEXT, endpoints=endpoints) for _ in range(3)]
+
+        self.assertEqual([status for status, _ in results], [200] * 3)
+        self.assertEqual(self.sleeps, [])
+        # Taken out of rotation after its first failure
+        self.assertLessEqual(broken.requests, 1)
+        self.assertEqual(working.requests, 3)
+
+    def test_an_unreachable_endpoint_fails_over(self):
+        working = self.start_stub()
+        closed = self.start_stub()
+        closed_url = closed.url
+        closed.shutdown()
+        closed.server_close()
+
+        status, _ = ai_utils.request_matches(TEXT, endpoints=self.pool(closed_url, working.url))
+
+        self.assertEqual(status, 200)
+        self.assertEqual(working.requests, 1)
+
+    def test_no_endpoint_reachable_returns_none(self):
+        closed = self.start_stub()
+        closed_url = closed.url
+        closed.shutdown()
+        closed.server_close()
+
+        self.assertEqual(ai_utils.request_matches(TEXT, endpoints=self.pool(closed_url)), (None, []))
+        self.assertEqual(len(self.sleeps), ai_utils.MAX_RETRIES - 1)
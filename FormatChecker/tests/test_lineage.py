@@ -0,0 +1,28 @@
+from django.test import RequestFactory, SimpleTestCase
+
+from FormatChecker.lineage import NEW_LINEAGE, Lineage
+from FormatChecker.views import parse_lineage
+
+
+class LineageTokenTests(SimpleTestCase):
+    def parse(self, value):
+        return parse_lineage(RequestFactory().post("/check/", {"lineage": value}))
+
+    def test_a_new_lineage_gets_a_token_that_is_accepted_later(self):
+        token = self.parse(NEW_LINEAGE)
+
+        self.assertEqual(self.parse(token), token)
+        self.assertNotEqual(self.parse(NEW_LINEAGE), token)
+
+    def test_a_name_the_client_made_up_is_refused(self):
+        with self.assertRaises(ValueError):
+            self.parse("student-42_thesis")
+        token = self.parse(NEW_LINEAGE)
+        with self.assertRaises(ValueError):
+            self.parse(token[:-1] + ("A" if token[-1] != "A" else "B"))
+
+    def test_lineages_of_different_tokens_do_not_share_a_key(self):
+        first = Lineage(self.parse(NEW_LINEAGE), "main_part", "ooxml")
+        second = Lineage(self.parse(NEW_LINEAGE), "main_part", "ooxml")
+
+        self.assertNotEqual(first.key, second.key)
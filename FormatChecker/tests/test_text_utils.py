@@ -0,0 +1,23 @@
+import re
+import sys
+from unittest import TestCase
+
+from FormatChecker.checkers.text_utils import TOPIC_NOISE, clean_topic_name
+
+
+class TopicNoiseTests(TestCase):
+    def test_every_digit_str_isdigit_knows_is_dropped(self):
+        # Catches a Python whose Unicode database has digits the precomputed table lacks
+        missing = [hex(code) for code in range(sys.maxunicode + 1) if chr(code).isdigit()
+                   and not TOPIC_NOISE.fullmatch(chr(code))]
+
+        self.assertEqual(missing, [])
+
+    def test_nothing_but_digits_dots_and_tabs_is_dropped(self):
+        extra = [hex(code) for code in range(sys.maxunicode + 1) if TOPIC_NOISE.fullmatch(chr(code))
+                 and not chr(code).isdigit() and not re.fullmatch(r"[\d.\t]", chr(code))]
+
+        self.assertEqual(extra, [])
+
+    def test_topic_names_lose_their_numbering(self):
+        self.assertEqual(clean_topic_name("1.2.\tВступ²", to_upper=True), "ВСТУП")
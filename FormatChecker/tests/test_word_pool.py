@@ -0,0 +1,99 @@
+import threading
+from unittest import TestCase
+
+from FormatChecker.word_pool import ApplicationFactory, ApplicationPool, PoolTimeout
+
+
+class FakeApplication:
+    def __init__(self, number):
+        self.number = number
+        self.killed = threading.Event()
+        self.closed = False
+
+
+class FakeFactory(ApplicationFactory):
+    # Stands in for Word; create() blocks while `starting` is cleared
+
+    def __init__(self):
+        self.created = []
+        self.starting = threading.Event()
+        self.starting.set()
+
+    def create(self):
+        self.starting.wait()
+        app = FakeApplication(len(self.created))
+        self.created.append(app)
+        return app
+
+    def close(self, app):
+        app.closed = True
+
+    def kill(self, app):
+        app.killed.set()
+
+
+def application_number(app):
+    return app.number
+
+
+def wait_until_killed(app):
+    # Like a COM call that only fails once the process is gone
+    app.killed.wait(10)
+    raise RuntimeError("The application was killed")
+
+
+def fail(app):
+    raise ValueError("broken document")
+
+
+class ApplicationPoolTests(TestCase):
+    def make_pool(self, factory, **options):
+        pool = ApplicationPool(factory, **options)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def test_instances_are_reused_and_recycled_after_max_documents(self):
+        factory = FakeFactory()
+        pool = self.make_pool(factory, max_documents=2, timeout=5)
+
+        numbers = [pool.run(application_number) for _ in range(3)]
+
+        self.assertEqual(numbers, [0, 0, 1])
+        self.assertTrue(factory.created[0].closed)
+
+    def test_an_error_replaces_the_instance(self):
+        factory = FakeFactory()
+        pool = self.make_pool(factory, timeout=5)
+
+        with self.assertRaises(ValueError):
+            pool.run(fail)
+
+        self.assertTrue(factory.created[0].closed)
+        self.assertEqual(pool.run(application_number), 1)
+
+    def test_a_task_that_runs_too_long_kills_its_instance(self):
+        factory = FakeFactory()
+        pool = self.make_pool(factory, timeout=0.5)
+
+        with self.assertRaises(PoolTimeout):
+            pool.run(wait_until_killed)
+
+        self.assertTrue(factory.created[0].killed.is_set())
+        self.assertEqual(pool.run(application_number, timeout=5), 1)
+
+    def test_an_instance_that_never_starts_times_out_and_its_worker_is_replaced(self):
+        factory = FakeFactory()
+        factory.starting.clear()
+        pool = self.make_pool(factory, timeout=0.5)
+        stuck = pool.workers[0]
+
+        with self.assertRaises(PoolTimeout):
+            pool.run(application_number)
+
+        self.assertTrue(stuck.abandoned)
+        self.assertIsNot(pool.workers[0], stuck)
+        # Both the stuck worker and its replacement get their instance once starting works again
+        factory.starting.set()
+        self.assertIn(pool.run(application_number, timeout=5), (0, 1))
+        stuck.join(5)
+        self.assertFalse(stuck.is_alive())
@@ -4,4 +4,14 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('check/', views.check_document, name='check_document'),
+    path('check/stream/', views.check_document_stream, name='check_document_stream'),
+    path('batch/', views.check_batch, name='check_batch'),
+    path('batch/<str:batch_id>/', views.batch_status, name='batch_status'),
+    path('batch/<str:batch_id>/stream/', views.batch_stream, name='batch_stream'),
+    path('jobs/<str:job_id>/', views.job_status, name='job_status'),
+    path('jobs/<str:job_id>/result/', views.job_result, name='job_result'),
+    path('dictionaries/', views.dictionaries, name='dictionaries'),
+    path('dictionaries/<str:name>/', views.dictionary_detail, name='dictionary_detail'),
+    path('rule_profiles/', views.rule_profiles, name='rule_profiles'),
+    path('rule_profiles/<str:faculty>/', views.rule_profile_detail, name='rule_profile_detail'),
 ]
\ No newline at end of file
@@ -1,30 +1,300 @@
-from django.http import JsonResponse, FileResponse, HttpResponse
+from django.http import JsonResponse, FileResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
-from .doc_checker import check_document_rules
-from io import BytesIO
+from django.urls import reverse
+from django.conf import settings
+from .jobs import get_job_queue, QueueFull, DONE, FAILED
+from .loader import upload_digest, spool_upload, discard
+from .batch import spool_batch, batch_report, document_error, BatchError
+from .streaming import stream_check, replay_result, StreamBusy
+# The checker modules register their formatting rules on import
+from .checkers import rules, main_part_checker, extras_checker
+from .result_cache import make_cache_key, get_cached_result, store_result
+from .dictionaries import get_dictionary_store, DictionaryError
+from .rule_profile_store import get_rule_profile_store, RuleProfileError
+from .lineage import NEW_LINEAGE, new_token, is_token
 import json
+import time
+from functools import partial
+
+BATCH_POLL_SECONDS = 0.5
+
 def index(request):
     return render(request, 'main_page.html')
 
+def job_payload(job_id, status):
+    return {
+        "job_id": job_id,
+        "status": status,
+        "status_url": reverse("job_status", args=[job_id]),
+        "result_url": reverse("job_result", args=[job_id]),
+    }
+
+def parse_rule_names(raw, document_part):
+    # "quick" selects the cheap rules, a comma-separated list selects rules by name
+    if not raw:
+        return None
+    if raw == rules.QUICK:
+        return rules.QUICK
+    names = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = set(names) - set(rules.rule_names(document_part))
+    if unknown:
+        raise ValueError(f"Unknown rules for {document_part}: {', '.join(sorted(unknown))}")
+    return names
+
+def parse_check_options(request):
+    # The check options shared by every upload endpoint; raises ValueError with a message for the client
+    document_part = request.POST.get("document_part")
+    exception_words_raw = request.POST.get("exception_words")
+    exception_words = []
+    if exception_words_raw:
+        try:
+            exception_words = json.loads(exception_words_raw)
+        except Exception as e:
+            print("JSON decode error:", e)
+    rule_names = parse_rule_names(request.POST.get("rules"), document_part)
+    # "name" uses the latest version, "name@3" pins one; exception_words then only carries the extra words
+    exception_dictionary = None
+    if request.POST.get("exception_dictionary"):
+        try:
+            exception_dictionary = get_dictionary_store().resolve(request.POST["exception_dictionary"])
+        except DictionaryError as e:
+            raise ValueError(str(e))
+    # "faculty" picks the rule profile; its digest keeps results of an edited profile apart
+    try:
+        rule_profile = get_rule_profile_store().resolve(request.POST.get("faculty") or settings.DEFAULT_RULE_PROFILE,
+                                                        document_part)
+    except RuleProfileError as e:
+        raise ValueError(str(e))
+    return {
+        "document_part": document_part,
+        "formatting_check": request.POST.get("formatting_check") == "on",
+        "grammar_check": request.POST.get("grammar_check") == "on",
+        "exception_words": exception_words,
+        "rule_names": rule_names,
+        "exception_dictionary": exception_dictionary,
+        "rule_profile": rule_profile,
+    }
+
+def parse_lineage(request):
+    # "new" starts a lineage; its token comes back with the check and is sent with the next submission
+    lineage = request.POST.get("lineage") or None
+    if lineage == NEW_LINEAGE:
+        return new_token()
+    if lineage and not is_token(lineage):
+        raise ValueError(f"Unknown lineage token, send lineage={NEW_LINEAGE} to start a new one")
+    return lineage
+
+def parse_check_request(request):
+    # Returns (uploaded_file, options) or raises ValueError with a message for the client
+    uploaded_file = request.FILES.get("document") if request.method == "POST" else None
+    if not uploaded_file:
+        raise ValueError("No file uploaded")
+    options = parse_check_options(request)
+    error = document_error(uploaded_file.name)
+    if error:
+        raise ValueError(error)
+    return uploaded_file, options
+
 def check_document(request):
-    if request.method == "POST":
-        uploaded_file = request.FILES.get("document")
-        if not uploaded_file:
-            return JsonResponse({"error": "No file uploaded"}, status=400)
-        document_part = request.POST.get("document_part")
-        formatting_check = request.POST.get("formatting_check") == "on"
-        grammar_check = request.POST.get("grammar_check") == "on"
-        exception_words_raw = request.POST.get("exception_words")
-        exception_words = []
-        if exception_words_raw:
-            try:
-                exception_words = json.loads(exception_words_raw)
-            except Exception as e:
-                print("JSON decode error:", e)
-        if uploaded_file.name.endswith(".docx") or uploaded_file.name.endswith(".doc"):
-            file_stream = BytesIO(uploaded_file.read())
-            result = check_document_rules(file_stream, document_part, formatting_check, grammar_check, exception_words)
-            return JsonResponse(result)
+    try:
+        uploaded_file, options = parse_check_request(request)
+        lineage = parse_lineage(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    profile = request.POST.get("profile") == "on"
+    cache_key = make_cache_key(upload_digest(uploaded_file), **options)
+    job_queue = get_job_queue()
+    # A profiled check has to actually run, and a lineage check has to be compared with the previous one
+    result = None if profile or lineage else get_cached_result(cache_key)
+    if result is not None:
+        return JsonResponse(job_payload(job_queue.complete(options["document_part"], result), DONE))
+    document_path = spool_upload(uploaded_file, job_queue.spool_dir)
+    try:
+        job_id = job_queue.submit(document_path, **options, profile=profile, lineage=lineage,
+                                  on_done=lambda job_result: store_result(cache_key, job_result))
+    except QueueFull:
+        return JsonResponse({"error": "Too many documents are being checked, please try again later"},
+                            status=503)
+    payload = job_payload(job_id, "queued")
+    if lineage:
+        payload["lineage"] = lineage
+    return JsonResponse(payload, status=202)
+
+def event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream; charset=utf-8")
+    response["Cache-Control"] = "no-cache"
+    # Stops nginx from buffering the stream until it ends
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+def check_document_stream(request):
+    # Same form fields as /check/, but results arrive as Server-Sent Events while the check runs
+    try:
+        uploaded_file, options = parse_check_request(request)
+        lineage = parse_lineage(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    profile = request.POST.get("profile") == "on"
+    cache_key = make_cache_key(upload_digest(uploaded_file), **options)
+    result = None if profile or lineage else get_cached_result(cache_key)
+    if result is not None:
+        return event_stream_response(replay_result(result))
+    # Spooled into this process's folder, which the job queue cleans up should the process die
+    document_path = spool_upload(uploaded_file, get_job_queue().spool_dir)
+    try:
+        events = stream_check(document_path, **options, profile=profile, lineage=lineage,
+                              on_done=lambda check_result: store_result(cache_key, check_result))
+    except StreamBusy:
+        return JsonResponse({"error": "Too many documents are being checked, please try again later"},
+                            status=503)
+    return event_stream_response(events)
+
+def check_batch(request):
+    # Several documents (multipart "documents", .zip archives are unpacked) checked with the same options
+    if request.method != "POST" or not request.FILES.getlist("documents"):
+        return JsonResponse({"error": "No files uploaded"}, status=400)
+    job_queue = get_job_queue()
+    try:
+        options = parse_check_options(request)
+        spooled, rejected = spool_batch(request.FILES.getlist("documents"), job_queue.spool_dir)
+    except (ValueError, BatchError) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    if not spooled:
+        return JsonResponse({"error": "No .doc or .docx files in the upload", "rejected": rejected}, status=400)
+
+    profile = request.POST.get("profile") == "on"
+    files = []
+    to_check = []
+    for name, path, digest in spooled:
+        cache_key = make_cache_key(digest, **options)
+        result = None if profile else get_cached_result(cache_key)
+        if result is not None:
+            discard(path)
+            files.append({"name": name, "job_id": job_queue.complete(options["document_part"], result)})
         else:
-            return JsonResponse({"error": "Only .doc and .docx files are supported"}, status=400)
-    return JsonResponse({"error": "No file uploaded"}, status=400)
\ No newline at end of file
+            files.append({"name": name, "job_id": None})
+            to_check.append((files[-1], path, partial(store_result, cache_key)))
+    if len(to_check) > job_queue.queue_limit:
+        for _, path, _ in to_check:
+            discard(path)
+        return JsonResponse({"error": f"At most {job_queue.queue_limit} documents can be checked at once"},
+                            status=400)
+    try:
+        job_ids = job_queue.submit_batch([(path, on_done) for _, path, on_done in to_check], **options,
+                                         profile=profile, concurrency=settings.BATCH_CONCURRENCY)
+    except QueueFull:
+        return JsonResponse({"error": "Too many documents are being checked, please try again later"},
+                            status=503)
+    for (entry, _, _), job_id in zip(to_check, job_ids):
+        entry["job_id"] = job_id
+
+    batch_id = job_queue.store.create_batch(files + rejected)
+    return JsonResponse({
+        "batch_id": batch_id,
+        "status_url": reverse("batch_status", args=[batch_id]),
+        "stream_url": reverse("batch_stream", args=[batch_id]),
+        "files": files,
+        "rejected": rejected,
+    }, status=202)
+
+def batch_status(request, batch_id):
+    store = get_job_queue().store
+    batch = store.get_batch(batch_id)
+    if batch is None:
+        return JsonResponse({"error": "Unknown batch"}, status=404)
+    return JsonResponse(batch_report(store, batch))
+
+def batch_stream(request, batch_id):
+    # One JSON line per document as it finishes, then a summary line
+    store = get_job_queue().store
+    batch = store.get_batch(batch_id)
+    if batch is None:
+        return JsonResponse({"error": "Unknown batch"}, status=404)
+
+    def lines():
+        sent = set()
+        while True:
+            report = batch_report(store, batch)
+            for index, file_result in enumerate(report["files"]):
+                if index not in sent and file_result["status"] in (DONE, FAILED, "rejected"):
+                    sent.add(index)
+                    yield json.dumps(file_result, ensure_ascii=False) + "\n"
+            if report["status"] == DONE:
+                del report["files"]
+                yield json.dumps(report, ensure_ascii=False) + "\n"
+                return
+            time.sleep(BATCH_POLL_SECONDS)
+
+    response = StreamingHttpResponse(lines(), content_type="application/x-ndjson; charset=utf-8")
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+def job_status(request, job_id):
+    job = get_job_queue().store.get(job_id)
+    if job is None:
+        return JsonResponse({"error": "Unknown job"}, status=404)
+    return JsonResponse(job)
+
+def job_result(request, job_id):
+    job = get_job_queue().store.get(job_id)
+    if job is None:
+        return JsonResponse({"error": "Unknown job"}, status=404)
+    if job["status"] != DONE:
+        return JsonResponse({"error": job["error"] or "The check has not finished yet", "status": job["status"]},
+                            status=409)
+    return JsonResponse(job["result"])
+
+def read_dictionary_words(request):
+    # Words come as a JSON list in "words" or as an uploaded text file with one word per line
+    if "words_file" in request.FILES:
+        content = request.FILES["words_file"].read().decode("utf-8-sig")
+        return content.splitlines()
+    try:
+        words = json.loads(request.POST.get("words") or "[]")
+    except json.JSONDecodeError as e:
+        raise DictionaryError(f"words must be a JSON list: {e}")
+    if not isinstance(words, list):
+        raise DictionaryError("words must be a JSON list")
+    return words
+
+def dictionaries(request):
+    store = get_dictionary_store()
+    if request.method == "POST":
+        try:
+            entry = store.save(request.POST.get("name"), read_dictionary_words(request))
+        except DictionaryError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return JsonResponse({"name": entry["name"], "version": entry["version"], "size": len(entry["words"])},
+                            status=201)
+    return JsonResponse({"dictionaries": store.list()})
+
+def dictionary_detail(request, name):
+    store = get_dictionary_store()
+    if request.method == "POST":
+        # mode is "replace" (default), "add" or "remove"; each update creates a new version
+        try:
+            store.get(name)
+            entry = store.save(name, read_dictionary_words(request), request.POST.get("mode", "replace"))
+        except DictionaryError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return JsonResponse({"name": entry["name"], "version": entry["version"], "size": len(entry["words"])})
+    version = request.GET.get("version")
+    try:
+        entry = store.get(name, int(version) if version and version.isdigit() else None)
+    except DictionaryError as e:
+        return JsonResponse({"error": str(e)}, status=404)
+    entry["versions"] = store.versions(name)
+    return JsonResponse(entry)
+
+def rule_profiles(request):
+    return JsonResponse({"profiles": get_rule_profile_store().list(), "default": settings.DEFAULT_RULE_PROFILE})
+
+def rule_profile_detail(request, faculty):
+    # The rules a check of ?document_part= (main_part by default) is held to, default values included
+    document_part = request.GET.get("document_part") or rules.MAIN_PART[0]
+    try:
+        rule_profile = get_rule_profile_store().get(faculty, document_part)
+    except RuleProfileError as e:
+        return JsonResponse({"error": str(e)}, status=404)
+    return JsonResponse({"faculty": faculty, "document_part": document_part, "digest": rule_profile.digest,
+                         "rules": rule_profile.settings})
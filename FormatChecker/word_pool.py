@@ -0,0 +1,235 @@
+import atexit
+import os
+import queue
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from itertools import count
+
+from django.conf import settings
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ApplicationFactory:
+    # Everything except create() is optional; the pool calls all hooks on the worker thread
+    # except kill(), which is called from the thread that gave up waiting.
+
+    def start_thread(self):
+        pass
+
+    def stop_thread(self):
+        pass
+
+    def create(self):
+        raise NotImplementedError
+
+    def is_healthy(self, app):
+        return True
+
+    def close(self, app):
+        pass
+
+    def kill(self, app):
+        pass
+
+
+class WordApplicationFactory(ApplicationFactory):
+    def __init__(self):
+        import pythoncom
+        import win32com.client as win32
+        self.pythoncom = pythoncom
+        self.win32 = win32
+        self.pids = {}
+
+    def start_thread(self):
+        self.pythoncom.CoInitialize()
+
+    def stop_thread(self):
+        self.pythoncom.CoUninitialize()
+
+    def create(self):
+        # DispatchEx always starts a separate WINWORD.EXE instead of attaching to a running one
+        app = self.win32.DispatchEx('Word.Application')
+        app.Visible = False
+        app.DisplayAlerts = 0
+        self.pids[id(app)] = self._find_pid(app)
+        return app
+
+    def _find_pid(self, app):
+        try:
+            import win32gui
+            import win32process
+            caption = f"FormatChecker-{uuid.uuid4().hex}"
+            app.Caption = caption
+            hwnd = win32gui.FindWindow("OpusApp", caption)
+            return win32process.GetWindowThreadProcessId(hwnd)[1] if hwnd else None
+        except Exception as e:
+            print("Could not determine Word process id:", e)
+            return None
+
+    def is_healthy(self, app):
+        try:
+            app.Documents.Count
+            return True
+        except Exception:
+            return False
+
+    def close(self, app):
+        try:
+            for doc in list(app.Documents):
+                doc.Close(SaveChanges=0)
+            app.Quit()
+        except Exception as quit_error:
+            print("Warning: Word quit failed:", quit_error)
+            self.kill(app)
+        self.pids.pop(id(app), None)
+
+    def kill(self, app):
+        pid = self.pids.pop(id(app), None)
+        if pid:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError as e:
+                print("Failed to kill Word process:", e)
+
+
+class _Task:
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+        self.future = Future()
+        self.worker = None
+        self.started_at = None
+
+
+class _Worker(threading.Thread):
+    def __init__(self, pool, index):
+        super().__init__(name=f"word-pool-{index}", daemon=True)
+        self.pool = pool
+        self.app = None
+        self.documents = 0
+        self.killed = False
+        # Set by the pool when it replaced this worker; it finishes what it is stuck in and exits
+        self.abandoned = False
+        self.lock = threading.Lock()
+
+    def run(self):
+        factory = self.pool.factory
+        factory.start_thread()
+        try:
+            while not self.abandoned:
+                task = self.pool.tasks.get()
+                if task is None:
+                    break
+                # Starting (or health-checking) an instance counts against the task's timeout too
+                task.worker = self
+                task.started_at = time.monotonic()
+                try:
+                    app = self._acquire()
+                    if self.abandoned:
+                        raise PoolTimeout("The application took too long to start")
+                    task.future.set_result(task.fn(app, *task.args))
+                    self.documents += 1
+                except BaseException as e:
+                    task.future.set_exception(e)
+                    # The instance may be left in any state after a COM error, so start fresh
+                    self._recycle()
+                finally:
+                    self.killed = False
+        finally:
+            self._recycle()
+            factory.stop_thread()
+
+    def _acquire(self):
+        factory = self.pool.factory
+        if self.app is not None and (self.documents >= self.pool.max_documents or not factory.is_healthy(self.app)):
+            self._recycle()
+        if self.app is None:
+            app = factory.create()
+            with self.lock:
+                self.app = app
+            self.documents = 0
+        return self.app
+
+    def _recycle(self):
+        with self.lock:
+            app, self.app = self.app, None
+        if app is not None and not self.killed:
+            self.pool.factory.close(app)
+
+    def kill(self):
+        # False when there is no instance to kill yet, e.g. while one is still being created
+        with self.lock:
+            if self.app is None:
+                return False
+            self.killed = True
+            self.pool.factory.kill(self.app)
+            return True
+
+
+class ApplicationPool:
+    def __init__(self, factory, size=1, max_documents=50, timeout=300):
+        self.factory = factory
+        self.max_documents = max_documents
+        self.timeout = timeout
+        self.tasks = queue.Queue()
+        self.lock = threading.Lock()
+        self._numbers = count()
+        self.workers = [_Worker(self, next(self._numbers)) for _ in range(size)]
+        for worker in self.workers:
+            worker.start()
+
+    def run(self, fn, *args, timeout=None):
+        # fn(app, *args) runs on a worker thread that owns a long-lived application instance.
+        # The timeout counts from the moment a worker picks the task up, not from queueing.
+        timeout = self.timeout if timeout is None else timeout
+        task = _Task(fn, args)
+        self.tasks.put(task)
+        while True:
+            try:
+                return task.future.result(timeout=1 if timeout else None)
+            except FutureTimeout:
+                started_at = task.started_at
+                if started_at is not None and time.monotonic() - started_at > timeout:
+                    if not task.worker.kill():
+                        # Hung creating an instance there is nothing to kill yet; a new worker takes its place
+                        self._replace(task.worker)
+                    raise PoolTimeout(f"The application did not finish within {timeout} seconds and was killed")
+
+    def _replace(self, worker):
+        with self.lock:
+            if worker.abandoned or worker not in self.workers:
+                return
+            worker.abandoned = True
+            replacement = _Worker(self, next(self._numbers))
+            self.workers[self.workers.index(worker)] = replacement
+        replacement.start()
+
+    def shutdown(self):
+        for _ in self.workers:
+            self.tasks.put(None)
+        for worker in self.workers:
+            worker.join(timeout=30)
+
+
+_word_pool = None
+_word_pool_lock = threading.Lock()
+
+
+def get_word_pool():
+    global _word_pool
+    with _word_pool_lock:
+        if _word_pool is None:
+            _word_pool = ApplicationPool(
+                WordApplicationFactory(),
+                size=settings.WORD_POOL_SIZE,
+                max_documents=settings.WORD_POOL_MAX_DOCUMENTS,
+                timeout=settings.WORD_POOL_TIMEOUT,
+            )
+            atexit.register(_word_pool.shutdown)
+        return _word_pool
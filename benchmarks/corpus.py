@@ -0,0 +1,171 @@
+import io
+import random
+import struct
+import zlib
+from collections import Counter
+
+import docx
+from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_BREAK
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt, Cm
+
+PARAGRAPHS_PER_PAGE = 7
+PAGES_PER_CHAPTER = 8
+
+WORDS = (
+    "система", "модуль", "користувач", "документ", "сервер", "запит", "таблиця", "дані", "програма",
+    "інтерфейс", "алгоритм", "обробка", "перевірка", "результат", "функція", "параметр", "вимога",
+    "розробка", "тестування", "архітектура", "компонент", "збереження", "структура", "формат",
+)
+# The LanguageTool stub flags words ending in "юю", so every page has something to report
+TYPOS = ("системаюю", "модулюю", "даніюю")
+
+
+def png_bytes(width=64, height=48):
+    # A flat grey PNG, enough for python-docx to read the size from
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    raw = b"".join(b"\x00" + b"\x80" * (width * 3) for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw))
+            + chunk(b"IEND", b""))
+
+
+def sentence(rng, words=14, typo_rate=0.05):
+    chosen = [rng.choice(TYPOS) if rng.random() < typo_rate else rng.choice(WORDS) for _ in range(words)]
+    return " ".join(chosen).capitalize() + "."
+
+
+def add_field(paragraph, kind):
+    run = paragraph.add_run()
+    fld_char = OxmlElement("w:fldChar")
+    fld_char.set(qn("w:fldCharType"), kind)
+    run._r.append(fld_char)
+
+
+def add_toc(document, headings):
+    title = document.add_paragraph("ЗМІСТ")
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    first = document.add_paragraph()
+    add_field(first, "begin")
+    instruction = OxmlElement("w:instrText")
+    instruction.text = 'TOC \\o "1-3"'
+    first.add_run()._r.append(instruction)
+    add_field(first, "separate")
+    for index, (text, page) in enumerate(headings):
+        paragraph = first if index == 0 else document.add_paragraph()
+        paragraph.add_run(f"{text}\t{page}")
+    add_field(document.add_paragraph(), "end")
+
+
+def add_heading(document, text, centered=False):
+    paragraph = document.add_paragraph()
+    paragraph.add_run(text).bold = True
+    if centered:
+        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    return paragraph
+
+
+def add_body(document, rng):
+    paragraph = document.add_paragraph(" ".join(sentence(rng) for _ in range(rng.randint(2, 4))))
+    paragraph.paragraph_format.line_spacing = 1.5
+    paragraph.paragraph_format.first_line_indent = Cm(1.25)
+    return paragraph
+
+
+def add_list(document, rng, depth):
+    # List Number, List Number 2 and 3 nest one level deeper each; the default template stops at 3
+    for level in range(min(depth, 3)):
+        style = "List Number" if level == 0 else f"List Number {level + 1}"
+        for _ in range(rng.randint(2, 3)):
+            document.add_paragraph(sentence(rng, words=5, typo_rate=0), style=style)
+    document.add_paragraph(sentence(rng, words=4, typo_rate=0), style="List Bullet")
+
+
+def add_table(document, rng, number, rows=6, cols=4):
+    document.add_paragraph(f"Таблиця {number}").paragraph_format.right_indent = Cm(0.25)
+    caption = document.add_paragraph(f"Назва таблиці {number}")
+    caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    table = document.add_table(rows=rows, cols=cols)
+    for row in table.rows:
+        for cell in row.cells:
+            cell.text = rng.choice(WORDS)
+    # One horizontal and one vertical merge per table
+    table.cell(0, 0).merge(table.cell(0, 1))
+    table.cell(1, cols - 1).merge(table.cell(min(3, rows - 1), cols - 1))
+    return table
+
+
+def add_image(document, number, image):
+    document.add_picture(io.BytesIO(image), width=Cm(8))
+    document.paragraphs[-1].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    caption = document.add_paragraph(f"Рис. {number} – Схема компонента")
+    caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+
+def page_break(document):
+    document.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+
+
+def build_thesis(pages=20, tables=4, images=4, list_depth=2, toc=True, seed=0):
+    rng = random.Random(seed)
+    image = png_bytes()
+    document = docx.Document()
+    normal = document.styles["Normal"]
+    normal.font.name = "Times New Roman"
+    normal.font.size = Pt(14)
+    section = document.sections[0]
+    section.page_width, section.page_height = Cm(21), Cm(29.7)
+    section.left_margin, section.right_margin = Cm(3), Cm(1.5)
+    section.top_margin, section.bottom_margin = Cm(2), Cm(2)
+
+    chapters = max(1, pages // PAGES_PER_CHAPTER)
+    headings = [("ВСТУП", 3)]
+    for chapter in range(1, chapters + 1):
+        headings.append((f"{chapter}. РОЗДІЛ НОМЕР {chapter}", 3 + chapter))
+        headings.append((f"{chapter}.1. Підрозділ {chapter}.1", 3 + chapter))
+    headings.append(("ВИСНОВКИ", pages))
+
+    document.add_paragraph("Титульна сторінка")
+    page_break(document)
+    if toc:
+        add_toc(document, headings)
+        page_break(document)
+
+    add_heading(document, "ВСТУП", centered=True)
+    # Tables and images are spread evenly over the body pages
+    table_pages = Counter(int(i * pages / tables) for i in range(tables))
+    image_pages = Counter(int((i + 0.5) * pages / images) for i in range(images))
+    chapter = 0
+    table_number = image_number = 0
+    for page in range(pages):
+        if page % PAGES_PER_CHAPTER == 0 and chapter < chapters:
+            chapter += 1
+            page_break(document)
+            add_heading(document, headings[2 * chapter - 1][0])
+            add_heading(document, headings[2 * chapter][0])
+        for _ in range(PARAGRAPHS_PER_PAGE):
+            add_body(document, rng)
+        if page % 3 == 1:
+            add_list(document, rng, list_depth)
+        for _ in range(table_pages[page]):
+            table_number += 1
+            add_table(document, rng, f"{chapter}.{table_number}")
+        for _ in range(image_pages[page]):
+            image_number += 1
+            add_image(document, f"{chapter}.{image_number}", image)
+        page_break(document)
+
+    add_heading(document, "ВИСНОВКИ", centered=True)
+    add_body(document, rng)
+    document.add_paragraph("ДОДАТКИ")
+    return document
+
+
+def write_thesis(path, **options):
+    build_thesis(**options).save(path)
+    return path
@@ -0,0 +1,85 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+TYPO = re.compile(r"\w+юю\b")
+MESSAGE = "Знайдено потенційну орфографічну помилку."
+
+
+class LanguageToolStub(ThreadingHTTPServer):
+    # Answers /v2/check like LanguageTool, flagging every word that ends in "юю". Status codes put in
+    # `statuses` answer the next requests instead (with Retry-After: retry_after, if set), e.g. to test retries.
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_received = 0
+        self.statuses = deque()
+        self.retry_after = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/v2/check"
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.bytes_received = 0
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="languagetool-stub", daemon=True).start()
+        return self
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        # /v2/languages, used by the endpoint health checks
+        data = json.dumps([{"name": "Ukrainian", "code": "uk", "longCode": "uk-UA"}]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.bytes_received += len(body)
+            status = self.server.statuses.popleft() if self.server.statuses else 200
+        if status != 200:
+            self.send_response(status)
+            if self.server.retry_after is not None:
+                self.send_header("Retry-After", str(self.server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        text = parse_qs(body.decode("utf-8")).get("text", [""])[0]
+        matches = [
+            {
+                "offset": match.start(),
+                "length": len(match.group()),
+                "message": MESSAGE,
+                "replacements": [{"value": match.group()[:-2]}],
+                "rule": {"id": "MORFOLOGIK_RULE_UK_UA"},
+            }
+            for match in TYPO.finditer(text)
+        ]
+        data = json.dumps({"matches": matches}, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
@@ -0,0 +1,123 @@
+# Per-paragraph cost of the text normalization the formatting rules do, before and after text_utils.
+#
+#     python -m benchmarks.normalization --pages 50 --repeat 5
+#
+# "before" are copies of the inline re.sub / join code the checkers used to run; "cold" is text_utils with
+# its memo cleared before every run, "warm" is text_utils after one pass over the same document.
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+
+from benchmarks.corpus import build_thesis
+from FormatChecker.checkers import text_utils
+
+
+def clean_topic_name_before(topic, to_upper=False, to_lower=False):
+    cleaned_topic = ''.join([i for i in topic if not i.isdigit()]).replace('.', '').replace('\t', '').strip()
+    if to_upper:
+        return cleaned_topic.upper()
+    elif to_lower:
+        return cleaned_topic.lower()
+    return cleaned_topic
+
+
+def list_marker_before(text):
+    list_patterns = [
+        r'^\d+\.\s',
+        r'^\d+\)\s',
+        r'^[*•–-]\s',
+    ]
+    for pattern in list_patterns:
+        if re.match(pattern, text):
+            return not re.match(pattern + r'\S', text)
+    return False
+
+
+def list_marker_after(text):
+    for marker, spaced_marker in text_utils.LIST_MARKERS:
+        if marker.match(text):
+            return not spaced_marker.match(text)
+    return False
+
+
+def clean_cell_before(text):
+    cleaned = re.sub(r'[\x00-\x1F\x7F]', '', text).strip()
+    return re.sub(r'\s+', ' ', cleaned)
+
+
+def strip_toc_entry_before(text):
+    cleaned = re.sub(r'[.…•·⋯⋅]{2,}', '', text)
+    return re.sub(r'\s*\d{1,3}$', '', cleaned).strip()
+
+
+def topic_names_before(text):
+    return clean_topic_name_before(text), clean_topic_name_before(text, to_upper=True)
+
+
+def topic_names_after(text):
+    return text_utils.clean_topic_name(text), text_utils.clean_topic_name(text, to_upper=True)
+
+
+# What one paragraph (or table cell) goes through in the rules: (name, before, after, input)
+OPERATIONS = [
+    ("clean_topic_name", topic_names_before, topic_names_after, "paragraphs"),
+    ("list_marker", list_marker_before, list_marker_after, "paragraphs"),
+    ("strip_toc_entry", strip_toc_entry_before, text_utils.strip_toc_entry, "paragraphs"),
+    ("clean_cell_text", clean_cell_before, text_utils.clean_cell_text, "cells"),
+]
+
+
+def document_texts(pages, seed):
+    document = build_thesis(pages=pages, tables=max(1, pages // 5), images=max(1, pages // 5), seed=seed)
+    paragraphs = [paragraph.text.strip() for paragraph in document.paragraphs]
+    # Cell text as Word returns it, with the end-of-cell mark
+    cells = [cell.text + "\r\x07" for table in document.tables for row in table.rows for cell in row.cells]
+    return {"paragraphs": paragraphs, "cells": cells}
+
+
+def per_item(func, texts, repeat, before_each=None):
+    # Median microseconds per text over `repeat` passes
+    samples = []
+    for _ in range(repeat):
+        if before_each:
+            before_each()
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        samples.append((time.perf_counter() - start) / max(len(texts), 1) * 1e6)
+    return statistics.median(samples)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.normalization",
+                                     description="Benchmark per-paragraph text normalization")
+    parser.add_argument("--pages", type=int, default=50, help="size of the synthetic thesis")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="passes per measurement; the median is reported")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    texts = document_texts(args.pages, args.seed)
+    report = {"paragraphs": len(texts["paragraphs"]), "cells": len(texts["cells"]), "microseconds": {}}
+    for name, before, after, source in OPERATIONS:
+        items = texts[source]
+        for text in items:
+            # Both versions must agree before their speed means anything
+            if before(text) != after(text):
+                raise AssertionError(f"{name} differs for {text!r}")
+        report["microseconds"][name] = {
+            "before": per_item(before, items, args.repeat),
+            "cold": per_item(after, items, args.repeat, before_each=text_utils.clean_topic_name.cache_clear),
+            "warm": per_item(after, items, args.repeat),
+        }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+# Times every formatting rule, each checker's check_formatting and the grammar pass.
+#
+#     python -m benchmarks.run --pages 10 50 200 --output benchmark.json
+#     python -m benchmarks.run --pages 50 --baseline benchmark.json --threshold 0.25
+#
+# Synthetic theses are generated on the fly unless --documents is given. LanguageTool is replaced by a
+# local stub, so the grammar numbers measure this code and the HTTP round-trips, not a real server.
+# With --baseline, the exit status is 1 when any timing got slower than the threshold allows.
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import write_thesis
+from benchmarks.lt_stub import LanguageToolStub
+
+
+def timed(func, *args, repeat=1, **kwargs):
+    # Returns (result of the last call, median seconds)
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        samples.append(time.perf_counter() - start)
+    return result, statistics.median(samples)
+
+
+def output_lines(output):
+    if isinstance(output, str):
+        return len([line for line in output.splitlines() if line.strip()])
+    return len(output or [])
+
+
+def setup_django(languagetool_url):
+    # ai_utils reads the endpoints when it is imported
+    os.environ["LANGUAGETOOL_URL"] = languagetool_url
+    os.environ["LANGUAGETOOL_URLS"] = languagetool_url
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "FormatChecker.settings")
+    import django
+    django.setup()
+
+
+def bench_part(doc, paragraphs, document_part, repeat):
+    from FormatChecker.checkers import rules, main_part_checker, extras_checker
+
+    selected = rules.select_rules(document_part)
+    values = {"doc": doc, "paragraphs": paragraphs, "document_part": document_part}
+    inputs = {}
+    for rule in selected:
+        for name in rule.inputs:
+            if name not in values:
+                # Includes whatever the input depends on that is not computed yet
+                _, inputs[name] = timed(rules.compute_inputs, [rules.Rule(name, None, (name,), (), None)], values)
+
+    rule_results = {}
+    for rule in selected:
+        output, seconds = timed(rule, values, repeat=repeat)
+        rule_results[rule.name] = {"seconds": seconds, "cost": rule.cost, "findings": output_lines(output)}
+
+    if document_part in main_part_checker.PARTS:
+        _, formatting_seconds = timed(main_part_checker.check_formatting, doc, paragraphs, repeat=repeat)
+    else:
+        _, formatting_seconds = timed(extras_checker.check_formatting, doc, paragraphs, document_part, repeat=repeat)
+
+    return {"inputs": inputs, "rules": rule_results, "check_formatting": formatting_seconds}
+
+
+def bench_grammar(paragraphs, stub):
+    from django.core.cache.backends.locmem import LocMemCache
+    from FormatChecker.checkers import ai_utils
+    from FormatChecker.checkers.rule_profile import default_profile
+
+    selected = ai_utils.collect_spelling_paragraphs(paragraphs, default_profile("main_part"))
+    result = {"paragraphs": len(selected), "characters": sum(len(p.text) for p in selected)}
+    cache = LocMemCache("benchmark-grammar", {"OPTIONS": {"MAX_ENTRIES": 1000000}})
+    # Cold: every paragraph goes to the stub. Warm: the same document again, answered from the cache.
+    for label in ("cold", "warm"):
+        stub.reset()
+        lines, seconds = timed(ai_utils.check_document_spelling, paragraphs, [], cache=cache)
+        result[label] = {
+            "seconds": seconds,
+            "requests": stub.requests,
+            "bytes_sent": stub.bytes_received,
+            "findings": 0 if lines == ["No grammar errors found"] else len(lines),
+        }
+    return result
+
+
+def bench_document(path, backend, parts, repeat, grammar, stub):
+    from FormatChecker.doc_checker import BACKENDS
+    from FormatChecker.checkers.snapshot import take_paragraph_snapshot
+
+    read_document = BACKENDS[backend]
+    _, open_seconds = timed(read_document, path, lambda doc: None, repeat=repeat)
+
+    def read(doc):
+        paragraphs, snapshot_seconds = timed(take_paragraph_snapshot, doc, repeat=repeat)
+        return {
+            "paragraphs": len(paragraphs),
+            "tables": doc.Tables.Count,
+            "inline_shapes": doc.InlineShapes.Count,
+            "open": open_seconds,
+            "snapshot": snapshot_seconds,
+            "parts": {part: bench_part(doc, paragraphs, part, repeat) for part in parts},
+        }, paragraphs
+
+    result, paragraphs = read_document(path, read)
+    if grammar:
+        result["grammar"] = bench_grammar(paragraphs, stub)
+    return result
+
+
+def flatten_timings(report):
+    # "document/part/rules/name" -> seconds, the shape compared against a baseline
+    timings = {}
+    for name, document in report["documents"].items():
+        timings[f"{name}/open"] = document["open"]
+        timings[f"{name}/snapshot"] = document["snapshot"]
+        for part, part_result in document["parts"].items():
+            timings[f"{name}/{part}/check_formatting"] = part_result["check_formatting"]
+            for input_name, seconds in part_result["inputs"].items():
+                timings[f"{name}/{part}/inputs/{input_name}"] = seconds
+            for rule_name, rule_result in part_result["rules"].items():
+                timings[f"{name}/{part}/rules/{rule_name}"] = rule_result["seconds"]
+        if "grammar" in document:
+            for label in ("cold", "warm"):
+                timings[f"{name}/grammar/{label}"] = document["grammar"][label]["seconds"]
+    return timings
+
+
+def find_regressions(report, baseline, threshold, min_seconds):
+    # Timings under min_seconds in both runs are noise and never count as regressions
+    current = flatten_timings(report)
+    previous = flatten_timings(baseline)
+    regressions = []
+    for key, seconds in current.items():
+        before = previous.get(key)
+        if before is None or max(before, seconds) < min_seconds:
+            continue
+        if seconds > before * (1 + threshold):
+            regressions.append({"metric": key, "baseline": before, "current": seconds,
+                                "ratio": seconds / before if before else float("inf")})
+    return regressions
+
+
+def build_corpus(args, directory):
+    documents = {}
+    for pages in args.pages:
+        tables = args.tables if args.tables is not None else max(1, pages // 5)
+        images = args.images if args.images is not None else max(1, pages // 5)
+        name = f"thesis-{pages}p-{tables}t-{images}i"
+        documents[name] = write_thesis(os.path.join(directory, f"{name}.docx"), pages=pages, tables=tables,
+                                       images=images, list_depth=args.list_depth, toc=not args.no_toc,
+                                       seed=args.seed)
+    return documents
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Benchmark the document checks")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50], help="sizes of the synthetic theses")
+    parser.add_argument("--tables", type=int, help="tables per document (default: one per 5 pages)")
+    parser.add_argument("--images", type=int, help="images per document (default: one per 5 pages)")
+    parser.add_argument("--list-depth", type=int, default=2, help="nesting depth of the lists, up to 3")
+    parser.add_argument("--no-toc", action="store_true", help="leave out the table of contents field")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--documents", nargs="+", help="benchmark these .docx files instead of a synthetic corpus")
+    parser.add_argument("--corpus-dir", help="keep the generated corpus here instead of a temporary directory")
+    parser.add_argument("--backend", help="document backend, defaults to DOCUMENT_BACKEND")
+    parser.add_argument("--parts", nargs="+", help="document parts to check (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the median is reported")
+    parser.add_argument("--no-grammar", action="store_true", help="skip the LanguageTool pass")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the LanguageTool stub waits per request")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 means 25%%")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="ignore timings below this")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    stub = LanguageToolStub(latency=args.latency).start()
+    setup_django(stub.url)
+
+    from django.conf import settings
+    from FormatChecker.checkers import rules
+    # Importing the checkers registers their rules
+    from FormatChecker import doc_checker  # noqa: F401
+
+    backend = args.backend or settings.DOCUMENT_BACKEND
+    parts = args.parts or sorted(rules.known_parts())
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.documents:
+            documents = {os.path.basename(path): os.path.abspath(path) for path in args.documents}
+        else:
+            corpus_dir = args.corpus_dir or temp_dir
+            os.makedirs(corpus_dir, exist_ok=True)
+            documents = build_corpus(args, corpus_dir)
+
+        report = {
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "backend": backend,
+                "repeat": args.repeat,
+            },
+            "documents": {
+                name: bench_document(path, backend, parts, args.repeat, not args.no_grammar, stub)
+                for name, path in documents.items()
+            },
+        }
+    stub.shutdown()
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["regressions"] = find_regressions(report, baseline, args.threshold, args.min_seconds)
+        for regression in report["regressions"]:
+            print(f"Regression: {regression['metric']} {regression['baseline']:.4f}s -> "
+                  f"{regression['current']:.4f}s", file=sys.stderr)
+        status = 1 if report["regressions"] else 0
+
+    data = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data)
+    else:
+        print(data)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@ document.addEventListener("DOMContentLoaded", () => {
     const downloadBtn = document.getElementById("download-btn");
 
     const grammarCheck = document.getElementById("grammar_check");
+    const comparePrevious = document.getElementById("compare_previous");
     const exceptionSection = document.getElementById("exception-section");
     const exceptionInput = document.getElementById("exception_input");
     const addBtn = document.getElementById("add_exception");
@@ -77,6 +78,181 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
+    function describeProgress(job) {
+        const parts = [];
+        if (job.rules_total) {
+            parts.push(`formatting rules: ${job.rules_done}/${job.rules_total}`);
+        }
+        if (job.paragraphs_total) {
+            parts.push(`paragraphs spell-checked: ${job.paragraphs_checked}/${job.paragraphs_total}`);
+        }
+        return job.status === "queued" ? "Waiting in queue..." : parts.join(", ");
+    }
+
+    async function waitForJob(job) {
+        const statusUrl = job.status_url;
+        const resultUrl = job.result_url;
+
+        while (job.status !== "done" && job.status !== "failed") {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const statusResponse = await fetch(statusUrl);
+            job = await statusResponse.json();
+            if (!job.status) {
+                return job;
+            }
+            resultDiv.innerText = describeProgress(job);
+        }
+
+        if (job.status === "failed") {
+            return {error: job.error || "The check failed."};
+        }
+        const resultResponse = await fetch(resultUrl);
+        return await resultResponse.json();
+    }
+
+    function appendTitle(text) {
+        const title = document.createElement("h2");
+        title.textContent = text;
+        resultDiv.appendChild(title);
+    }
+
+    function appendLine(line) {
+        if (line) {
+            const p = document.createElement("p");
+            p.textContent = line;
+            p.style.marginBottom = "5px";
+            resultDiv.appendChild(p);
+        }
+    }
+
+    function showError(message) {
+        resultDiv.innerHTML = "";
+        const p = document.createElement("p");
+        p.textContent = message;
+        resultDiv.appendChild(p);
+    }
+
+    function renderResult(result) {
+        resultDiv.innerHTML = "";
+        if (result.formatting) {
+            appendTitle("Formatting: ");
+            result.formatting.forEach(appendLine);
+        }
+        if (result.grammar) {
+            appendTitle("Grammar: ");
+            result.grammar.forEach(appendLine);
+        }
+        if (result.changes && result.changes.previous_check) {
+            appendTitle("Since the previous submission: ");
+            appendLine(`${result.changes.new.length} new, ${result.changes.fixed.length} fixed, ` +
+                       `${result.changes.unchanged} unchanged issues`);
+            result.changes.fixed.forEach(line => appendLine("Fixed: " + line));
+        }
+    }
+
+    function showDownload(result) {
+        downloadBtn.style.display = "inline-block";
+        downloadBtn.onclick = () => {
+            let content = "";
+
+            if (result.formatting && result.formatting.length > 0) {
+                content += "Formatting errors:\n" + result.formatting.join("\n") + "\n\n";
+            }
+
+            if (result.grammar && result.grammar.length > 0) {
+                content += "Grammar errors:\n" + result.grammar.join("\n") + "\n";
+            }
+
+            const blob = new Blob([content], { type: "text/plain" });
+            const url = URL.createObjectURL(blob);
+            const a = document.createElement("a");
+            a.href = url;
+            a.download = "document_check_results.txt";
+            a.click();
+            URL.revokeObjectURL(url);
+        };
+    }
+
+    // Splits a text/event-stream body into {event, data} objects as the chunks arrive
+    async function* readEvents(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+            const {value, done} = await reader.read();
+            if (done) {
+                return;
+            }
+            buffer += decoder.decode(value, {stream: true}).replace(/\r\n/g, "\n");
+            let boundary;
+            while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let event = "message";
+                const data = [];
+                block.split("\n").forEach(line => {
+                    if (line.startsWith("event:")) {
+                        event = line.slice(6).trim();
+                    } else if (line.startsWith("data:")) {
+                        data.push(line.slice(5).trimStart());
+                    }
+                });
+                if (data.length > 0) {
+                    yield {event: event, data: JSON.parse(data.join("\n"))};
+                }
+            }
+        }
+    }
+
+    async function streamCheck(formData) {
+        const response = await fetch(form.dataset.streamUrl, {
+            method: "POST",
+            body: formData
+        });
+        if (!response.ok) {
+            return await response.json();
+        }
+
+        // Sections are created by the first event of their kind; progress goes to the status line
+        const status = document.createElement("p");
+        const formattingDiv = document.createElement("div");
+        const grammarDiv = document.createElement("div");
+        resultDiv.innerHTML = "";
+        resultDiv.append(status, formattingDiv, grammarDiv);
+
+        function appendTo(section, title, line) {
+            if (!section.hasChildNodes()) {
+                const h2 = document.createElement("h2");
+                h2.textContent = title;
+                section.appendChild(h2);
+            }
+            if (line) {
+                const p = document.createElement("p");
+                p.textContent = line;
+                p.style.marginBottom = "5px";
+                section.appendChild(p);
+            }
+        }
+
+        for await (const {event, data} of readEvents(response)) {
+            if (event === "progress") {
+                status.textContent = describeProgress(Object.assign({status: "running"}, data));
+            } else if (event === "formatting") {
+                appendTo(formattingDiv, "Formatting: ", null);
+                (data.result || "").split("\n").forEach(line => appendTo(formattingDiv, "Formatting: ", line));
+            } else if (event === "grammar") {
+                appendTo(grammarDiv, "Grammar: ", null);
+                data.lines.forEach(line => appendTo(grammarDiv, "Grammar: ", line));
+            } else if (event === "error") {
+                return {error: data.error};
+            } else if (event === "done") {
+                status.remove();
+                return data.result;
+            }
+        }
+        return {error: "The connection closed before the check finished."};
+    }
+
     form.addEventListener("submit", async function(event) {
         event.preventDefault();
 
@@ -92,75 +268,43 @@ document.addEventListener("DOMContentLoaded", () => {
         if (grammarCheck.checked && exceptionWords.length > 0) {
             formData.append("exception_words", JSON.stringify(exceptionWords));
         }
+        // The server hands out the lineage token with the first compared check; this browser keeps it
+        if (comparePrevious.checked) {
+            formData.append("lineage", localStorage.getItem("lineage") || "new");
+        }
 
         try {
-            let response = await fetch(form.action, {
-                method: "POST",
-                body: formData
-            });
+            let result;
+            let streamed = false;
+            if (form.dataset.streamUrl && window.ReadableStream && window.TextDecoder) {
+                result = await streamCheck(formData);
+                streamed = !result.error;
+            } else {
+                let response = await fetch(form.action, {
+                    method: "POST",
+                    body: formData
+                });
 
-            let result = await response.json();
-            console.log(result)
+                result = await response.json();
+                if (result.job_id) {
+                    result = await waitForJob(result);
+                }
+            }
             loading.style.display = "none";
 
             submitBtn.disabled = false;
             submitBtn.textContent = "Check Document";
 
-            if (result.error){
-                resultDiv.innerHTML = "";
-                const p = document.createElement("p");
-                            console.log(result)
-                            p.textContent = result.error;
-                            resultDiv.appendChild(p);
+            if (result.changes && result.changes.lineage) {
+                localStorage.setItem("lineage", result.changes.lineage);
             }
-            else if(result && !result.error) {
-                resultDiv.innerHTML = "";
-                if (result.formatting) {
-                    const formattingTitle = document.createElement("h2");
-                    formattingTitle.textContent = "Formatting: ";
-                    resultDiv.appendChild(formattingTitle);
-                    result.formatting.forEach(line => {
-                        if (line) {
-                            const p = document.createElement("p");
-                            p.textContent = line;
-                            p.style.marginBottom = "5px";
-                            resultDiv.appendChild(p);
-                        }
-                    })}
-                if (result.grammar) {
-                    const grammarTitle = document.createElement("h2");
-                    grammarTitle.textContent = "Grammar: ";
-                    resultDiv.appendChild(grammarTitle);
-                    result.grammar.forEach(line => {
-                        if (line) {
-                            const p = document.createElement("p");
-                            p.textContent = line;
-                            p.style.marginBottom = "5px";
-                            resultDiv.appendChild(p);
-                        }
-                    });
+            if (result.error) {
+                showError(result.error);
+            } else if (result) {
+                if (!streamed) {
+                    renderResult(result);
                 }
-
-                downloadBtn.style.display = "inline-block";
-                downloadBtn.onclick = () => {
-                    let content = "";
-
-                    if (result.formatting && result.formatting.length > 0) {
-                        content += "Formatting errors:\n" + result.formatting.join("\n") + "\n\n";
-                    }
-
-                    if (result.grammar && result.grammar.length > 0) {
-                        content += "Grammar errors:\n" + result.grammar.join("\n") + "\n";
-                    }
-
-                    const blob = new Blob([content], { type: "text/plain" });
-                    const url = URL.createObjectURL(blob);
-                    const a = document.createElement("a");
-                    a.href = url;
-                    a.download = "document_check_results.txt";
-                    a.click();
-                    URL.revokeObjectURL(url);
-                };
+                showDownload(result);
             } else {
                 resultDiv.innerText = "Something went wrong.";
             }